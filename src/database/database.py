@@ -2,34 +2,432 @@
 DynamoDB connection manager for AWS Lambda.
 """
 import os
+import threading
+import time
 import boto3
-from typing import Optional
+from botocore.config import Config
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+# Error codes DynamoDB returns when a request is throttled
+THROTTLING_ERROR_CODES = frozenset({
+    'ProvisionedThroughputExceededException',
+    'ThrottlingException',
+    'RequestLimitExceeded',
+})
+
+
+class ThrottledError(Exception):
+    """Raised when a DynamoDB call is throttled or rejected to shed load."""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def _env_flag(name: str, default: bool) -> bool:
+    """Read a boolean environment variable, falling back to default."""
+    raw = os.environ.get(name)
+    if raw is None or raw == '':
+        return default
+    return raw.strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def _env_number(name: str, default, cast):
+    """Read a numeric environment variable, falling back to default."""
+    raw = os.environ.get(name)
+    if raw is None or raw == '':
+        return default
+    try:
+        return cast(raw)
+    except ValueError:
+        raise ValueError(f"{name} must be a number, got {raw!r}")
+
+
+@dataclass
+class ClientConfig:
+    """DynamoDB client settings, read from environment variables."""
+
+    retry_mode: str = 'adaptive'
+    max_attempts: int = 5  # Total attempts, including the first request
+    target_rps: float = 0.0  # 0 disables the client-side limiter
+    burst: Optional[float] = None  # Defaults to target_rps
+    limiter_max_wait_seconds: float = 1.0
+    breaker_threshold: int = 5  # 0 disables the circuit breaker
+    breaker_reset_seconds: float = 30.0
+    max_pool_connections: int = 10  # Shared by all threads using the client
+    tcp_keepalive: bool = True
+    connect_timeout: float = 5.0
+    read_timeout: float = 10.0
+
+    @classmethod
+    def from_env(cls) -> 'ClientConfig':
+        """Build the configuration from DYNAMODB_* environment variables."""
+        return cls(
+            retry_mode=os.environ.get('DYNAMODB_RETRY_MODE') or cls.retry_mode,
+            max_attempts=_env_number('DYNAMODB_MAX_ATTEMPTS', cls.max_attempts, int),
+            target_rps=_env_number('DYNAMODB_TARGET_RPS', cls.target_rps, float),
+            burst=_env_number('DYNAMODB_BURST', cls.burst, float),
+            limiter_max_wait_seconds=_env_number(
+                'DYNAMODB_LIMITER_MAX_WAIT_SECONDS', cls.limiter_max_wait_seconds, float
+            ),
+            breaker_threshold=_env_number('DYNAMODB_BREAKER_THRESHOLD', cls.breaker_threshold, int),
+            breaker_reset_seconds=_env_number(
+                'DYNAMODB_BREAKER_RESET_SECONDS', cls.breaker_reset_seconds, float
+            ),
+            max_pool_connections=_env_number(
+                'DYNAMODB_MAX_POOL_CONNECTIONS', cls.max_pool_connections, int
+            ),
+            tcp_keepalive=_env_flag('DYNAMODB_TCP_KEEPALIVE', cls.tcp_keepalive),
+            connect_timeout=_env_number('DYNAMODB_CONNECT_TIMEOUT', cls.connect_timeout, float),
+            read_timeout=_env_number('DYNAMODB_READ_TIMEOUT', cls.read_timeout, float),
+        )
+
+    def botocore_config(self) -> Config:
+        """Build the botocore client configuration."""
+        return Config(
+            retries={'mode': self.retry_mode, 'total_max_attempts': self.max_attempts},
+            max_pool_connections=self.max_pool_connections,
+            tcp_keepalive=self.tcp_keepalive,
+            connect_timeout=self.connect_timeout,
+            read_timeout=self.read_timeout,
+        )
+
+
+class TokenBucket:
+    """Thread-safe token bucket limiting the request rate to DynamoDB."""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep):
+        """
+        Initialize a full bucket.
+
+        Args:
+            rate: Tokens added per second
+            capacity: Maximum burst size (defaults to rate, at least 1)
+            clock: Monotonic clock (injectable for tests)
+            sleep: Sleep function (injectable for tests)
+        """
+        if rate <= 0:
+            raise ValueError("Rate must be positive")
+        self.rate = rate
+        self.capacity = capacity if capacity else max(rate, 1.0)
+        self._tokens = self.capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1.0, max_wait: Optional[float] = None) -> bool:
+        """
+        Take tokens from the bucket, waiting for them if needed.
+
+        Tokens are reserved before waiting, so concurrent callers queue up
+        instead of all waking up at once.
+
+        Args:
+            tokens: Number of tokens to take
+            max_wait: Maximum seconds to wait (None waits as long as needed)
+
+        Returns:
+            True if the tokens were taken, False if that would exceed max_wait
+        """
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+
+            wait = max(0.0, (tokens - self._tokens) / self.rate)
+            if max_wait is not None and wait > max_wait:
+                return False
+            self._tokens -= tokens
+
+        if wait > 0:
+            self._sleep(wait)
+        return True
+
+
+class CircuitBreaker:
+    """Opens after consecutive throttling failures and fails fast until reset."""
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold: int, reset_timeout: float,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize a closed breaker.
+
+        Args:
+            failure_threshold: Consecutive failures that open the breaker
+            reset_timeout: Seconds to stay open before allowing a trial call
+            clock: Monotonic clock (injectable for tests)
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._failures = 0
+        self._opened_at = 0.0
+        self._state = self.CLOSED
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        """Current breaker state."""
+        return self._state
+
+    def before_call(self):
+        """
+        Check whether a call may proceed.
+
+        Raises:
+            ThrottledError: If the breaker is open, or half-open with a
+                trial call already in flight
+        """
+        with self._lock:
+            if self._state == self.CLOSED:
+                return
+
+            remaining = self._opened_at + self.reset_timeout - self._clock()
+            if self._state == self.OPEN and remaining <= 0:
+                # Let a single trial call through
+                self._state = self.HALF_OPEN
+                return
+
+            raise ThrottledError(
+                "DynamoDB circuit breaker is open",
+                retry_after=max(remaining, 0.0)
+            )
+
+    def record_success(self):
+        """Close the breaker after a successful call."""
+        with self._lock:
+            self._failures = 0
+            self._state = self.CLOSED
+
+    def record_failure(self):
+        """Count a throttling failure, opening the breaker at the threshold."""
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = self.OPEN
+                self._opened_at = self._clock()
+
+
+# Seconds kept back to encode and return a response when DEADLINE_MARGIN_SECONDS is not set
+DEFAULT_DEADLINE_MARGIN_SECONDS = 2.0
+
+
+class Deadline:
+    """Point by which long reads and batch loops must stop to return in time."""
+
+    def __init__(self, seconds: float, clock: Callable[[], float] = time.monotonic):
+        """
+        Start a deadline.
+
+        Args:
+            seconds: Time from now until the deadline
+            clock: Monotonic clock (injectable for tests)
+        """
+        self._clock = clock
+        self._expires_at = clock() + seconds
+
+    @classmethod
+    def from_context(cls, context, margin: Optional[float] = None,
+                     clock: Callable[[], float] = time.monotonic) -> Optional['Deadline']:
+        """
+        Build the deadline of a Lambda invocation.
+
+        The margin is capped at half the remaining time, so work always
+        gets a share of the invocation even with a short timeout.
+
+        Args:
+            context: Lambda context object
+            margin: Seconds kept back before the function timeout (defaults
+                to DEADLINE_MARGIN_SECONDS, or DEFAULT_DEADLINE_MARGIN_SECONDS)
+            clock: Monotonic clock (injectable for tests)
+
+        Returns:
+            The deadline, or None if the context does not report the remaining time
+        """
+        remaining_time = getattr(context, 'get_remaining_time_in_millis', None)
+        if not callable(remaining_time):
+            return None
+        if margin is None:
+            margin = _env_number('DEADLINE_MARGIN_SECONDS', DEFAULT_DEADLINE_MARGIN_SECONDS, float)
+        remaining = remaining_time() / 1000.0
+        return cls(remaining - min(margin, remaining / 2), clock=clock)
+
+    def remaining(self) -> float:
+        """Seconds left until the deadline (0 once it has passed)."""
+        return max(0.0, self._expires_at - self._clock())
+
+    def expired(self) -> bool:
+        """Whether the deadline has passed."""
+        return self._clock() >= self._expires_at
+
+
+class ThrottleGuard:
+    """Applies a rate limiter and a circuit breaker to every call of a DynamoDB client."""
+
+    def __init__(self, limiter: Optional[TokenBucket] = None,
+                 breaker: Optional[CircuitBreaker] = None,
+                 limiter_max_wait: Optional[float] = None):
+        """
+        Initialize the guard.
+
+        Args:
+            limiter: Token bucket sized to the target capacity (optional)
+            breaker: Circuit breaker for throttling failures (optional)
+            limiter_max_wait: Seconds a call may wait for a token before
+                being rejected with ThrottledError
+        """
+        self.limiter = limiter
+        self.breaker = breaker
+        self.limiter_max_wait = limiter_max_wait
+
+    @classmethod
+    def from_config(cls, config: ClientConfig) -> 'ThrottleGuard':
+        """Build a guard from client configuration."""
+        limiter = None
+        if config.target_rps > 0:
+            limiter = TokenBucket(config.target_rps, config.burst)
+        breaker = None
+        if config.breaker_threshold > 0:
+            breaker = CircuitBreaker(config.breaker_threshold, config.breaker_reset_seconds)
+        return cls(limiter, breaker, config.limiter_max_wait_seconds)
+
+    def install(self, client):
+        """Register the guard on a botocore client's event system."""
+        events = client.meta.events
+        events.register('before-call.dynamodb', self._before_call)
+        events.register('after-call.dynamodb', self._after_call)
+        events.register('after-call-error.dynamodb', self._after_call_error)
+
+    def _before_call(self, **kwargs):
+        if self.breaker:
+            self.breaker.before_call()
+        if self.limiter and not self.limiter.acquire(max_wait=self.limiter_max_wait):
+            raise ThrottledError(
+                "DynamoDB request rate limit exceeded",
+                retry_after=1.0 / self.limiter.rate
+            )
+
+    def _after_call(self, parsed=None, **kwargs):
+        # Runs once per API call, after botocore's own retries are exhausted
+        code = (parsed or {}).get('Error', {}).get('Code')
+        if code in THROTTLING_ERROR_CODES:
+            if self.breaker:
+                self.breaker.record_failure()
+            raise ThrottledError(f"DynamoDB throttled the request: {code}")
+        if self.breaker:
+            self.breaker.record_success()
+
+    def _after_call_error(self, **kwargs):
+        # Connection errors and timeouts count against the breaker as well
+        if self.breaker:
+            self.breaker.record_failure()
+
+
+def create_dynamodb_resource(config: Optional[ClientConfig] = None,
+                             guard: Optional[ThrottleGuard] = None):
+    """
+    Create a DynamoDB resource with adaptive retries and throttling protection.
+
+    Args:
+        config: Client configuration (defaults to environment variables)
+        guard: Throttle guard to install (defaults to one built from config)
+
+    Returns:
+        boto3 DynamoDB service resource
+    """
+    config = config or ClientConfig.from_env()
+    guard = guard or ThrottleGuard.from_config(config)
+
+    resource = boto3.resource('dynamodb', config=config.botocore_config())
+    guard.install(resource.meta.client)
+    return resource
+
 
 class DynamoDBConnection:
-    """Manages DynamoDB connection for Lambda function."""
+    """
+    Manages DynamoDB connection for Lambda function.
+    
+    A single low-level client (thread-safe, with its own connection pool)
+    is shared by the whole container. boto3 resources are not thread-safe,
+    so every thread gets its own lightweight resource and Table bound to
+    that shared client.
+    """
     
     _table_name: Optional[str] = None
     _dynamodb_resource = None
-    _table = None
+    _client = None
+    # Shared across connections so limiter and breaker state survive re-initialization
+    _guard: Optional[ThrottleGuard] = None
+    _lock = threading.RLock()
+    _local = threading.local()
+    # Bumped on every (re)initialization to invalidate per-thread tables
+    _generation = 0
     
     @classmethod
     def initialize(cls):
-        """Initialize DynamoDB connection from environment variables."""
-        cls._table_name = os.environ.get('DYNAMODB_TABLE_NAME')
+        """
+        Initialize DynamoDB connection from environment variables.
+        
+        Safe to call on every invocation: the shared client is only rebuilt
+        when the table name changes or after reset().
+        """
+        table_name = os.environ.get('DYNAMODB_TABLE_NAME')
         
-        if not cls._table_name:
+        if not table_name:
             raise ValueError("DYNAMODB_TABLE_NAME environment variable is not set")
         
-        # Initialize boto3 DynamoDB resource
-        cls._dynamodb_resource = boto3.resource('dynamodb')
-        cls._table = cls._dynamodb_resource.Table(cls._table_name)
+        with cls._lock:
+            if cls._client is not None and cls._table_name == table_name:
+                return
+            
+            config = ClientConfig.from_env()
+            if cls._guard is None:
+                cls._guard = ThrottleGuard.from_config(config)
+            
+            # Initialize boto3 DynamoDB resource; its client is shared by all threads
+            cls._dynamodb_resource = create_dynamodb_resource(config, cls._guard)
+            cls._client = cls._dynamodb_resource.meta.client
+            cls._table_name = table_name
+            cls._generation += 1
     
     @classmethod
-    def get_table(cls):
-        """Get the DynamoDB table resource."""
-        if cls._table is None:
+    def reset(cls):
+        """Drop the shared client and all per-thread tables (mainly for tests)."""
+        with cls._lock:
+            cls._client = None
+            cls._dynamodb_resource = None
+            cls._table_name = None
+            cls._guard = None
+            cls._generation += 1
+    
+    @classmethod
+    def get_client(cls):
+        """Get the shared, thread-safe DynamoDB client."""
+        if cls._client is None:
             cls.initialize()
-        return cls._table
+        return cls._client
+    
+    @classmethod
+    def get_table(cls):
+        """Get the DynamoDB table resource for the calling thread."""
+        local = cls._local
+        if cls._client is None or getattr(local, 'generation', None) != cls._generation:
+            with cls._lock:
+                if cls._client is None:
+                    cls.initialize()
+                # A new resource instance over the shared client is cheap and thread-confined
+                resource = type(cls._dynamodb_resource)(client=cls._client)
+                local.table = resource.Table(cls._table_name)
+                local.generation = cls._generation
+        return local.table
     
     @classmethod
     def get_table_name(cls) -> str:
@@ -0,0 +1,114 @@
+"""
+PostgreSQL connection pool manager for AWS Lambda.
+"""
+import os
+import threading
+from contextlib import contextmanager
+from typing import Iterator, Optional, Set
+
+import psycopg2
+from psycopg2 import extensions, pool
+
+
+class PreparedConnection(extensions.connection):
+    """psycopg2 connection that remembers which statements it has prepared."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prepared: Set[str] = set()
+
+
+class PostgresConnection:
+    """
+    Manages a PostgreSQL connection pool for Lambda function.
+
+    The pool is held in class attributes, so connections opened by one
+    invocation are reused by the following warm invocations. Connections
+    dropped while the container was frozen are discarded and replaced on
+    the next checkout. Callers beyond POSTGRES_POOL_MAX wait for a free
+    connection instead of failing with PoolError.
+    """
+
+    _pool: Optional[pool.ThreadedConnectionPool] = None
+    _slots: Optional[threading.BoundedSemaphore] = None
+    _dsn: Optional[str] = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def initialize(cls):
+        """
+        Initialize the connection pool from environment variables.
+
+        Uses POSTGRES_DSN and POSTGRES_POOL_MIN / POSTGRES_POOL_MAX. Safe to
+        call on every invocation: the pool is only rebuilt when the DSN changes.
+
+        Raises:
+            ValueError: If POSTGRES_DSN is not set
+        """
+        dsn = os.environ.get('POSTGRES_DSN')
+        if not dsn:
+            raise ValueError("POSTGRES_DSN environment variable is not set")
+
+        with cls._lock:
+            if cls._pool is not None and cls._dsn == dsn:
+                return
+            if cls._pool is not None:
+                cls._pool.closeall()
+
+            max_connections = int(os.environ.get('POSTGRES_POOL_MAX', '4'))
+            cls._pool = pool.ThreadedConnectionPool(
+                int(os.environ.get('POSTGRES_POOL_MIN', '1')),
+                max_connections,
+                dsn,
+                connection_factory=PreparedConnection,
+                # Timestamps come back as UTC, matching the other backends
+                options='-c timezone=UTC',
+                connect_timeout=int(os.environ.get('POSTGRES_CONNECT_TIMEOUT', '5'))
+            )
+            cls._slots = threading.BoundedSemaphore(max_connections)
+            cls._dsn = dsn
+
+    @classmethod
+    def reset(cls):
+        """Close every pooled connection (mainly for tests)."""
+        with cls._lock:
+            if cls._pool is not None:
+                cls._pool.closeall()
+            cls._pool = None
+            cls._slots = None
+            cls._dsn = None
+
+    @classmethod
+    @contextmanager
+    def connection(cls) -> Iterator[PreparedConnection]:
+        """
+        Check out a connection for one transaction.
+
+        Commits when the block succeeds and rolls back when it raises.
+        Broken connections are closed instead of returned to the pool.
+        Blocks while every pooled connection is checked out.
+
+        Yields:
+            Pooled connection
+        """
+        if cls._pool is None:
+            cls.initialize()
+        connection_pool, slots = cls._pool, cls._slots
+
+        # getconn raises PoolError rather than waiting once maxconn are out
+        with slots:
+            conn = connection_pool.getconn()
+            broken = bool(conn.closed)
+            try:
+                if broken:
+                    raise psycopg2.InterfaceError("connection already closed")
+                yield conn
+                conn.commit()
+            except (psycopg2.OperationalError, psycopg2.InterfaceError):
+                broken = True
+                raise
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                connection_pool.putconn(conn, close=broken)
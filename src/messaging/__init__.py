@@ -1,4 +1,5 @@
 """Messaging package"""
 from src.messaging.handler import Handler
+from src.messaging.stream_handler import StreamHandler, StreamRecord, register_view_updater
 
-__all__ = ['Handler']
+__all__ = ['Handler', 'StreamHandler', 'StreamRecord', 'register_view_updater']
@@ -4,12 +4,23 @@ Messaging/Handler layer for Lambda events
 import json
 import logging
 import os
-from typing import Any, Dict
-from jsonschema import validate, ValidationError
+from typing import Any, Dict, List, Optional
+from jsonschema import Draft7Validator, ValidationError
+from jsonschema.exceptions import best_match
 
 from src.service.service import Service
+from src.service.analytics import DEFAULT_BINS
+from src.repository.factory import BACKEND_DYNAMODB, create_repository, get_backend
+from src.repository.id_filter import get_id_filter, publish_metrics
+from src.repository.journal import get_write_journal
 from src.repository.repository import Repository
-from src.database.database import DynamoDBConnection
+from src.database.database import Deadline, DynamoDBConnection, ThrottledError
+from src.repository.errors import TransactionCancelledError, WriteDeferredError
+from src.messaging.stream_handler import StreamHandler, is_stream_event
+from src.messaging.profiling import InvocationProfiler
+from src.messaging.serialization import dumps_entry_list
+from src.messaging.process_pool import get_process_pool
+from src.messaging.encoding import decode_event
 
 logger = logging.getLogger(__name__)
 
@@ -18,6 +29,67 @@ SCHEMA_PATH = os.path.join(os.path.dirname(__file__), 'schemas', 'lambda-event-s
 with open(SCHEMA_PATH, 'r') as f:
     EVENT_SCHEMA = json.load(f)
 
+# Compiled once per container; jsonschema.validate() re-checks the schema on every call
+Draft7Validator.check_schema(EVENT_SCHEMA)
+EVENT_VALIDATOR = Draft7Validator(EVENT_SCHEMA)
+
+# batch_create entries validated per worker task
+ENTRY_CHUNK_SIZE = 1000
+
+
+def _action_schema(action: str) -> Dict[str, Any]:
+    """Get the schema branch applied to events with this action."""
+    for branch in EVENT_SCHEMA['allOf']:
+        if branch['if']['properties']['action'].get('const') == action:
+            return branch['then']
+    raise KeyError(action)
+
+
+MAX_BATCH_ENTRIES = _action_schema('batch_create')['properties']['data']['properties']['entries']['maxItems']
+
+
+def _validate_entries_chunk(entries: List[Any]) -> Optional[str]:
+    """Validate a chunk of batch_create entries (in a worker); returns the error message."""
+    error = best_match(EVENT_VALIDATOR.iter_errors({'action': 'batch_create', 'data': {'entries': entries}}))
+    return None if error is None else error.message
+
+
+def validate_event(event: Dict[str, Any], pool=None):
+    """
+    Validate an event against the JSON schema
+    
+    With a WorkerPool, the entries of a batch_create with at least
+    pool.min_items entries are validated in chunks by the worker processes,
+    and only the rest of the event inline. The first invalid chunk's error
+    is reported.
+    
+    Args:
+        event: Decoded Lambda event
+        pool: WorkerPool for large batches (optional)
+    
+    Raises:
+        ValidationError: With the most relevant error, like jsonschema.validate
+    """
+    data = event.get('data')
+    entries = data.get('entries') if event.get('action') == 'batch_create' and isinstance(data, dict) else None
+    if pool is not None and isinstance(entries, list) and len(entries) >= max(pool.min_items, 1):
+        # The envelope with a single entry checks everything but the other entries
+        _validate_inline({**event, 'data': {**data, 'entries': entries[:1]}})
+        if len(entries) > MAX_BATCH_ENTRIES:
+            raise ValidationError(f"Too many entries: {len(entries)} > {MAX_BATCH_ENTRIES}")
+        chunks = (entries[i:i + ENTRY_CHUNK_SIZE] for i in range(0, len(entries), ENTRY_CHUNK_SIZE))
+        for message in pool.imap(_validate_entries_chunk, chunks):
+            if message is not None:
+                raise ValidationError(message)
+        return
+    _validate_inline(event)
+
+
+def _validate_inline(event: Dict[str, Any]):
+    error = best_match(EVENT_VALIDATOR.iter_errors(event))
+    if error is not None:
+        raise error
+
 
 class Handler:
     """Handler for DynamoDB operations via Lambda"""
@@ -31,28 +103,34 @@ class Handler:
         """
         self.service = service
     
-    def handle(self, event: Dict[str, Any]) -> Dict[str, Any]:
+    def handle(self, event: Dict[str, Any], deadline: Optional[Deadline] = None) -> Dict[str, Any]:
         """
         Handle Lambda event for CRUD operations
         
         Args:
             event: Lambda event with:
-                - action: "create", "get", "list", "update", "delete"
+                - action: "create", "batch_create", "get", "list", "count", "analytics",
+                  "list_changed_since", "update", "transact_update", "bulk_update", "delete", "purge"
                 - data: Action-specific data
+                - encoding: "gzip+base64" if data is compressed (optional)
+            deadline: When list, batch_create and bulk_update stop and return
+                partial results (optional)
                 
         Returns:
             Response with operation result
         """
         try:
-            # Validate event against JSON schema
-            validate(instance=event, schema=EVENT_SCHEMA)
+            # Decompress encoded data, then validate the decoded event against JSON schema
+            event = decode_event(event)
+            pool = get_process_pool()
+            validate_event(event, pool=pool)
             
             action = event.get('action', 'create')
             data = event.get('data', {})
             
             # Initialize service if not provided (for testing)
             if self.service is None:
-                repository = Repository()
+                repository = create_repository()
                 self.service = Service(repository)
             
             if action == 'create':
@@ -69,6 +147,25 @@ class Handler:
                     })
                 }
             
+            elif action == 'batch_create':
+                entries = self.service.create_test_entries(data['entries'], deadline=deadline)
+                # ids[i] belongs to entries[i]; callers resend entries with a null
+                # or missing id (left by throttling or the deadline)
+                created = sum(1 for entry in entries if entry is not None)
+                unprocessed = len(data['entries']) - created
+                logger.info(f"Created {created} entries, {unprocessed} unprocessed")
+                return {
+                    'statusCode': 200,
+                    'body': json.dumps({
+                        'message': 'Entries created successfully',
+                        'data': {
+                            'created': created,
+                            'ids': [None if entry is None else entry.id for entry in entries],
+                            'unprocessed': unprocessed
+                        }
+                    })
+                }
+            
             elif action == 'get':
                 entry_id = data.get('id')
                 if not entry_id:
@@ -92,14 +189,47 @@ class Handler:
                 }
             
             elif action == 'list':
-                entries = self.service.list_test_entries()
+                # Entries are encoded as each scan page arrives, until the deadline
+                entries = self.service.iter_test_entries(
+                    continuation_token=data.get('continuation_token'),
+                    deadline=deadline
+                )
+                return {
+                    'statusCode': 200,
+                    'body': dumps_entry_list(entries, pool=pool)
+                }
+            
+            elif action == 'count':
+                count = self.service.count_test_entries(name=data.get('name'))
                 return {
                     'statusCode': 200,
                     'body': json.dumps({
-                        'data': [entry.to_dict() for entry in entries]
+                        'data': {'count': count}
                     })
                 }
             
+            elif action == 'analytics':
+                summary = self.service.get_value_analytics(
+                    percentiles=data.get('percentiles'),
+                    bins=data.get('bins', DEFAULT_BINS)
+                )
+                return {
+                    'statusCode': 200,
+                    'body': json.dumps({
+                        'data': summary
+                    })
+                }
+            
+            elif action == 'list_changed_since':
+                changes = self.service.list_changed_since(
+                    data['since'],
+                    limit=data.get('limit')
+                )
+                return {
+                    'statusCode': 200,
+                    'body': json.dumps(changes.to_dict())
+                }
+            
             elif action == 'update':
                 entry_id = data.get('id')
                 if not entry_id:
@@ -127,6 +257,34 @@ class Handler:
                     })
                 }
             
+            elif action == 'transact_update':
+                results = self.service.transact_update_test_entries(data['updates'])
+                return {
+                    'statusCode': 200,
+                    'body': json.dumps({
+                        'message': 'Entries updated successfully',
+                        'data': results
+                    })
+                }
+            
+            elif action == 'bulk_update':
+                result = self.service.bulk_update_test_entries(
+                    data['where'],
+                    data['set'],
+                    limit=data.get('limit'),
+                    continuation_token=data.get('continuation_token'),
+                    deadline=deadline
+                )
+                logger.info(f"Bulk update matched {result.matched}, updated {result.updated}, "
+                            f"more remaining: {result.continuation_token is not None}")
+                return {
+                    'statusCode': 200,
+                    'body': json.dumps({
+                        'message': 'Entries updated successfully',
+                        'data': result.to_dict()
+                    })
+                }
+            
             elif action == 'delete':
                 entry_id = data.get('id')
                 if not entry_id:
@@ -149,6 +307,22 @@ class Handler:
                     })
                 }
             
+            elif action == 'purge':
+                result = self.service.purge_entries(
+                    max_age_seconds=data.get('max_age_seconds'),
+                    continuation_token=data.get('continuation_token'),
+                    deadline=deadline
+                )
+                logger.info(f"Purged {result.deleted} entries, "
+                            f"more remaining: {result.continuation_token is not None}")
+                return {
+                    'statusCode': 200,
+                    'body': json.dumps({
+                        'message': 'Entries purged successfully',
+                        'data': result.to_dict()
+                    })
+                }
+            
             else:
                 return {
                     'statusCode': 400,
@@ -165,6 +339,37 @@ class Handler:
                     'error': f'Validation error: {e.message}'
                 })
             }
+        except TransactionCancelledError as e:
+            # Nothing was written; report which entries caused the cancellation
+            logger.warning(f"Transaction cancelled: {e.failures()}")
+            return {
+                'statusCode': 409,
+                'body': json.dumps({
+                    'error': 'Transaction cancelled, no entries were updated',
+                    'reasons': e.failures()
+                })
+            }
+        except WriteDeferredError as e:
+            # Throttled, but journaled: a later invocation writes it without a Lambda retry
+            logger.warning(f"Write deferred: {e.entry_id}")
+            return {
+                'statusCode': 202,
+                'body': json.dumps({
+                    'message': ('Write accepted and journaled; it will be applied shortly, '
+                                'but is lost if the container is retired first'),
+                    'data': e.data
+                })
+            }
+        except ThrottledError as e:
+            # Fail fast so callers back off instead of waiting out the Lambda timeout
+            logger.warning(f"Throttled: {e}")
+            body = {'error': 'Too many requests, retry later'}
+            if e.retry_after is not None:
+                body['retry_after_seconds'] = round(e.retry_after, 3)
+            return {
+                'statusCode': 429,
+                'body': json.dumps(body)
+            }
         except ValueError as e:
             logger.warning(f"Validation error: {e}")
             return {
@@ -183,29 +388,57 @@ class Handler:
             }
 
 
+def _flush_write_journal(deadline: Optional[Deadline] = None):
+    """Apply writes deferred by earlier throttling before this event's own."""
+    try:
+        Repository().flush_journal(deadline=deadline)
+    except Exception as e:
+        # The writes stay journaled; this event is still handled
+        logger.error(f"Could not flush the write journal: {e}", exc_info=True)
+
+
 def lambda_handler(event, context):
     """
     Lambda function handler for bball-app-template
     
     Args:
         event: Lambda event data with:
-            - action: "create", "get", "list", "update", "delete"
+            - action: "create", "batch_create", "get", "list", "count", "analytics",
+              "list_changed_since", "update", "transact_update", "bulk_update", "delete", "purge"
             - data: Action-specific data
+            - encoding: "gzip+base64" if data is compressed (optional)
+            or a DynamoDB Stream batch (Records from aws:dynamodb)
         context: Lambda context object
         
     Returns:
-        dict: Response object with statusCode and body
+        dict: Response object with statusCode and body, or a partial batch
+        response with batchItemFailures for stream batches
         
     Examples:
         Create: {"action": "create", "data": {"name": "test", "value": 42}}
+        Batch create: {"action": "batch_create", "data": {"entries": [{"name": "a", "value": 1}]}}
+        Compressed: {"action": "batch_create", "encoding": "gzip+base64", "data": "H4sI..."}
         Get: {"action": "get", "data": {"id": "123-456"}}
         List: {"action": "list"}
+        List, continued: {"action": "list", "data": {"continuation_token": "eyJ3aGVyZSI6..."}}
+        Count: {"action": "count", "data": {"name": "test"}}
+        Analytics: {"action": "analytics", "data": {"percentiles": [50, 99], "bins": 20}}
+        List changed since: {"action": "list_changed_since", "data": {"since": "2025-01-01T00:00:00+00:00"}}
         Update: {"action": "update", "data": {"id": "123-456", "name": "new name"}}
+        Transact update: {"action": "transact_update", "data": {"updates": [{"id": "123-456", "value": 1}]}}
+        Bulk update: {"action": "bulk_update", "data": {"where": {"name": "test"}, "set": {"value": 0}}}
         Delete: {"action": "delete", "data": {"id": "123-456"}}
+        Purge: {"action": "purge", "data": {"max_age_seconds": 604800}}
+        Purge, continued: {"action": "purge", "data": {"continuation_token": "eyJ3aGVyZSI6..."}}
     """
     logger.setLevel(logging.INFO)
     logger.info("Processing Lambda request")
     logger.info(f"Event: {json.dumps(event)}")
+    
+    # DynamoDB Stream batches update derived views; unexpected errors are
+    # raised so Lambda retries the whole batch
+    if is_stream_event(event):
+        return StreamHandler().handle(event)
 
     # Force a failure to test retry and DLQ behavior
     if event.get("action") == "test_failure":
@@ -213,12 +446,25 @@ def lambda_handler(event, context):
         raise RuntimeError("Intentional failure to test DLQ and retry mechanism")
     
     try:
+        # Long reads and batches stop DEADLINE_MARGIN_SECONDS before the function timeout
+        deadline = Deadline.from_context(context)
+        
         # Initialize DynamoDB connection (once per container)
-        DynamoDBConnection.initialize()
+        if get_backend() == BACKEND_DYNAMODB:
+            DynamoDBConnection.initialize()
+            if get_write_journal() is not None:
+                _flush_write_journal(deadline)
         
-        # Create handler and process request
+        # Create handler and process request (profiled when sampled by PROFILING_SAMPLE_RATE)
         handler = Handler()
-        response = handler.handle(event)
+        response = InvocationProfiler.from_env().run(
+            handler.handle, event, deadline, label=getattr(context, 'aws_request_id', None)
+        )
+        
+        # Lookups the ID filter answered, as CloudWatch metrics
+        id_filter = get_id_filter()
+        if id_filter is not None:
+            publish_metrics(id_filter)
         
         logger.info(f"Response status: {response.get('statusCode')}")
         return response
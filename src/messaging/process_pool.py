@@ -0,0 +1,206 @@
+"""
+Opt-in worker processes for CPU-bound work on very large events.
+
+Schema validation and JSON encoding run in pure Python under the GIL, so a
+Lambda with several vCPUs uses one of them. With PROCESS_POOL_WORKERS set,
+large batch_create events are validated and large list bodies encoded in
+chunks spread over worker processes.
+
+Lambda has no /dev/shm, so multiprocessing.Pool and Queue (which need POSIX
+semaphores) fail there; each worker is a plain Process with its own Pipe.
+Workers are forked on first use and reused across warm invocations.
+Events with fewer than PROCESS_POOL_MIN_ITEMS items stay inline, where
+pickling chunks to the workers costs more than it saves.
+"""
+import atexit
+import logging
+import multiprocessing
+import os
+import threading
+from multiprocessing.connection import wait
+from typing import Any, Callable, Iterable, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+# Smallest batch sent to the workers when PROCESS_POOL_MIN_ITEMS is not set
+DEFAULT_MIN_ITEMS = 5000
+
+_END = object()
+
+_pool: Optional['WorkerPool'] = None
+_pool_lock = threading.Lock()
+
+
+class WorkerError(Exception):
+    """Raised when a task fails in a worker or a worker process dies."""
+
+
+def _worker_loop(conn):
+    """Run (func, chunk) tasks from the parent until the pipe closes."""
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            return
+        if task is None:
+            return
+        func, chunk = task
+        try:
+            conn.send((True, func(chunk)))
+        except Exception as e:
+            # The exception itself may not pickle; its description always does
+            conn.send((False, f"{type(e).__name__}: {e}"))
+
+
+class WorkerPool:
+    """Fixed set of worker processes, each connected by a Pipe."""
+
+    def __init__(self, workers: int, min_items: int = DEFAULT_MIN_ITEMS):
+        """
+        Start the worker processes.
+
+        Args:
+            workers: Number of worker processes
+            min_items: Smallest number of items worth sending to the workers
+        """
+        if workers < 1:
+            raise ValueError("workers must be positive")
+        self.workers = workers
+        self.min_items = min_items
+        self.broken = False
+        self._lock = threading.Lock()
+        self._conns = []
+        self._processes = []
+
+        context = multiprocessing.get_context('fork')
+        for _ in range(workers):
+            parent, child = context.Pipe()
+            process = context.Process(target=_worker_loop, args=(child,), daemon=True)
+            process.start()
+            child.close()
+            self._conns.append(parent)
+            self._processes.append(process)
+
+    def imap(self, func: Callable[[Any], Any], chunks: Iterable[Any]) -> Iterator[Any]:
+        """
+        Apply a function to every chunk in the workers, yielding results in order.
+
+        At most one chunk per worker is in flight, so chunks are read from
+        the iterable as workers free up and memory stays bounded.
+
+        Args:
+            func: Module-level function (sent to the workers by reference)
+            chunks: Picklable inputs
+
+        Yields:
+            func(chunk) for every chunk, in input order
+
+        Raises:
+            WorkerError: If func raises in a worker or a worker dies
+        """
+        with self._lock:
+            chunks = iter(chunks)
+            idle = list(self._conns)
+            busy = {}
+            results = {}
+            sent = received = 0
+            exhausted = False
+            try:
+                while True:
+                    while idle and not exhausted:
+                        chunk = next(chunks, _END)
+                        if chunk is _END:
+                            exhausted = True
+                            break
+                        conn = idle.pop()
+                        self._send(conn, (func, chunk))
+                        busy[conn] = sent
+                        sent += 1
+                    if not busy:
+                        return
+
+                    for conn in wait(list(busy)):
+                        ok, value = self._recv(conn)
+                        results[busy.pop(conn)] = (ok, value)
+                        idle.append(conn)
+
+                    while received in results:
+                        ok, value = results.pop(received)
+                        if not ok:
+                            raise WorkerError(value)
+                        received += 1
+                        yield value
+            finally:
+                # Collect replies still in flight, so the next call starts clean
+                for conn in list(busy):
+                    try:
+                        self._recv(conn)
+                    except WorkerError:
+                        pass
+
+    def _send(self, conn, message):
+        try:
+            conn.send(message)
+        except (BrokenPipeError, ConnectionResetError, EOFError):
+            self.broken = True
+            raise WorkerError("Worker process exited")
+
+    def _recv(self, conn):
+        try:
+            return conn.recv()
+        except (BrokenPipeError, ConnectionResetError, EOFError):
+            self.broken = True
+            raise WorkerError("Worker process exited")
+
+    def close(self):
+        """Stop the workers."""
+        for conn in self._conns:
+            try:
+                conn.send(None)
+            except OSError:
+                pass
+            conn.close()
+        for process in self._processes:
+            process.join(timeout=1)
+            if process.is_alive():
+                process.terminate()
+
+
+def get_process_pool() -> Optional[WorkerPool]:
+    """
+    Get the container's worker pool configured by environment variables.
+
+    PROCESS_POOL_WORKERS enables the pool when positive;
+    PROCESS_POOL_MIN_ITEMS sets the smallest batch sent to it. A pool with
+    a dead worker is replaced.
+
+    Returns:
+        The shared WorkerPool, or None if the pool is disabled
+    """
+    global _pool
+    workers = int(os.environ.get('PROCESS_POOL_WORKERS') or 0)
+    if workers <= 0:
+        return None
+    min_items = int(os.environ.get('PROCESS_POOL_MIN_ITEMS') or DEFAULT_MIN_ITEMS)
+
+    with _pool_lock:
+        if _pool is not None and (_pool.broken or _pool.workers != workers):
+            _pool.close()
+            _pool = None
+        if _pool is None:
+            logger.info(f"Starting {workers} worker processes")
+            _pool = WorkerPool(workers, min_items)
+        _pool.min_items = min_items
+        return _pool
+
+
+def close_process_pool():
+    """Stop the shared pool, if one was started."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+
+
+atexit.register(close_process_pool)
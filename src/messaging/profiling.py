@@ -0,0 +1,203 @@
+"""
+Opt-in profiling of sampled Lambda invocations.
+"""
+import cProfile
+import logging
+import os
+import pstats
+import random
+import re
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import Any, Callable, List, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+
+@dataclass
+class ProfilingConfig:
+    """Profiling settings, read from the environment on every invocation."""
+    sample_rate: float = 0.0
+    cpu: bool = True
+    memory: bool = True
+    top_n: int = 20
+    dump_dir: Optional[str] = None
+
+    @classmethod
+    def from_env(cls) -> 'ProfilingConfig':
+        """
+        Build the config from environment variables.
+
+        PROFILING_SAMPLE_RATE: Fraction of invocations to profile, 0-1 (default 0, off)
+        PROFILING_MODE: "cpu", "memory" or "both" (default both)
+        PROFILING_TOP_N: Functions and allocation sites per summary (default 20)
+        PROFILING_DUMP_DIR: Write summaries to this directory (e.g. /tmp)
+            instead of the logs; CPU profiles are also saved in pstats format
+
+        An invalid value logs a warning and disables profiling, so a
+        misconfigured variable never fails the invocation.
+        """
+        try:
+            mode = os.environ.get('PROFILING_MODE', 'both').lower()
+            if mode not in ('cpu', 'memory', 'both'):
+                raise ValueError(f"Unknown PROFILING_MODE: {mode}")
+            return cls(
+                sample_rate=float(os.environ.get('PROFILING_SAMPLE_RATE', '0')),
+                cpu=mode in ('cpu', 'both'),
+                memory=mode in ('memory', 'both'),
+                top_n=int(os.environ.get('PROFILING_TOP_N', '20')),
+                dump_dir=os.environ.get('PROFILING_DUMP_DIR') or None
+            )
+        except ValueError as e:
+            logger.warning(f"Profiling disabled: {e}")
+            return cls()
+
+
+def _short_path(filename: str) -> str:
+    """Trim a source path to its last two components."""
+    return '/'.join(filename.replace(os.sep, '/').split('/')[-2:])
+
+
+def cpu_summary(profile: cProfile.Profile, top_n: int) -> List[str]:
+    """
+    Summarize a CPU profile as one line per function, by cumulative time.
+
+    Args:
+        profile: Finished profile
+        top_n: Number of functions to include
+
+    Returns:
+        Summary lines
+    """
+    stats = pstats.Stats(profile).stats
+    rows = sorted(stats.items(), key=lambda item: item[1][3], reverse=True)[:top_n]
+    return [
+        f"{cumtime * 1000:9.2f}ms cum {tottime * 1000:9.2f}ms self {calls:7d} calls "
+        f"{_short_path(filename)}:{line}({function})"
+        for (filename, line, function), (_, calls, tottime, cumtime, _) in rows
+    ]
+
+
+def memory_summary(before: tracemalloc.Snapshot, after: tracemalloc.Snapshot,
+                   peak: int, top_n: int) -> List[str]:
+    """
+    Summarize allocations made between two snapshots, largest first.
+
+    Args:
+        before: Snapshot taken when the invocation started
+        after: Snapshot taken when the invocation finished
+        peak: Peak traced memory during the invocation, in bytes
+        top_n: Number of allocation sites to include
+
+    Returns:
+        Summary lines
+    """
+    lines = [f"peak {peak / 1024:.1f} KiB"]
+    for diff in after.compare_to(before, 'lineno')[:top_n]:
+        frame = diff.traceback[0]
+        lines.append(
+            f"{diff.size_diff / 1024:+9.1f} KiB {diff.count_diff:+7d} blocks "
+            f"{_short_path(frame.filename)}:{frame.lineno}"
+        )
+    return lines
+
+
+class InvocationProfiler:
+    """
+    Wraps a sampled fraction of invocations in cProfile and tracemalloc.
+
+    Invocations that are not sampled call the wrapped function directly, so
+    the only cost when profiling is off is one comparison.
+    """
+
+    def __init__(self, config: ProfilingConfig, sample: Callable[[], float] = random.random):
+        """
+        Initialize the profiler.
+
+        Args:
+            config: Profiling settings
+            sample: Returns a number in [0, 1) per invocation (for tests)
+        """
+        self.config = config
+        self._sample = sample
+
+    @classmethod
+    def from_env(cls) -> 'InvocationProfiler':
+        """Create a profiler configured from environment variables."""
+        return cls(ProfilingConfig.from_env())
+
+    def should_profile(self) -> bool:
+        """Decide whether the current invocation is sampled."""
+        rate = self.config.sample_rate
+        return rate > 0 and (rate >= 1 or self._sample() < rate)
+
+    def run(self, func: Callable[..., T], *args: Any, label: Optional[str] = None) -> T:
+        """
+        Call a function, profiling it if this invocation is sampled.
+
+        Args:
+            func: Function to call
+            *args: Arguments for func
+            label: Name for the summary, e.g. the Lambda request ID
+
+        Returns:
+            Whatever func returns
+        """
+        if not self.should_profile():
+            return func(*args)
+
+        config = self.config
+        profile = cProfile.Profile() if config.cpu else None
+        started_tracing = False
+        before = None
+        if config.memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                started_tracing = True
+            tracemalloc.reset_peak()
+            before = tracemalloc.take_snapshot()
+
+        start = time.perf_counter()
+        if profile is not None:
+            profile.enable()
+        try:
+            return func(*args)
+        finally:
+            if profile is not None:
+                profile.disable()
+            elapsed = time.perf_counter() - start
+            try:
+                lines = [f"profile {label or '-'}: {elapsed * 1000:.2f}ms wall"]
+                if profile is not None:
+                    lines.append("cpu (by cumulative time):")
+                    lines += cpu_summary(profile, config.top_n)
+                if before is not None:
+                    peak = tracemalloc.get_traced_memory()[1]
+                    lines.append("memory (allocated during the invocation):")
+                    lines += memory_summary(before, tracemalloc.take_snapshot(), peak, config.top_n)
+                self._report(lines, profile, label)
+            except Exception as e:
+                # Profiling must never fail the invocation
+                logger.warning(f"Could not write profile: {e}")
+            finally:
+                if started_tracing:
+                    tracemalloc.stop()
+
+    def _report(self, lines: List[str], profile: Optional[cProfile.Profile], label: Optional[str]):
+        """Log the summary, or write it (and the raw CPU profile) to the dump directory."""
+        summary = '\n'.join(lines)
+        if not self.config.dump_dir:
+            logger.info(summary)
+            return
+
+        os.makedirs(self.config.dump_dir, exist_ok=True)
+        name = re.sub(r'[^A-Za-z0-9_.-]', '_', label or f"{time.time():.6f}")
+        base = os.path.join(self.config.dump_dir, f"profile-{name}")
+        with open(f"{base}.txt", 'w') as f:
+            f.write(summary + '\n')
+        if profile is not None:
+            profile.dump_stats(f"{base}.prof")
+        logger.info(f"Profile written to {base}.txt")
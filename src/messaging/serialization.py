@@ -0,0 +1,133 @@
+"""
+Streaming JSON serialization of entry lists.
+"""
+import json
+from itertools import chain, islice
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from src.model.models import Entry, EntryStream
+
+# Same settings as json.dumps(), so the output is byte-for-byte identical
+_ENCODER = json.JSONEncoder()
+
+# Encoded entries joined per append to the response body
+ENCODE_BATCH_SIZE = 1000
+
+
+def _encode_entry(entry: Entry) -> str:
+    """Encode one entry like json.dumps(entry.to_dict()), without building the dict."""
+    encode = _ENCODER.encode
+    return (
+        f'{{"id": {encode(entry.id)}, "name": {encode(entry.name)}, '
+        f'"value": {encode(entry.value)}, "created_at": {encode(entry.created_at)}, '
+        f'"updated_at": {encode(entry.updated_at)}}}'
+    )
+
+
+def encode_rows(rows: List[Tuple]) -> str:
+    """
+    Encode a batch of (id, name, value, created_at, updated_at) rows.
+
+    Runs in the worker processes; rows pickle faster than Entry objects.
+
+    Args:
+        rows: Entry fields in to_dict() order
+
+    Returns:
+        The encoded entries joined by ', '
+    """
+    encode = _ENCODER.encode
+    return ', '.join(
+        f'{{"id": {encode(entry_id)}, "name": {encode(name)}, '
+        f'"value": {encode(value)}, "created_at": {encode(created_at)}, '
+        f'"updated_at": {encode(updated_at)}}}'
+        for entry_id, name, value, created_at, updated_at in rows
+    )
+
+
+def _row_batches(entries: Iterable[Entry], batch_size: int) -> Iterator[List[Tuple]]:
+    batch = []
+    for entry in entries:
+        batch.append((entry.id, entry.name, entry.value, entry.created_at, entry.updated_at))
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def dumps_entry_list(entries: Iterable[Entry], batch_size: int = ENCODE_BATCH_SIZE, pool=None) -> str:
+    """
+    Serialize entries as {"data": [...]} while they are being read.
+
+    Entries are encoded as the iterable yields them, a batch at a time, so
+    only the encoded batches, the current scan page and one batch of
+    entries are held in memory, instead of lists of items, entries and
+    dicts. The batches are joined into the body once, at the end, so the
+    peak is about twice the body: the encoded batches and the joined body
+    (plus one scan page). The overhead grows with the body, not with the
+    number of objects built per entry.
+
+    With a WorkerPool, batches are encoded by the worker processes once
+    there are at least pool.min_items entries; smaller lists are encoded
+    inline.
+
+    An EntryStream stopped by its deadline adds its token to the body, as
+    {"data": [...], "continuation_token": "..."}.
+
+    Args:
+        entries: Entries to serialize, typically a repository EntryStream
+        batch_size: Entries encoded per batch
+        pool: WorkerPool to encode large lists in (optional)
+
+    Returns:
+        The same JSON as json.dumps({'data': [entry.to_dict() for entry in entries]}),
+        plus the continuation token if there is one
+    """
+    stream = entries if isinstance(entries, EntryStream) else None
+    if pool is not None:
+        entries = iter(entries)
+        head = list(islice(entries, pool.min_items))
+        if len(head) == pool.min_items:
+            return _dumps_in_pool(chain(head, entries), batch_size, pool, stream)
+        entries = head
+
+    return _join_body(_encoded_batches(entries, batch_size), stream)
+
+
+def _encoded_batches(entries: Iterable[Entry], batch_size: int) -> Iterator[str]:
+    batch = []
+    for entry in entries:
+        batch.append(_encode_entry(entry))
+        if len(batch) == batch_size:
+            yield ', '.join(batch)
+            batch = []
+    if batch:
+        yield ', '.join(batch)
+
+
+def _dumps_in_pool(entries: Iterable[Entry], batch_size: int, pool, stream: Optional[EntryStream]) -> str:
+    return _join_body(pool.imap(encode_rows, _row_batches(entries, batch_size)), stream)
+
+
+def _join_body(chunks: Iterable[str], stream: Optional[EntryStream]) -> str:
+    """Join encoded batches into the body with a single copy, once the stream is read.
+
+    The batches are held until the join, so the peak is the body twice.
+    """
+    parts = ['{"data": [']
+    for chunk in chunks:
+        if len(parts) > 1:
+            parts.append(', ')
+        parts.append(chunk)
+    parts.append(']')
+    parts.append(_trailer(stream))
+    return ''.join(parts)
+
+
+def _trailer(stream: Optional[EntryStream]) -> str:
+    """Close the body, adding the token of a stream that stopped early."""
+    if stream is None or stream.continuation_token is None:
+        return '}'
+    return f', "continuation_token": {_ENCODER.encode(stream.continuation_token)}}}'
+
@@ -0,0 +1,160 @@
+"""
+DynamoDB Streams consumer for keeping derived views up to date
+"""
+import logging
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+from boto3.dynamodb.types import TypeDeserializer
+
+from src.model.models import Entry
+
+logger = logging.getLogger(__name__)
+
+_deserializer = TypeDeserializer()
+
+
+@dataclass
+class StreamRecord:
+    """
+    Decoded DynamoDB Stream record
+    """
+    event_name: str
+    sequence_number: str
+    keys: Dict[str, Any]
+    new_entry: Optional[Entry] = None
+    old_entry: Optional[Entry] = None
+
+
+# A view updater receives records in stream order and raises to signal failure.
+# Updaters must be idempotent: a failed batch is retried from its first record.
+ViewUpdater = Callable[[List[StreamRecord]], None]
+
+_view_updaters: List[ViewUpdater] = []
+
+
+def register_view_updater(updater: ViewUpdater) -> ViewUpdater:
+    """
+    Register a view updater for stream batches (usable as a decorator)
+
+    Args:
+        updater: Callable receiving a list of StreamRecord
+
+    Returns:
+        The updater, unchanged
+    """
+    _view_updaters.append(updater)
+    return updater
+
+
+def is_stream_event(event: Dict[str, Any]) -> bool:
+    """Check whether a Lambda event is a DynamoDB Stream batch"""
+    records = event.get('Records') if isinstance(event, dict) else None
+    return bool(records) and all(
+        record.get('eventSource') == 'aws:dynamodb' for record in records
+    )
+
+
+def _deserialize(image: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert a DynamoDB JSON image into plain Python values"""
+    return {key: _deserializer.deserialize(value) for key, value in image.items()}
+
+
+def _image_to_entry(image: Optional[Dict[str, Any]]) -> Optional[Entry]:
+    """Convert a NewImage/OldImage into an Entry"""
+    if not image:
+        return None
+
+    item = _deserialize(image)
+    return Entry(
+        id=item['id'],
+        name=item.get('name', ''),
+        value=int(item.get('value', 0)),  # Numbers arrive as Decimal
+        created_at=item.get('created_at'),
+        updated_at=item.get('updated_at')
+    )
+
+
+def decode_record(record: Dict[str, Any]) -> StreamRecord:
+    """
+    Decode a raw stream record into a StreamRecord
+
+    Args:
+        record: Raw record from the Lambda event's Records list
+
+    Returns:
+        StreamRecord with Entry objects for the available images
+    """
+    dynamodb = record['dynamodb']
+    return StreamRecord(
+        event_name=record['eventName'],
+        sequence_number=dynamodb['SequenceNumber'],
+        keys=_deserialize(dynamodb.get('Keys', {})),
+        new_entry=_image_to_entry(dynamodb.get('NewImage')),
+        old_entry=_image_to_entry(dynamodb.get('OldImage'))
+    )
+
+
+class StreamHandler:
+    """Handler for DynamoDB Stream batches"""
+
+    def __init__(self, updaters: Optional[List[ViewUpdater]] = None, batch_size: int = 100):
+        """
+        Initialize the stream handler
+
+        Args:
+            updaters: View updaters (defaults to the registered ones)
+            batch_size: Maximum number of records passed to an updater at once
+        """
+        self.updaters = _view_updaters if updaters is None else updaters
+        self.batch_size = batch_size
+
+    def handle(self, event: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Decode stream records and pass them to the view updaters in batches
+
+        Processing stops at the first failing batch, which is reported by
+        the sequence number of its first record. With ReportBatchItemFailures
+        Lambda checkpoints everything before it and retries from there, so
+        no record is skipped.
+
+        Args:
+            event: Lambda event with a Records list from DynamoDB Streams
+
+        Returns:
+            Partial batch response with batchItemFailures
+        """
+        raw_records = event['Records']
+        records: List[StreamRecord] = []
+
+        for raw in raw_records:
+            try:
+                records.append(decode_record(raw))
+            except (KeyError, TypeError, ValueError) as e:
+                # Stop before the undecodable record so it is retried (or bisected away)
+                logger.error(f"Could not decode stream record: {e}", exc_info=True)
+                break
+
+        for start in range(0, len(records), self.batch_size):
+            batch = records[start:start + self.batch_size]
+            for updater in self.updaters:
+                try:
+                    updater(batch)
+                except Exception as e:
+                    logger.error(
+                        f"View updater {getattr(updater, '__name__', updater)} failed: {e}",
+                        exc_info=True
+                    )
+                    return self._failure_from(batch[0].sequence_number)
+
+        if len(records) < len(raw_records):
+            failed = raw_records[len(records)]
+            return self._failure_from(failed.get('dynamodb', {}).get('SequenceNumber'))
+
+        logger.info(f"Processed {len(records)} stream records")
+        return {'batchItemFailures': []}
+
+    @staticmethod
+    def _failure_from(sequence_number: Optional[str]) -> Dict[str, Any]:
+        """Build a partial batch response that checkpoints before sequence_number"""
+        return {'batchItemFailures': [{'itemIdentifier': sequence_number}]}
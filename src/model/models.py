@@ -1,8 +1,10 @@
 """
 Database models for the application
 """
-from dataclasses import dataclass
-from typing import Optional
+from array import array
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 
 
 @dataclass
@@ -25,3 +27,132 @@ class Entry:
             'created_at': self.created_at,
             'updated_at': self.updated_at
         }
+
+# Change cursors are kept this far behind the time they were read at, so a
+# write committed late, or stamped by a container with a slightly slow
+# clock, is not skipped
+DELTA_OVERLAP = timedelta(seconds=1)
+
+
+@dataclass
+class ChangeSet:
+    """
+    Entries modified after a given timestamp, ordered by updated_at
+    """
+    entries: List[Entry] = field(default_factory=list)
+    cursor: Optional[str] = None
+    has_more: bool = False
+
+    def to_dict(self) -> dict:
+        """Convert change set to dictionary"""
+        return {
+            'data': [entry.to_dict() for entry in self.entries],
+            'cursor': self.cursor,
+            'has_more': self.has_more
+        }
+
+    @classmethod
+    def empty(cls, since: str, queried_at: datetime) -> 'ChangeSet':
+        """No changes after since: the cursor moves up to the query time, less DELTA_OVERLAP"""
+        return cls(cursor=max(since, (queried_at - DELTA_OVERLAP).isoformat()))
+
+
+@dataclass
+class BulkUpdateResult:
+    """
+    Progress of a bulk update; continue with the token until it is None
+    """
+    matched: int = 0
+    updated: int = 0
+    continuation_token: Optional[str] = None
+
+    def to_dict(self) -> dict:
+        """Convert result to dictionary"""
+        return {
+            'matched': self.matched,
+            'updated': self.updated,
+            'continuation_token': self.continuation_token,
+            'has_more': self.continuation_token is not None
+        }
+
+
+@dataclass
+class PurgeResult:
+    """
+    Progress of a purge; continue with the token until it is None
+    """
+    deleted: int = 0
+    continuation_token: Optional[str] = None
+
+    def to_dict(self) -> dict:
+        """Convert result to dictionary"""
+        return {
+            'deleted': self.deleted,
+            'continuation_token': self.continuation_token,
+            'has_more': self.continuation_token is not None
+        }
+
+
+class EntryStream:
+    """
+    Entries read lazily, possibly stopped early by a deadline; once the
+    stream is exhausted, continue with the token until it is None
+    """
+
+    def __init__(self, read: Callable[['EntryStream'], Iterator[Entry]]):
+        """
+        Wrap a reader that sets continuation_token on the stream if it stops early
+
+        Args:
+            read: Generator function called with this stream
+        """
+        self.continuation_token: Optional[str] = None
+        self._entries = read(self)
+
+    def __iter__(self) -> 'EntryStream':
+        return self
+
+    def __next__(self) -> Entry:
+        return next(self._entries)
+
+
+class ValueColumns:
+    """
+    Entry names and values in compact columnar buffers for analytics.
+
+    Values are kept in an array of 64-bit integers and names as integer
+    codes into a list of distinct names, so memory grows with 12 bytes per
+    entry instead of one Entry object each.
+    """
+
+    def __init__(self):
+        self.names: List[str] = []
+        self.name_codes = array('i')
+        self.values = array('q')
+        self._codes: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def _code(self, name: str) -> int:
+        code = self._codes.get(name)
+        if code is None:
+            code = self._codes[name] = len(self.names)
+            self.names.append(name)
+        return code
+
+    def add(self, name: str, value: int):
+        """Append one entry's name and value."""
+        self.name_codes.append(self._code(name))
+        self.values.append(value)
+
+    def add_all(self, rows: Iterable[Tuple[str, int]]):
+        """Append (name, value) pairs."""
+        for name, value in rows:
+            self.add(name, value)
+
+    def extend(self, other: 'ValueColumns'):
+        """Append every entry of another buffer, remapping its name codes."""
+        mapping = [self._code(name) for name in other.names]
+        self.name_codes.extend(mapping[code] for code in other.name_codes)
+        self.values.extend(other.values)
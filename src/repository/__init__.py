@@ -1,4 +1,6 @@
 """Repository package"""
 from src.repository.repository import Repository
+from src.repository.memory_repository import InMemoryRepository
+from src.repository.factory import create_repository
 
-__all__ = ['Repository']
+__all__ = ['Repository', 'InMemoryRepository', 'create_repository']
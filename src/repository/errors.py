@@ -0,0 +1,45 @@
+"""
+Errors raised by repository backends.
+"""
+from typing import List, Optional
+
+
+class TransactionCancelledError(Exception):
+    """Raised when a multi-entry transaction is cancelled and nothing was written."""
+    
+    def __init__(self, entry_ids: List[str], reasons: List[Optional[str]]):
+        """
+        Initialize the error.
+        
+        Args:
+            entry_ids: IDs of the entries in the transaction, in request order
+            reasons: Cancellation reason per entry (None for entries that
+                did not cause the cancellation), e.g. "not_found", "conflict"
+        """
+        super().__init__("Transaction cancelled")
+        self.entry_ids = entry_ids
+        self.reasons = reasons
+    
+    def failures(self) -> List[dict]:
+        """Entries that caused the cancellation, with their reason."""
+        return [
+            {'id': entry_id, 'reason': reason}
+            for entry_id, reason in zip(self.entry_ids, self.reasons)
+            if reason is not None
+        ]
+
+
+class WriteDeferredError(Exception):
+    """Raised when a throttled write was journaled to be applied later."""
+    
+    def __init__(self, entry_id: str, data: dict):
+        """
+        Initialize the error.
+        
+        Args:
+            entry_id: ID of the entry written
+            data: The fields written, as the response should report them
+        """
+        super().__init__(f"Write to {entry_id} deferred")
+        self.entry_id = entry_id
+        self.data = data
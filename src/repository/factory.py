@@ -0,0 +1,71 @@
+"""
+Repository backend selection.
+"""
+import os
+from typing import Optional
+
+from src.repository.memory_repository import InMemoryRepository
+from src.repository.repository import Repository
+from src.repository.id_filter import IdFilterRepository, get_id_filter
+from src.repository.snapshot import SnapshotRepository, get_snapshot_cache
+
+BACKEND_DYNAMODB = 'dynamodb'
+BACKEND_MEMORY = 'memory'
+BACKEND_POSTGRES = 'postgres'
+
+# The in-memory store lives as long as the container, like a warm connection
+_memory_repository: Optional[InMemoryRepository] = None
+
+
+def get_backend() -> str:
+    """Get the configured backend from the REPOSITORY_BACKEND environment variable."""
+    return (os.environ.get('REPOSITORY_BACKEND') or BACKEND_DYNAMODB).strip().lower()
+
+
+def create_repository(backend: Optional[str] = None):
+    """
+    Create the repository for the configured backend.
+    
+    When SNAPSHOT_MAX_STALENESS_SECONDS is set, the repository is wrapped
+    in a SnapshotRepository so list is served from the container's snapshot.
+    When ID_FILTER_MAX_STALENESS_SECONDS is set, it is wrapped in an
+    IdFilterRepository so lookups of missing IDs skip the backend.
+    
+    Args:
+        backend: Backend name (defaults to REPOSITORY_BACKEND, then "dynamodb")
+        
+    Returns:
+        Repository instance implementing the Repository interface
+        
+    Raises:
+        ValueError: If the backend is unknown
+    """
+    repository = _create_backend(backend or get_backend())
+    
+    cache = get_snapshot_cache()
+    if cache is not None:
+        repository = SnapshotRepository(repository, cache)
+    
+    id_filter = get_id_filter()
+    if id_filter is not None:
+        repository = IdFilterRepository(repository, id_filter)
+    return repository
+
+
+def _create_backend(backend: str):
+    global _memory_repository
+    
+    if backend == BACKEND_DYNAMODB:
+        return Repository()
+    
+    if backend == BACKEND_MEMORY:
+        if _memory_repository is None:
+            _memory_repository = InMemoryRepository()
+        return _memory_repository
+    
+    if backend == BACKEND_POSTGRES:
+        # psycopg2 is only imported when this backend is used
+        from src.repository.postgres_repository import PostgresRepository
+        return PostgresRepository()
+    
+    raise ValueError(f"Unknown repository backend: {backend}")
@@ -0,0 +1,400 @@
+"""
+Per-container Bloom filter of entry IDs for answering lookups of missing IDs.
+
+get, update and delete calls for IDs that do not exist still cost a
+DynamoDB round trip before the 404. The filter holds every known ID: an
+ID it has never seen is definitely missing and is answered without
+calling the repository, while an ID it may have seen (a real one, or a
+false positive at the configured rate) goes to the repository as before.
+
+The filter is built from a key-only parallel scan in a background
+thread, started by the first lookup; until it is built, and whenever it
+is older than its staleness bound, lookups go to the repository as
+without the filter. IDs written by this container are added at once; IDs
+created by other containers are added by a delta refresh through
+get_changed_since, so only an ID created elsewhere since the last refresh
+(at most the staleness bound ago) can be reported missing. Bloom filters
+cannot remove IDs, so deleted IDs stay until the next full rebuild,
+which also resizes the filter.
+"""
+import hashlib
+import json
+import logging
+import math
+import os
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional
+
+from src.database.database import Deadline
+from src.model.models import DELTA_OVERLAP, Entry
+from src.repository.errors import WriteDeferredError
+
+logger = logging.getLogger(__name__)
+
+# EMF records go to stdout bare: a log prefix before the JSON would stop
+# CloudWatch Logs from extracting the metrics
+metrics_logger = logging.getLogger(f'{__name__}.metrics')
+metrics_logger.setLevel(logging.INFO)
+metrics_logger.propagate = False
+_metrics_handler = logging.StreamHandler(sys.stdout)
+_metrics_handler.setFormatter(logging.Formatter('%(message)s'))
+metrics_logger.addHandler(_metrics_handler)
+
+DEFAULT_FALSE_POSITIVE_RATE = 0.01
+DEFAULT_FULL_REFRESH_SECONDS = 900
+DEFAULT_METRICS_NAMESPACE = 'BballAppTemplate'
+# Smallest filter built, so a new table has room to grow before the next rebuild
+MIN_CAPACITY = 1024
+
+# Filters live as long as the container
+_filter: Optional['IdFilter'] = None
+_filter_lock = threading.Lock()
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter of strings."""
+
+    def __init__(self, capacity: int, false_positive_rate: float):
+        """
+        Size an empty filter.
+
+        Args:
+            capacity: Number of keys the filter is sized for
+            false_positive_rate: Chance that a key never added is reported
+                present, once the filter holds capacity keys
+        """
+        if capacity < 1:
+            raise ValueError("Capacity must be positive")
+        if not 0 < false_positive_rate < 1:
+            raise ValueError("False positive rate must be between 0 and 1")
+        self.capacity = capacity
+        self.false_positive_rate = false_positive_rate
+        self.size = max(8, math.ceil(-capacity * math.log(false_positive_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key: str) -> List[int]:
+        # Double hashing: k positions from two 64-bit halves of one digest
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        step = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + i * step) % self.size for i in range(self.hashes)]
+
+    def add(self, key: str):
+        """Add a key (not thread-safe)."""
+        for position in self._positions(key):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+class IdFilter:
+    """Bloom filter of every entry ID, refreshed from a repository in the background."""
+
+    def __init__(self, false_positive_rate: float = DEFAULT_FALSE_POSITIVE_RATE,
+                 max_staleness: float = 5.0,
+                 full_refresh_interval: float = DEFAULT_FULL_REFRESH_SECONDS, clock=time.time):
+        """
+        Initialize an empty filter; the first lookup starts building it.
+
+        Args:
+            false_positive_rate: Target share of missing IDs still sent to the repository
+            max_staleness: Seconds a refresh is trusted; older filters pass lookups
+                through until the refresh the next lookup starts completes
+            full_refresh_interval: Seconds between rebuilds that drop deleted IDs
+            clock: Returns the current epoch time in seconds
+        """
+        self.false_positive_rate = false_positive_rate
+        self.max_staleness = max_staleness
+        self.full_refresh_interval = full_refresh_interval
+        self.clock = clock
+        self._bloom: Optional[BloomFilter] = None
+        self._high_water_mark: Optional[str] = None
+        self._full_refresh_at = 0.0
+        self._checked_at = float('-inf')
+        self._lock = threading.Lock()
+        self._metrics = {'lookups': 0, 'skipped': 0, 'false_positives': 0}
+        self._refresh_thread: Optional[threading.Thread] = None
+        # IDs written by this container while a full refresh scans, added to its filter
+        self._added_during_rebuild: Optional[List[str]] = None
+
+    def might_exist(self, entry_id: str, repository) -> bool:
+        """
+        Check whether an ID may exist.
+
+        Only a filter refreshed within the staleness bound rules IDs out; an
+        unbuilt or stale filter reports every ID as possibly existing and
+        starts a refresh in the background.
+
+        Args:
+            entry_id: ID looked up
+            repository: Repository the filter is refreshed from
+
+        Returns:
+            False if the ID definitely does not exist
+        """
+        with self._lock:
+            self._metrics['lookups'] += 1
+            if self._bloom is None or self.clock() - self._checked_at > self.max_staleness:
+                self._start_refresh(repository)
+                return True
+            if entry_id in self._bloom:
+                return True
+            self._metrics['skipped'] += 1
+            return False
+
+    def refresh(self, repository):
+        """
+        Bring the filter up to date, without blocking lookups meanwhile.
+
+        Runs a full rebuild if the filter is unbuilt or its full-refresh
+        interval has passed, and a delta refresh otherwise.
+
+        Args:
+            repository: Repository the filter is refreshed from
+        """
+        with self._lock:
+            now = self.clock()
+            full = self._bloom is None or now - self._full_refresh_at >= self.full_refresh_interval
+            expected = self._bloom.count if self._bloom is not None else None
+            if full:
+                self._added_during_rebuild = []
+        if full:
+            try:
+                self._full_refresh(repository, now, expected)
+            finally:
+                with self._lock:
+                    self._added_during_rebuild = None
+        else:
+            self._delta_refresh(repository)
+        with self._lock:
+            self._checked_at = now
+
+    def add(self, ids: Iterable[str]):
+        """Add IDs written by this container, without waiting for a refresh."""
+        with self._lock:
+            for entry_id in ids:
+                if self._added_during_rebuild is not None:
+                    self._added_during_rebuild.append(entry_id)
+                # Before the first build, the scan picks them up
+                if self._bloom is not None:
+                    self._add(entry_id)
+
+    def record_false_positive(self):
+        """Count an ID the filter passed on that the repository did not find."""
+        with self._lock:
+            self._metrics['false_positives'] += 1
+
+    def take_metrics(self) -> Dict[str, int]:
+        """
+        Get the lookup counters and reset them.
+
+        Returns:
+            Dict with 'lookups', 'skipped' (repository calls saved) and
+            'false_positives' (IDs passed on but not found, including
+            IDs deleted since the last rebuild)
+        """
+        with self._lock:
+            metrics = self._metrics
+            self._metrics = dict.fromkeys(metrics, 0)
+            return metrics
+
+    def _start_refresh(self, repository):
+        """Refresh in a background thread unless one is running (lock held)."""
+        if self._refresh_thread is not None and self._refresh_thread.is_alive():
+            return
+        # Lambda freezes the thread between invocations; it resumes with the next one
+        self._refresh_thread = threading.Thread(
+            target=self._refresh_in_background, args=(repository,), name='id-filter-refresh', daemon=True
+        )
+        self._refresh_thread.start()
+
+    def _refresh_in_background(self, repository):
+        try:
+            self.refresh(repository)
+        except Exception as e:
+            # Lookups keep going to the repository; the next one retries
+            logger.warning(f"Could not refresh the ID filter: {e}")
+
+    def _add(self, entry_id: str):
+        # Known IDs (updates, the delta overlap) would inflate the count
+        if entry_id in self._bloom:
+            return
+        self._bloom.add(entry_id)
+        if self._bloom.count > self._bloom.capacity:
+            # Past its capacity the false positive rate climbs; rebuild at the next check
+            self._full_refresh_at = float('-inf')
+
+    def _full_refresh(self, repository, now: float, expected: Optional[int]):
+        # IDs written elsewhere while the scan runs are caught by the next delta
+        started = datetime.fromtimestamp(now, timezone.utc).isoformat()
+        if expected is None:
+            expected = repository.count()
+        bloom = BloomFilter(max(MIN_CAPACITY, 2 * expected), self.false_positive_rate)
+        # Pages arrive from the scan worker threads
+        bloom_lock = threading.Lock()
+
+        def add_page(ids: List[str]):
+            with bloom_lock:
+                for entry_id in ids:
+                    bloom.add(entry_id)
+
+        repository.scan_ids(add_page)
+        with self._lock:
+            self._bloom = bloom
+            self._high_water_mark = started
+            self._full_refresh_at = now
+            for entry_id in self._added_during_rebuild:
+                self._add(entry_id)
+            if bloom.count > bloom.capacity:
+                self._full_refresh_at = float('-inf')
+        logger.info(f"Built ID filter of {bloom.count} IDs ({bloom.size} bits, {bloom.hashes} hashes)")
+
+    def _delta_refresh(self, repository):
+        with self._lock:
+            since = datetime.fromisoformat(self._high_water_mark) - DELTA_OVERLAP
+        changes = repository.get_changed_since(since.isoformat())
+        with self._lock:
+            for entry in changes.entries:
+                self._add(entry.id)
+            if changes.entries:
+                self._high_water_mark = max(self._high_water_mark, changes.cursor)
+
+
+def get_id_filter() -> Optional[IdFilter]:
+    """
+    Get the container's ID filter configured by environment variables.
+
+    ID_FILTER_MAX_STALENESS_SECONDS enables the filter when positive;
+    ID_FILTER_FULL_REFRESH_SECONDS and ID_FILTER_FALSE_POSITIVE_RATE tune it.
+    A filter built for another false positive rate is replaced.
+
+    Returns:
+        The shared IdFilter, or None if the filter is disabled
+    """
+    global _filter
+    max_staleness = float(os.environ.get('ID_FILTER_MAX_STALENESS_SECONDS') or 0)
+    if max_staleness <= 0:
+        return None
+
+    false_positive_rate = float(
+        os.environ.get('ID_FILTER_FALSE_POSITIVE_RATE') or DEFAULT_FALSE_POSITIVE_RATE
+    )
+    full_refresh_interval = float(
+        os.environ.get('ID_FILTER_FULL_REFRESH_SECONDS') or DEFAULT_FULL_REFRESH_SECONDS
+    )
+    with _filter_lock:
+        if _filter is None or _filter.false_positive_rate != false_positive_rate:
+            _filter = IdFilter(false_positive_rate, max_staleness, full_refresh_interval)
+        _filter.max_staleness = max_staleness
+        _filter.full_refresh_interval = full_refresh_interval
+        return _filter
+
+
+def publish_metrics(id_filter: IdFilter, namespace: Optional[str] = None):
+    """
+    Log the counters since the last call as a CloudWatch Embedded Metric Format record.
+
+    The record goes through metrics_logger, which writes it to stdout with
+    no log prefix; Lambda ships stdout to CloudWatch Logs, which extracts
+    the metrics.
+
+    Args:
+        id_filter: Filter whose counters are published and reset
+        namespace: CloudWatch namespace (defaults to METRICS_NAMESPACE, or
+            DEFAULT_METRICS_NAMESPACE)
+    """
+    metrics = id_filter.take_metrics()
+    if not metrics['lookups']:
+        return
+    names = {
+        'IdFilterLookups': metrics['lookups'],
+        'IdFilterSkippedCalls': metrics['skipped'],
+        'IdFilterFalsePositives': metrics['false_positives'],
+    }
+    record = {
+        '_aws': {
+            'Timestamp': int(time.time() * 1000),
+            'CloudWatchMetrics': [{
+                'Namespace': namespace or os.environ.get('METRICS_NAMESPACE') or DEFAULT_METRICS_NAMESPACE,
+                'Dimensions': [[]],
+                'Metrics': [{'Name': name, 'Unit': 'Count'} for name in names]
+            }]
+        },
+        **names
+    }
+    metrics_logger.info(json.dumps(record))
+
+
+class IdFilterRepository:
+    """
+    Repository wrapper that answers lookups of missing IDs from an IdFilter.
+
+    get_by_id, update and delete return their not-found result without a
+    repository call when the filter rules the ID out. Creates add their IDs
+    to the filter. Every other method is passed through unchanged.
+    """
+
+    def __init__(self, repository, id_filter: IdFilter):
+        """
+        Initialize the wrapper.
+
+        Args:
+            repository: Repository that stores the entries
+            id_filter: Filter of the IDs in the repository
+        """
+        self.repository = repository
+        self.id_filter = id_filter
+
+    def __getattr__(self, name):
+        return getattr(self.repository, name)
+
+    def get_by_id(self, entry_id: str) -> Optional[Entry]:
+        """Get an entry by ID, skipping the repository for IDs that do not exist."""
+        if not self.id_filter.might_exist(entry_id, self.repository):
+            return None
+        entry = self.repository.get_by_id(entry_id)
+        if entry is None:
+            self.id_filter.record_false_positive()
+        return entry
+
+    def update(self, entry_id: str, name: Optional[str] = None, value: Optional[int] = None) -> Optional[Entry]:
+        """Update an entry, skipping the repository for IDs that do not exist."""
+        if not self.id_filter.might_exist(entry_id, self.repository):
+            return None
+        updated = self.repository.update(entry_id, name=name, value=value)
+        if updated is None:
+            self.id_filter.record_false_positive()
+        return updated
+
+    def delete(self, entry_id: str) -> bool:
+        """Delete an entry, skipping the repository for IDs that do not exist."""
+        if not self.id_filter.might_exist(entry_id, self.repository):
+            return False
+        deleted = self.repository.delete(entry_id)
+        if not deleted:
+            self.id_filter.record_false_positive()
+        return deleted
+
+    def create(self, entry: Entry) -> Entry:
+        """Create an entry and add its ID to the filter."""
+        try:
+            created = self.repository.create(entry)
+        except WriteDeferredError as e:
+            # Journaled writes are applied later; later calls must still reach them
+            self.id_filter.add([e.entry_id])
+            raise
+        self.id_filter.add([created.id])
+        return created
+
+    def create_many(self, entries: Iterable[Entry], deadline: Optional[Deadline] = None) -> List[Entry]:
+        """Create entries and add their IDs to the filter."""
+        created = self.repository.create_many(entries, deadline=deadline)
+        self.id_filter.add(entry.id for entry in created)
+        return created
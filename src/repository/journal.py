@@ -0,0 +1,194 @@
+"""
+Write-ahead journal for writes deferred by DynamoDB throttling.
+
+When a create or update is throttled, Repository appends it to an
+append-only JSON-lines file under /tmp instead of failing the invocation,
+and a later invocation flushes the journal. Before a flush, operations on
+the same id are collapsed in order: updates are folded into a journaled
+put and a delete replaces both, so each entry is written once with its
+latest state. Later writes and deletes of an id that still has journaled
+operations are journaled as well, so they are never applied before the
+earlier ones, and reads of it are answered from the journal.
+
+The journal lives as long as the container: writes still in it when the
+container is retired are lost, as they would be after a failed retry.
+"""
+import json
+import logging
+import os
+import threading
+from typing import Callable, Dict, List, Optional
+
+from src.database.database import _env_flag
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_JOURNAL_PATH = '/tmp/write-journal.jsonl'
+
+# Journals live as long as the container, keyed by file path
+_journals: Dict[str, 'WriteJournal'] = {}
+_journals_lock = threading.Lock()
+
+
+def _operation_id(operation: dict) -> str:
+    return operation['item']['id'] if operation['op'] == 'put' else operation['id']
+
+
+def collapse(operations: List[dict]) -> List[dict]:
+    """
+    Merge journaled operations so each id is written once.
+
+    Args:
+        operations: Put ({'op': 'put', 'item': ...}), update ({'op':
+            'update', 'id', 'name', 'value', 'updated_at'}) and delete
+            ({'op': 'delete', 'id'}) operations, oldest first
+
+    Returns:
+        One operation per id, in the order the ids were first journaled
+    """
+    merged: Dict[str, dict] = {}
+    for operation in operations:
+        entry_id = _operation_id(operation)
+        current = merged.get(entry_id)
+
+        if operation['op'] != 'update' or current is None:
+            merged[entry_id] = json.loads(json.dumps(operation))  # deep copy
+            continue
+        if current['op'] == 'delete':
+            continue  # The update would fail its existence check
+
+        fields = {key: operation[key] for key in ('name', 'value') if operation.get(key) is not None}
+        if current['op'] == 'put':
+            item = current['item']
+            item.update(fields)
+            item['updated_at'] = operation['updated_at']
+            item['updated_day'] = operation['updated_at'][:10]
+        else:
+            current.update(fields)
+            current['updated_at'] = operation['updated_at']
+    return list(merged.values())
+
+
+class WriteJournal:
+    """Append-only file of deferred writes, shared by the container."""
+
+    def __init__(self, path: str = DEFAULT_JOURNAL_PATH):
+        """
+        Initialize the journal, loading operations left by an earlier process.
+
+        Args:
+            path: Journal file
+        """
+        self.path = path
+        self._operations: List[dict] = []
+        self._pending_ids = set()
+        self._lock = threading.RLock()
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self._operations)
+
+    def pending(self, entry_id: str) -> bool:
+        """Whether an id has journaled operations not yet flushed."""
+        with self._lock:
+            return entry_id in self._pending_ids
+
+    def collapsed(self, entry_id: str) -> Optional[dict]:
+        """
+        Get the journaled state of an id.
+
+        Args:
+            entry_id: ID looked up
+
+        Returns:
+            The collapsed put, update or delete of the id, or None if it has
+            no journaled operations
+        """
+        with self._lock:
+            operations = collapse([op for op in self._operations if _operation_id(op) == entry_id])
+            return operations[0] if operations else None
+
+    def append(self, operation: dict):
+        """
+        Record a deferred write.
+
+        Args:
+            operation: Put, update or delete operation, as accepted by collapse()
+        """
+        line = json.dumps(operation, default=int, separators=(',', ':'))
+        with self._lock:
+            with open(self.path, 'a') as f:
+                f.write(line + '\n')
+            # Decimal values are stored as int, so keep the decoded form
+            self._operations.append(json.loads(line))
+            self._pending_ids.add(_operation_id(operation))
+
+    def flush(self, apply: Callable[[List[dict]], int]) -> int:
+        """
+        Apply the collapsed operations and keep whatever was not applied.
+
+        Args:
+            apply: Writes the operations in order and returns how many
+                (from the start) were applied; it stops early when throttled
+
+        Returns:
+            Number of operations applied
+        """
+        with self._lock:
+            operations = collapse(self._operations)
+            if not operations:
+                return 0
+            applied = 0
+            try:
+                applied = apply(operations)
+            finally:
+                self._replace(operations[applied:])
+            logger.info(f"Flushed {applied} journaled writes, {len(operations) - applied} left")
+            return applied
+
+    def _replace(self, operations: List[dict]):
+        """Rewrite the journal with the remaining operations (lock held)."""
+        partial = f"{self.path}.partial"
+        with open(partial, 'w') as f:
+            for operation in operations:
+                f.write(json.dumps(operation, separators=(',', ':')) + '\n')
+        os.replace(partial, self.path)
+        self._operations = operations
+        self._pending_ids = {_operation_id(operation) for operation in operations}
+
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                lines = f.read().splitlines()
+        except FileNotFoundError:
+            return
+
+        for number, line in enumerate(lines, 1):
+            try:
+                operation = json.loads(line)
+                _operation_id(operation)
+            except (ValueError, KeyError, TypeError):
+                # A crash mid-append leaves a partial last line
+                logger.warning(f"Skipping unreadable journal line {number} in {self.path}")
+                continue
+            self._operations.append(operation)
+            self._pending_ids.add(_operation_id(operation))
+
+
+def get_write_journal() -> Optional[WriteJournal]:
+    """
+    Get the container's write journal configured by environment variables.
+
+    WRITE_JOURNAL_ENABLED turns the journal on; WRITE_JOURNAL_PATH sets the file.
+
+    Returns:
+        The shared WriteJournal, or None if journaling is disabled
+    """
+    if not _env_flag('WRITE_JOURNAL_ENABLED', False):
+        return None
+    path = os.environ.get('WRITE_JOURNAL_PATH') or DEFAULT_JOURNAL_PATH
+    with _journals_lock:
+        journal = _journals.get(path)
+        if journal is None:
+            journal = _journals[path] = WriteJournal(path)
+        return journal
@@ -0,0 +1,454 @@
+"""
+In-memory repository backend for tests and benchmarks.
+"""
+import os
+import threading
+import time
+import uuid
+from bisect import bisect_left, bisect_right
+from dataclasses import replace
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple, TypeVar
+
+from src.database.database import Deadline
+from src.model.models import BulkUpdateResult, ChangeSet, Entry, EntryStream, PurgeResult, ValueColumns
+from src.repository.errors import TransactionCancelledError
+
+T = TypeVar('T')
+
+# Sorts after any id, so bisect_right on (key, _MAX_ID) skips every entry with that key
+_MAX_ID = '\U0010ffff'
+
+
+class _SortedIndex:
+    """
+    Sorted list of index keys maintained lazily.
+
+    Adds append and removals leave a tombstone, both O(1); the next read
+    drops tombstones and re-sorts once, which Timsort does in close to
+    linear time on the mostly-sorted runs left by appends.
+    """
+
+    def __init__(self):
+        self._keys: List[Tuple] = []
+        self._removed: Set[Tuple] = set()
+        self._sorted = True
+
+    def add(self, key: Tuple):
+        if key in self._removed:
+            # The stale copy is still in the list; revive it
+            self._removed.discard(key)
+            return
+        if self._keys and key < self._keys[-1]:
+            self._sorted = False
+        self._keys.append(key)
+
+    def remove(self, key: Tuple):
+        self._removed.add(key)
+
+    def keys(self) -> List[Tuple]:
+        if self._removed:
+            removed = self._removed
+            self._keys = [key for key in self._keys if key not in removed]
+            self._removed = set()
+        if not self._sorted:
+            self._keys.sort()
+            self._sorted = True
+        return self._keys
+
+
+class InMemoryRepository:
+    """
+    Data access layer for Entry model kept in process memory.
+
+    Mirrors the Repository interface with the same indexes as the DynamoDB
+    table: hash lookup by id, a name index like NameIndex, and entries kept
+    sorted by value and by updated_at. Entries are copied on the way in and
+    out, so callers never share state with the store.
+
+    Writes never shift the sorted indexes; they are brought up to date by
+    the next read that needs them, so bulk loads stay linear.
+    """
+
+    def __init__(self, ttl_seconds: Optional[int] = None):
+        """
+        Initialize an empty repository.
+
+        Args:
+            ttl_seconds: Lifetime of new entries before purge deletes them
+                (defaults to ENTRY_TTL_SECONDS; 0 or unset never expires)
+        """
+        if ttl_seconds is None:
+            ttl_seconds = int(os.environ.get('ENTRY_TTL_SECONDS') or 0)
+        self.ttl_seconds = ttl_seconds
+        self._items: Dict[str, Entry] = {}
+        # Epoch second each entry expires at, like the expires_at TTL attribute
+        self._expires_at: Dict[str, int] = {}
+        self._by_name: Dict[str, Set[str]] = {}
+        self._by_value = _SortedIndex()
+        self._by_updated = _SortedIndex()
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def _index(self, entry: Entry):
+        self._by_name.setdefault(entry.name, set()).add(entry.id)
+        self._by_value.add((entry.value, entry.id))
+        self._by_updated.add((entry.updated_at, entry.id))
+
+    def _unindex(self, entry: Entry):
+        ids = self._by_name[entry.name]
+        ids.discard(entry.id)
+        if not ids:
+            del self._by_name[entry.name]
+        self._by_value.remove((entry.value, entry.id))
+        self._by_updated.remove((entry.updated_at, entry.id))
+
+    def create(self, entry: Entry) -> Entry:
+        """
+        Create a new entry.
+
+        Args:
+            entry: Entry object to create
+
+        Returns:
+            Created Entry object with generated ID and timestamps
+        """
+        if not entry.id:
+            entry.id = str(uuid.uuid4())
+
+        now = datetime.now(timezone.utc).isoformat()
+        if not entry.created_at:
+            entry.created_at = now
+        entry.updated_at = now
+
+        with self._lock:
+            # Same id overwrites, like put_item
+            existing = self._items.get(entry.id)
+            if existing:
+                self._unindex(existing)
+            stored = replace(entry)
+            self._items[entry.id] = stored
+            self._index(stored)
+            if self.ttl_seconds > 0:
+                created = datetime.fromisoformat(entry.created_at).timestamp()
+                self._expires_at[entry.id] = int(created) + self.ttl_seconds
+            else:
+                self._expires_at.pop(entry.id, None)
+
+        return entry
+
+    def create_many(self, entries: Iterable[Entry], deadline: Optional[Deadline] = None) -> List[Entry]:
+        """
+        Create many entries.
+
+        Args:
+            entries: Entry objects to create
+            deadline: Ignored; every entry is created under the lock
+
+        Returns:
+            Created Entry objects with generated IDs and timestamps
+        """
+        with self._lock:
+            return [self.create(entry) for entry in entries]
+
+    def get_by_id(self, entry_id: str) -> Optional[Entry]:
+        """
+        Get an entry by ID.
+
+        Args:
+            entry_id: ID of the entry to retrieve
+
+        Returns:
+            Entry object if found, None otherwise
+        """
+        with self._lock:
+            entry = self._items.get(entry_id)
+            return replace(entry) if entry else None
+
+    def iter_all(self, continuation_token: Optional[str] = None,
+                 deadline: Optional[Deadline] = None) -> EntryStream:
+        """
+        Iterate over all entries, copying each one as it is yielded.
+
+        With a continuation token or a deadline, entries are read in id
+        order, so the token (the last id read) resumes the stream.
+
+        Args:
+            continuation_token: Token from a stream that stopped early
+            deadline: Stop once it has passed (optional)
+
+        Returns:
+            EntryStream of Entry objects
+        """
+        with self._lock:
+            if continuation_token is None and deadline is None:
+                stored = list(self._items.values())
+            else:
+                stored = [self._items[entry_id] for entry_id in sorted(self._items)
+                          if continuation_token is None or entry_id > continuation_token]
+
+        def read(stream: EntryStream) -> Iterator[Entry]:
+            for position, entry in enumerate(stored):
+                if position and deadline is not None and deadline.expired():
+                    stream.continuation_token = stored[position - 1].id
+                    return
+                yield replace(entry)
+
+        return EntryStream(read)
+
+    def get_all(self) -> List[Entry]:
+        """
+        Get all entries.
+
+        Returns:
+            List of all Entry objects
+        """
+        with self._lock:
+            return [replace(entry) for entry in self._items.values()]
+
+    def get_value_columns(self) -> ValueColumns:
+        """
+        Read the name and value of every entry into columnar buffers.
+
+        Returns:
+            ValueColumns with one row per entry
+        """
+        columns = ValueColumns()
+        with self._lock:
+            columns.add_all((entry.name, entry.value) for entry in self._items.values())
+        return columns
+
+    def scan_ids(self, on_ids: Callable[[List[str]], T]) -> List[T]:
+        """
+        Read the ID of every entry.
+
+        Args:
+            on_ids: Called once with every ID
+
+        Returns:
+            The on_ids result, in a list
+        """
+        with self._lock:
+            ids = list(self._items)
+        return [on_ids(ids)]
+
+    def purge(self, created_before: Optional[str] = None, rate_limit: Optional[float] = None,
+              continuation_token: Optional[str] = None, deadline: Optional[Deadline] = None) -> PurgeResult:
+        """
+        Delete expired entries, as DynamoDB TTL would.
+
+        Args:
+            created_before: Also delete entries created before this UTC ISO
+                8601 timestamp (optional)
+            rate_limit: Ignored; there is no capacity to protect
+            continuation_token: Ignored; a purge always completes
+            deadline: Ignored; a purge always completes
+
+        Returns:
+            PurgeResult with the number of entries deleted
+        """
+        now = int(time.time())
+        with self._lock:
+            stale = [
+                entry for entry in self._items.values()
+                if self._expires_at.get(entry.id, now + 1) <= now
+                or (created_before is not None and entry.created_at < created_before)
+            ]
+            for entry in stale:
+                self._unindex(entry)
+                del self._items[entry.id]
+                self._expires_at.pop(entry.id, None)
+            return PurgeResult(deleted=len(stale))
+
+    def count(self, name: Optional[str] = None) -> int:
+        """
+        Count entries.
+
+        Args:
+            name: Only count entries with this exact name (optional)
+
+        Returns:
+            Number of matching entries
+        """
+        with self._lock:
+            if name is None:
+                return len(self._items)
+            return len(self._by_name.get(name, ()))
+
+    def get_by_name(self, name: str) -> List[Entry]:
+        """
+        Get all entries with a given name.
+
+        Args:
+            name: Exact name to match
+
+        Returns:
+            List of matching Entry objects
+        """
+        with self._lock:
+            return [replace(self._items[entry_id]) for entry_id in self._by_name.get(name, ())]
+
+    def get_by_value_range(self, min_value: Optional[int] = None,
+                           max_value: Optional[int] = None) -> List[Entry]:
+        """
+        Get entries whose value lies within an inclusive range, ordered by value.
+
+        Args:
+            min_value: Lower bound (optional)
+            max_value: Upper bound (optional)
+
+        Returns:
+            List of matching Entry objects
+        """
+        with self._lock:
+            keys = self._by_value.keys()
+            start = 0 if min_value is None else bisect_left(keys, (min_value, ''))
+            end = len(keys) if max_value is None else bisect_right(keys, (max_value, _MAX_ID))
+            return [replace(self._items[entry_id]) for _, entry_id in keys[start:end]]
+
+    def get_changed_since(self, since: str, limit: Optional[int] = None) -> ChangeSet:
+        """
+        Get entries modified after a timestamp, oldest change first.
+
+        Args:
+            since: Normalized UTC ISO 8601 timestamp (exclusive)
+            limit: Maximum number of entries to return (optional); entries
+                sharing the last returned updated_at are always included
+
+        Returns:
+            ChangeSet with the entries, the high-water-mark cursor and
+            whether more changes remain; with no changes, the cursor moves
+            up to the query time, less DELTA_OVERLAP
+        """
+        entries: List[Entry] = []
+        cursor = since
+        queried_at = datetime.now(timezone.utc)
+
+        with self._lock:
+            keys = self._by_updated.keys()
+            start = bisect_right(keys, (since, _MAX_ID))
+            for updated_at, entry_id in keys[start:]:
+                if limit is not None and len(entries) >= limit and updated_at != cursor:
+                    return ChangeSet(entries=entries, cursor=cursor, has_more=True)
+                entries.append(replace(self._items[entry_id]))
+                cursor = updated_at
+
+        if not entries:
+            return ChangeSet.empty(since, queried_at)
+        return ChangeSet(entries=entries, cursor=cursor, has_more=False)
+
+    def update(self, entry_id: str, name: Optional[str] = None, value: Optional[int] = None) -> Optional[Entry]:
+        """
+        Update an entry.
+
+        Args:
+            entry_id: ID of the entry to update
+            name: New name (optional)
+            value: New value (optional)
+
+        Returns:
+            Updated Entry object if found, None otherwise
+        """
+        with self._lock:
+            existing = self._items.get(entry_id)
+            if existing is None:
+                return None
+
+            self._apply_update(existing, name, value, datetime.now(timezone.utc).isoformat())
+            return replace(existing)
+
+    def _apply_update(self, existing: Entry, name: Optional[str], value: Optional[int], now: str):
+        """Update a stored entry in place and keep the indexes in sync (lock held)."""
+        self._unindex(existing)
+        if name is not None:
+            existing.name = name
+        if value is not None:
+            existing.value = value
+        existing.updated_at = now
+        self._index(existing)
+
+    def transact_update(self, updates: List[dict]) -> List[dict]:
+        """
+        Update several entries atomically.
+
+        Args:
+            updates: Dicts with the entry 'id' and optional 'name'/'value'
+
+        Returns:
+            Per-entry results with the 'id' and the new 'updated_at'
+
+        Raises:
+            TransactionCancelledError: If any entry is missing; no entry is updated
+        """
+        with self._lock:
+            reasons = [None if u['id'] in self._items else 'not_found' for u in updates]
+            if any(reasons):
+                raise TransactionCancelledError([u['id'] for u in updates], reasons)
+
+            now = datetime.now(timezone.utc).isoformat()
+            for update in updates:
+                self._apply_update(self._items[update['id']], update.get('name'), update.get('value'), now)
+            return [{'id': update['id'], 'updated_at': now} for update in updates]
+
+    def bulk_update(self, changes: dict, name: Optional[str] = None,
+                    min_value: Optional[int] = None, max_value: Optional[int] = None,
+                    limit: Optional[int] = None, continuation_token: Optional[str] = None,
+                    concurrency: Optional[int] = None, rate_limit: Optional[float] = None,
+                    deadline: Optional[Deadline] = None) -> BulkUpdateResult:
+        """
+        Update every entry matching a predicate, in id order.
+
+        Args:
+            changes: Dict with the new 'name' and/or 'value'
+            name: Match entries with this exact name (optional)
+            min_value: Match entries with at least this value (optional)
+            max_value: Match entries with at most this value (optional)
+            limit: Stop after this many matches (optional)
+            continuation_token: Token from a previous run (the last id it updated)
+            concurrency: Ignored; updates are applied under the lock
+            rate_limit: Ignored; there is no capacity to protect
+            deadline: Ignored; updates are applied under the lock
+
+        Returns:
+            BulkUpdateResult with the counts of this run and, if it stopped at
+            the limit, the token to continue from
+        """
+        with self._lock:
+            candidates = self._by_name.get(name, ()) if name is not None else self._items
+            matches = sorted(
+                entry_id for entry_id in candidates
+                if (continuation_token is None or entry_id > continuation_token)
+                and (min_value is None or self._items[entry_id].value >= min_value)
+                and (max_value is None or self._items[entry_id].value <= max_value)
+            )
+            batch = matches if limit is None else matches[:limit]
+
+            now = datetime.now(timezone.utc).isoformat()
+            for entry_id in batch:
+                self._apply_update(self._items[entry_id], changes.get('name'), changes.get('value'), now)
+
+        return BulkUpdateResult(
+            matched=len(batch),
+            updated=len(batch),
+            continuation_token=batch[-1] if len(batch) < len(matches) else None
+        )
+
+    def delete(self, entry_id: str) -> bool:
+        """
+        Delete an entry.
+
+        Args:
+            entry_id: ID of the entry to delete
+
+        Returns:
+            True if deleted, False if not found
+        """
+        with self._lock:
+            existing = self._items.pop(entry_id, None)
+            if existing is None:
+                return False
+            self._unindex(existing)
+            self._expires_at.pop(entry_id, None)
+            return True
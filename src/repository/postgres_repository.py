@@ -0,0 +1,555 @@
+"""
+Repository layer for PostgreSQL operations.
+"""
+import io
+import os
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple, TypeVar
+
+import psycopg2
+
+from src.database.database import Deadline
+from src.database.postgres import PostgresConnection, PreparedConnection
+from src.model.models import BulkUpdateResult, ChangeSet, Entry, EntryStream, PurgeResult, ValueColumns
+from src.repository.errors import TransactionCancelledError
+
+T = TypeVar('T')
+
+COLUMNS = 'id, name, value, created_at, updated_at'
+# Written on create only; expires_at mirrors the DynamoDB TTL attribute
+INSERT_COLUMNS = f'{COLUMNS}, expires_at'
+
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS entries (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    value INTEGER NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL,
+    updated_at TIMESTAMPTZ NOT NULL,
+    expires_at BIGINT
+);
+ALTER TABLE entries ADD COLUMN IF NOT EXISTS expires_at BIGINT;
+CREATE INDEX IF NOT EXISTS entries_name_idx ON entries (name);
+CREATE INDEX IF NOT EXISTS entries_value_idx ON entries (value, id);
+CREATE INDEX IF NOT EXISTS entries_updated_at_idx ON entries (updated_at, id);
+"""
+
+# Server-side prepared statements, created once per pooled connection
+PREPARED_STATEMENTS = {
+    'entry_put': f"""
+        PREPARE entry_put (text, text, integer, timestamptz, timestamptz, bigint) AS
+        INSERT INTO entries ({INSERT_COLUMNS}) VALUES ($1, $2, $3, $4, $5, $6)
+        ON CONFLICT (id) DO UPDATE SET
+            name = EXCLUDED.name, value = EXCLUDED.value,
+            created_at = EXCLUDED.created_at, updated_at = EXCLUDED.updated_at,
+            expires_at = EXCLUDED.expires_at
+    """,
+    'entry_get': f"""
+        PREPARE entry_get (text) AS
+        SELECT {COLUMNS} FROM entries WHERE id = $1
+    """,
+    'entry_page': f"""
+        PREPARE entry_page (text, integer) AS
+        SELECT {COLUMNS} FROM entries WHERE id > $1 ORDER BY id LIMIT $2
+    """,
+    'entry_ids': """
+        PREPARE entry_ids (text, integer) AS
+        SELECT id FROM entries WHERE id > $1 ORDER BY id LIMIT $2
+    """,
+    'entry_update': f"""
+        PREPARE entry_update (text, text, integer, timestamptz) AS
+        UPDATE entries SET
+            name = COALESCE($2, name), value = COALESCE($3, value), updated_at = $4
+        WHERE id = $1
+        RETURNING {COLUMNS}
+    """,
+    'entry_delete': """
+        PREPARE entry_delete (text) AS
+        DELETE FROM entries WHERE id = $1
+    """,
+}
+
+# Sorts before every id, so keyset pagination starts at the beginning
+_FIRST_KEY = ''
+
+
+def _to_entry(row: Tuple) -> Entry:
+    """Convert a database row to an Entry."""
+    return Entry(
+        id=row[0],
+        name=row[1],
+        value=row[2],
+        created_at=row[3].isoformat(),
+        updated_at=row[4].isoformat()
+    )
+
+
+def _copy_field(value) -> str:
+    """Escape a value for COPY text format."""
+    if value is None:
+        return '\\N'
+    return (str(value).replace('\\', '\\\\').replace('\t', '\\t')
+            .replace('\n', '\\n').replace('\r', '\\r'))
+
+
+class PostgresRepository:
+    """Data access layer for Entry model using PostgreSQL."""
+
+    def __init__(self, page_size: int = 1000, ttl_seconds: Optional[int] = None):
+        """
+        Initialize repository with the pooled PostgreSQL connection.
+
+        Args:
+            page_size: Rows fetched per keyset page when listing
+            ttl_seconds: Lifetime of new entries before purge deletes them
+                (defaults to ENTRY_TTL_SECONDS; 0 or unset never expires)
+        """
+        PostgresConnection.initialize()
+        self.page_size = page_size
+        if ttl_seconds is None:
+            ttl_seconds = int(os.environ.get('ENTRY_TTL_SECONDS') or 0)
+        self.ttl_seconds = ttl_seconds
+
+    def _run(self, operation: Callable[[PreparedConnection], T], retry: bool = False) -> T:
+        """
+        Run an operation in a pooled transaction.
+
+        A connection dropped while the container was frozen surfaces as
+        OperationalError/InterfaceError on first use. With retry, the
+        operation is run once more on a fresh connection; only pass it for
+        reads and idempotent writes, since the first attempt may have
+        committed before the error.
+        """
+        try:
+            with PostgresConnection.connection() as conn:
+                return operation(conn)
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            if not retry:
+                raise
+            with PostgresConnection.connection() as conn:
+                return operation(conn)
+
+    @staticmethod
+    def _execute(conn: PreparedConnection, statement: str, params: Tuple):
+        """Execute a prepared statement, preparing it on first use per connection."""
+        cursor = conn.cursor()
+        if statement not in conn.prepared:
+            cursor.execute(PREPARED_STATEMENTS[statement])
+            conn.prepared.add(statement)
+        placeholders = ', '.join(['%s'] * len(params))
+        cursor.execute(f"EXECUTE {statement} ({placeholders})", params)
+        return cursor
+
+    def ensure_schema(self):
+        """Create the entries table and its indexes if they do not exist."""
+        self._run(lambda conn: conn.cursor().execute(SCHEMA_SQL), retry=True)
+
+    def create(self, entry: Entry) -> Entry:
+        """
+        Create a new entry in PostgreSQL.
+
+        Args:
+            entry: Entry object to create
+
+        Returns:
+            Created Entry object with generated ID and timestamps
+        """
+        self._stamp(entry)
+        # An upsert of the whole row, so safe to repeat
+        self._run(lambda conn: self._execute(conn, 'entry_put', (
+            entry.id, entry.name, entry.value, entry.created_at, entry.updated_at,
+            self._expires_at(entry)
+        )), retry=True)
+        return entry
+
+    def create_many(self, entries: Iterable[Entry], deadline: Optional[Deadline] = None) -> List[Entry]:
+        """
+        Create many entries with a single COPY.
+
+        Args:
+            entries: Entry objects to create (IDs must not exist yet)
+            deadline: Ignored; a single COPY is used
+
+        Returns:
+            Created Entry objects with generated IDs and timestamps
+        """
+        created = [self._stamp(entry) for entry in entries]
+        buffer = io.StringIO()
+        for entry in created:
+            buffer.write('\t'.join(_copy_field(v) for v in (
+                entry.id, entry.name, entry.value, entry.created_at, entry.updated_at,
+                self._expires_at(entry)
+            )))
+            buffer.write('\n')
+
+        def copy(conn):
+            buffer.seek(0)
+            conn.cursor().copy_expert(f"COPY entries ({INSERT_COLUMNS}) FROM STDIN", buffer)
+
+        if created:
+            self._run(copy)
+        return created
+
+    @staticmethod
+    def _stamp(entry: Entry) -> Entry:
+        """Generate the ID and timestamps of a new entry."""
+        if not entry.id:
+            entry.id = str(uuid.uuid4())
+        now = datetime.now(timezone.utc).isoformat()
+        if not entry.created_at:
+            entry.created_at = now
+        entry.updated_at = now
+        return entry
+
+    def _expires_at(self, entry: Entry) -> Optional[int]:
+        """Epoch second a new entry expires at, or None if it never does."""
+        if self.ttl_seconds <= 0:
+            return None
+        return int(datetime.fromisoformat(entry.created_at).timestamp()) + self.ttl_seconds
+
+    def get_by_id(self, entry_id: str) -> Optional[Entry]:
+        """
+        Get an entry by ID.
+
+        Args:
+            entry_id: ID of the entry to retrieve
+
+        Returns:
+            Entry object if found, None otherwise
+        """
+        row = self._run(lambda conn: self._execute(conn, 'entry_get', (entry_id,)).fetchone(), retry=True)
+        return _to_entry(row) if row else None
+
+    def get_page(self, after_id: Optional[str] = None,
+                 limit: Optional[int] = None) -> Tuple[List[Entry], Optional[str]]:
+        """
+        Get one page of entries ordered by ID (keyset pagination).
+
+        Args:
+            after_id: Last ID of the previous page (None for the first page)
+            limit: Page size (defaults to the repository page size)
+
+        Returns:
+            Tuple of the entries and the ID to pass as after_id for the next
+            page, or None when this was the last page
+        """
+        limit = limit or self.page_size
+        rows = self._run(lambda conn: self._execute(
+            conn, 'entry_page', (after_id or _FIRST_KEY, limit)
+        ).fetchall(), retry=True)
+        entries = [_to_entry(row) for row in rows]
+        next_after = entries[-1].id if len(entries) == limit else None
+        return entries, next_after
+
+    def iter_all(self, continuation_token: Optional[str] = None,
+                 deadline: Optional[Deadline] = None) -> EntryStream:
+        """
+        Iterate over all entries one keyset page at a time.
+
+        Args:
+            continuation_token: Token from a stream that stopped early (the last id it read)
+            deadline: Stop before reading another page once it has passed (optional)
+
+        Returns:
+            EntryStream of Entry objects ordered by ID
+        """
+        def read(stream: EntryStream) -> Iterator[Entry]:
+            after_id = continuation_token
+            while True:
+                entries, next_after = self.get_page(after_id)
+                yield from entries
+                if next_after is None:
+                    return
+                after_id = next_after
+                if deadline is not None and deadline.expired():
+                    stream.continuation_token = after_id
+                    return
+
+        return EntryStream(read)
+
+    def get_all(self) -> List[Entry]:
+        """
+        Get all entries.
+
+        Returns:
+            List of all Entry objects
+        """
+        return list(self.iter_all())
+
+    def _query(self, sql: str, params: Tuple) -> List[Entry]:
+        """Run an ad-hoc SELECT and convert the rows to entries."""
+        def query(conn):
+            cursor = conn.cursor()
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+        return [_to_entry(row) for row in self._run(query, retry=True)]
+
+    def get_value_columns(self) -> ValueColumns:
+        """
+        Read the name and value of every entry into columnar buffers.
+
+        Rows are streamed through a server-side cursor, one page_size batch
+        at a time.
+
+        Returns:
+            ValueColumns with one row per entry
+        """
+        def read(conn):
+            columns = ValueColumns()
+            with conn.cursor(name='entry_value_columns') as cursor:
+                cursor.itersize = self.page_size
+                cursor.execute("SELECT name, value FROM entries")
+                columns.add_all(cursor)
+            return columns
+
+        return self._run(read, retry=True)
+
+    def scan_ids(self, on_ids: Callable[[List[str]], T]) -> List[T]:
+        """
+        Read the ID of every entry one keyset page at a time.
+
+        Args:
+            on_ids: Called with the IDs of every page
+
+        Returns:
+            The on_ids results of every page
+        """
+        results = []
+        after_id = _FIRST_KEY
+        while True:
+            ids = self._run(lambda conn: [row[0] for row in self._execute(
+                conn, 'entry_ids', (after_id, self.page_size)
+            ).fetchall()], retry=True)
+            results.append(on_ids(ids))
+            if len(ids) < self.page_size:
+                return results
+            after_id = ids[-1]
+
+    def purge(self, created_before: Optional[str] = None, rate_limit: Optional[float] = None,
+              continuation_token: Optional[str] = None, deadline: Optional[Deadline] = None) -> PurgeResult:
+        """
+        Delete expired entries, as DynamoDB TTL would.
+
+        Args:
+            created_before: Also delete entries created before this UTC ISO
+                8601 timestamp (optional)
+            rate_limit: Ignored; a single DELETE is used
+            continuation_token: Ignored; a single DELETE is used
+            deadline: Ignored; a single DELETE is used
+
+        Returns:
+            PurgeResult with the number of entries deleted
+        """
+        def purge(conn):
+            cursor = conn.cursor()
+            if created_before is None:
+                cursor.execute("DELETE FROM entries WHERE expires_at <= %s", (int(time.time()),))
+            else:
+                cursor.execute("DELETE FROM entries WHERE expires_at <= %s OR created_at < %s",
+                               (int(time.time()), created_before))
+            return cursor.rowcount
+
+        return PurgeResult(deleted=self._run(purge))
+
+    def count(self, name: Optional[str] = None) -> int:
+        """
+        Count entries.
+
+        Args:
+            name: Only count entries with this exact name (optional, uses the name index)
+
+        Returns:
+            Number of matching entries
+        """
+        if name is None:
+            return self._run(lambda conn: self._scalar(conn, "SELECT count(*) FROM entries", ()), retry=True)
+        return self._run(lambda conn: self._scalar(
+            conn, "SELECT count(*) FROM entries WHERE name = %s", (name,)
+        ), retry=True)
+
+    def get_by_name(self, name: str) -> List[Entry]:
+        """
+        Get all entries with a given name.
+
+        Args:
+            name: Exact name to match
+
+        Returns:
+            List of matching Entry objects
+        """
+        return self._query(f"SELECT {COLUMNS} FROM entries WHERE name = %s", (name,))
+
+    def get_by_value_range(self, min_value: Optional[int] = None,
+                           max_value: Optional[int] = None) -> List[Entry]:
+        """
+        Get entries whose value lies within an inclusive range, ordered by value.
+
+        Args:
+            min_value: Lower bound (optional)
+            max_value: Upper bound (optional)
+
+        Returns:
+            List of matching Entry objects
+        """
+        return self._query(
+            f"SELECT {COLUMNS} FROM entries"
+            " WHERE (%s::integer IS NULL OR value >= %s) AND (%s::integer IS NULL OR value <= %s)"
+            " ORDER BY value, id",
+            (min_value, min_value, max_value, max_value)
+        )
+
+    def get_changed_since(self, since: str, limit: Optional[int] = None) -> ChangeSet:
+        """
+        Get entries modified after a timestamp, oldest change first.
+
+        Args:
+            since: Normalized UTC ISO 8601 timestamp (exclusive)
+            limit: Maximum number of entries to return (optional); entries
+                sharing the last returned updated_at are always included
+
+        Returns:
+            ChangeSet with the entries, the high-water-mark cursor and
+            whether more changes remain; with no changes, the cursor moves
+            up to the query time, less DELTA_OVERLAP
+        """
+        select = f"SELECT {COLUMNS} FROM entries"
+        queried_at = datetime.now(timezone.utc)
+        if limit is None:
+            entries = self._query(f"{select} WHERE updated_at > %s ORDER BY updated_at, id", (since,))
+        else:
+            entries = self._query(
+                f"{select} WHERE updated_at > %s ORDER BY updated_at, id LIMIT %s", (since, limit)
+            )
+        if not entries:
+            return ChangeSet.empty(since, queried_at)
+        if limit is None or len(entries) < limit:
+            return ChangeSet(entries=entries, cursor=entries[-1].updated_at, has_more=False)
+
+        # Never split entries sharing the cursor timestamp
+        last = entries[-1]
+        entries += self._query(
+            f"{select} WHERE updated_at = %s AND id > %s ORDER BY id", (last.updated_at, last.id)
+        )
+        has_more = bool(self._run(lambda conn: self._scalar(
+            conn, "SELECT EXISTS (SELECT 1 FROM entries WHERE updated_at > %s)", (last.updated_at,)
+        ), retry=True))
+        return ChangeSet(entries=entries, cursor=last.updated_at, has_more=has_more)
+
+    @staticmethod
+    def _scalar(conn, sql: str, params: Tuple):
+        cursor = conn.cursor()
+        cursor.execute(sql, params)
+        return cursor.fetchone()[0]
+
+    def update(self, entry_id: str, name: Optional[str] = None, value: Optional[int] = None) -> Optional[Entry]:
+        """
+        Update an entry.
+
+        Args:
+            entry_id: ID of the entry to update
+            name: New name (optional)
+            value: New value (optional)
+
+        Returns:
+            Updated Entry object if found, None otherwise
+        """
+        now = datetime.now(timezone.utc).isoformat()
+        # Sets fixed values and timestamp, so safe to repeat
+        row = self._run(lambda conn: self._execute(
+            conn, 'entry_update', (entry_id, name, value, now)
+        ).fetchone(), retry=True)
+        return _to_entry(row) if row else None
+
+    def transact_update(self, updates: List[dict]) -> List[dict]:
+        """
+        Update several entries atomically in one database transaction.
+
+        Args:
+            updates: Dicts with the entry 'id' and optional 'name'/'value'
+
+        Returns:
+            Per-entry results with the 'id' and the new 'updated_at'
+
+        Raises:
+            TransactionCancelledError: If any entry is missing; no entry is updated
+        """
+        ids = [update['id'] for update in updates]
+        now = datetime.now(timezone.utc).isoformat()
+
+        def transact(conn):
+            cursor = conn.cursor()
+            # Lock the rows first so every missing id is reported, not just the first
+            cursor.execute("SELECT id FROM entries WHERE id = ANY(%s) FOR UPDATE", (ids,))
+            found = {row[0] for row in cursor.fetchall()}
+            reasons = [None if entry_id in found else 'not_found' for entry_id in ids]
+            if any(reasons):
+                raise TransactionCancelledError(ids, reasons)
+            for update in updates:
+                self._execute(conn, 'entry_update', (update['id'], update.get('name'), update.get('value'), now))
+
+        self._run(transact)
+        return [{'id': entry_id, 'updated_at': now} for entry_id in ids]
+
+    def bulk_update(self, changes: dict, name: Optional[str] = None,
+                    min_value: Optional[int] = None, max_value: Optional[int] = None,
+                    limit: Optional[int] = None, continuation_token: Optional[str] = None,
+                    concurrency: Optional[int] = None, rate_limit: Optional[float] = None,
+                    deadline: Optional[Deadline] = None) -> BulkUpdateResult:
+        """
+        Update every entry matching a predicate, in id order, in one transaction.
+
+        Args:
+            changes: Dict with the new 'name' and/or 'value'
+            name: Match entries with this exact name (optional, uses the name index)
+            min_value: Match entries with at least this value (optional)
+            max_value: Match entries with at most this value (optional)
+            limit: Stop after this many matches (optional)
+            continuation_token: Token from a previous run (the last id it updated)
+            concurrency: Ignored; a single UPDATE is used
+            rate_limit: Ignored; a single UPDATE is used
+            deadline: Ignored; a single UPDATE is used
+
+        Returns:
+            BulkUpdateResult with the counts of this run and, if it stopped at
+            the limit, the token to continue from
+        """
+        now = datetime.now(timezone.utc).isoformat()
+
+        def bulk_update(conn):
+            cursor = conn.cursor()
+            # One row past the limit tells whether another run is needed
+            cursor.execute(
+                "SELECT id FROM entries WHERE id > %s AND (%s::text IS NULL OR name = %s)"
+                " AND (%s::integer IS NULL OR value >= %s) AND (%s::integer IS NULL OR value <= %s)"
+                " ORDER BY id LIMIT %s FOR UPDATE",
+                (continuation_token or _FIRST_KEY, name, name, min_value, min_value,
+                 max_value, max_value, None if limit is None else limit + 1)
+            )
+            matches = [row[0] for row in cursor.fetchall()]
+            batch = matches if limit is None else matches[:limit]
+            cursor.execute(
+                "UPDATE entries SET name = COALESCE(%s, name), value = COALESCE(%s, value), updated_at = %s"
+                " WHERE id = ANY(%s)",
+                (changes.get('name'), changes.get('value'), now, batch)
+            )
+            return BulkUpdateResult(
+                matched=len(batch),
+                updated=cursor.rowcount,
+                continuation_token=batch[-1] if len(batch) < len(matches) else None
+            )
+
+        return self._run(bulk_update)
+
+    def delete(self, entry_id: str) -> bool:
+        """
+        Delete an entry.
+
+        Args:
+            entry_id: ID of the entry to delete
+
+        Returns:
+            True if deleted, False if not found
+        """
+        return self._run(lambda conn: self._execute(conn, 'entry_delete', (entry_id,)).rowcount) > 0
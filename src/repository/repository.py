@@ -1,32 +1,144 @@
 """
 Repository layer for DynamoDB operations.
 """
+import base64
+import binascii
+import json
+import os
+import threading
+import time
 import uuid
-from typing import Optional, List
-from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Callable, Iterable, Iterator, Optional, List, TypeVar
+from datetime import date, datetime, timedelta, timezone
 from decimal import Decimal
 
-from src.database.database import DynamoDBConnection
-from src.model.models import Entry
-from boto3.dynamodb.conditions import Key
+from src.database.database import Deadline, DynamoDBConnection, ThrottledError, TokenBucket
+from src.model.models import BulkUpdateResult, ChangeSet, Entry, EntryStream, PurgeResult, ValueColumns
+from src.repository.errors import TransactionCancelledError, WriteDeferredError
+from src.repository.journal import WriteJournal, get_write_journal
+from boto3.dynamodb.conditions import Attr, Key
+from botocore.exceptions import ClientError
+
+T = TypeVar('T')
+
+# GSI on the entry name
+NAME_INDEX = 'NameIndex'
+# GSI partitioned by UTC day (updated_day) and sorted by updated_at
+UPDATED_AT_INDEX = 'UpdatedAtIndex'
+# Parallel scan segments when DYNAMODB_SCAN_SEGMENTS is not set
+DEFAULT_SCAN_SEGMENTS = 4
+# Epoch-seconds attribute configured as the table's TTL attribute
+TTL_ATTRIBUTE = 'expires_at'
+# Purge deletes per second when PURGE_RATE_LIMIT is not set
+DEFAULT_PURGE_RATE_LIMIT = 100
+# TransactWriteItems accepts at most 100 actions
+MAX_TRANSACTION_ITEMS = 100
+# BatchWriteItem accepts at most 25 requests
+MAX_BATCH_WRITE_ITEMS = 25
+# Bulk update workers and rate when BULK_UPDATE_CONCURRENCY / BULK_UPDATE_RATE_LIMIT are not set
+DEFAULT_BULK_UPDATE_CONCURRENCY = 8
+DEFAULT_BULK_UPDATE_RATE_LIMIT = 100
+
+# TransactWriteItems cancellation codes and the reasons reported to callers
+_CANCELLATION_REASONS = {
+    'ConditionalCheckFailed': 'not_found',
+    'TransactionConflict': 'conflict',
+    'ThrottlingError': 'throttled',
+    'ProvisionedThroughputExceeded': 'throttled',
+    'ValidationError': 'invalid',
+}
+
+
+def _to_entry(item: dict) -> Entry:
+    """Convert a DynamoDB item to an Entry."""
+    return Entry(
+        id=item['id'],
+        name=item['name'],
+        value=int(item['value']),  # Convert Decimal back to int
+        created_at=item.get('created_at'),
+        updated_at=item.get('updated_at')
+    )
+
+
+def _value_condition(min_value: Optional[int], max_value: Optional[int]):
+    """Build the filter for an inclusive value range (None if unbounded)."""
+    if min_value is not None and max_value is not None:
+        return Attr('value').between(min_value, max_value)
+    if min_value is not None:
+        return Attr('value').gte(min_value)
+    if max_value is not None:
+        return Attr('value').lte(max_value)
+    return None
+
+
+def _encode_token(state: dict) -> str:
+    """Encode scan or bulk update progress as an opaque continuation token."""
+    return base64.urlsafe_b64encode(json.dumps(state).encode('utf-8')).decode('ascii')
+
+
+def _decode_token(token: str, where: list) -> dict:
+    """Decode a continuation token, checking it was issued for the same predicate."""
+    try:
+        state = json.loads(base64.urlsafe_b64decode(token.encode('ascii')))
+        keys, done = state['keys'], state['done']
+    except (binascii.Error, UnicodeError, ValueError, TypeError, KeyError):
+        raise ValueError("Invalid continuation token")
+    if state.get('where') != where or len(keys) != len(done) or not keys:
+        raise ValueError("Continuation token does not match this request")
+    return state
+
+
+def _cancellation_reason(code: Optional[str]) -> Optional[str]:
+    """Map a cancellation code to a reason (None for items that did not fail)."""
+    if not code or code == 'None':
+        return None
+    return _CANCELLATION_REASONS.get(code, code)
 
 
 class Repository:
     """Data access layer for Entry model using DynamoDB."""
     
-    def __init__(self):
-        """Initialize repository with DynamoDB table."""
-        self.table = DynamoDBConnection.get_table()
+    def __init__(self, scan_segments: Optional[int] = None, ttl_seconds: Optional[int] = None,
+                 journal: Optional[WriteJournal] = None):
+        """
+        Initialize repository with DynamoDB table.
+        
+        Args:
+            scan_segments: Segments scanned in parallel by full-table reads
+                (defaults to DYNAMODB_SCAN_SEGMENTS, or DEFAULT_SCAN_SEGMENTS)
+            ttl_seconds: Lifetime of new entries before DynamoDB TTL expires
+                them (defaults to ENTRY_TTL_SECONDS; 0 or unset never expires)
+            journal: Journal for throttled creates and updates (defaults to
+                the container's journal when WRITE_JOURNAL_ENABLED is set)
+        """
+        # Fail fast if the connection is not configured
+        DynamoDBConnection.get_table()
+        if scan_segments is None:
+            scan_segments = int(os.environ.get('DYNAMODB_SCAN_SEGMENTS', DEFAULT_SCAN_SEGMENTS))
+        if scan_segments < 1:
+            raise ValueError("scan_segments must be positive")
+        self.scan_segments = scan_segments
+        if ttl_seconds is None:
+            ttl_seconds = int(os.environ.get('ENTRY_TTL_SECONDS') or 0)
+        self.ttl_seconds = ttl_seconds
+        self.journal = journal if journal is not None else get_write_journal()
     
-    def create(self, entry: Entry) -> Entry:
+    @property
+    def table(self):
+        """DynamoDB table for the calling thread (safe to share the repository across threads)."""
+        return DynamoDBConnection.get_table()
+    
+    def _to_item(self, entry: Entry) -> dict:
         """
-        Create a new entry in DynamoDB.
+        Stamp a new entry with its ID and timestamps and convert it to an item.
         
         Args:
-            entry: Entry object to create
+            entry: Entry object to create (updated in place)
             
         Returns:
-            Created Entry object with generated ID and timestamps
+            DynamoDB item for the entry
         """
         # Generate ID if not provided
         if not entry.id:
@@ -44,14 +156,86 @@ class Repository:
             'name': entry.name,
             'value': Decimal(str(entry.value)),  # DynamoDB requires Decimal for numbers
             'created_at': entry.created_at,
-            'updated_at': entry.updated_at
+            'updated_at': entry.updated_at,
+            'updated_day': entry.updated_at[:10]
         }
+        if self.ttl_seconds > 0:
+            # DynamoDB TTL deletes the item some time after this epoch second
+            created = datetime.fromisoformat(entry.created_at).timestamp()
+            item[TTL_ATTRIBUTE] = int(created) + self.ttl_seconds
+        return item
+    
+    def create(self, entry: Entry) -> Entry:
+        """
+        Create a new entry in DynamoDB.
+        
+        Args:
+            entry: Entry object to create
+            
+        Returns:
+            Created Entry object with generated ID and timestamps
+            
+        Raises:
+            WriteDeferredError: If the put was throttled and journaled
+        """
+        item = self._to_item(entry)
+        if self.journal is not None and self.journal.pending(entry.id):
+            self._defer({'op': 'put', 'item': item}, entry.to_dict())
         
-        # Put item in DynamoDB
-        self.table.put_item(Item=item)
+        try:
+            # Put item in DynamoDB
+            self.table.put_item(Item=item)
+        except ThrottledError:
+            if self.journal is None:
+                raise
+            self._defer({'op': 'put', 'item': item}, entry.to_dict())
         
         return entry
     
+    def create_many(self, entries: Iterable[Entry], deadline: Optional[Deadline] = None) -> List[Entry]:
+        """
+        Create many entries with BatchWriteItem (25 items per request).
+        
+        Unprocessed items are resent until DynamoDB accepts them. If a
+        request is throttled after earlier ones were written, the batch
+        stops there and only the entries written are returned, so callers
+        never resend entries that already exist under a generated ID.
+        
+        Args:
+            entries: Entry objects to create
+            deadline: Stop between requests once it has passed (optional);
+                the entries not returned were not written
+            
+        Returns:
+            Created Entry objects with generated IDs and timestamps, in order
+            
+        Raises:
+            ThrottledError: If the first request was throttled (nothing was written)
+        """
+        table = self.table
+        # The resource's client serializes plain Python values like the table does
+        client = table.meta.client
+        table_name = DynamoDBConnection.get_table_name()
+        entries = iter(entries)
+        created = []
+        while deadline is None or not deadline.expired():
+            chunk = list(islice(entries, MAX_BATCH_WRITE_ITEMS))
+            if not chunk:
+                break
+            requests = [{'PutRequest': {'Item': self._to_item(entry)}} for entry in chunk]
+            try:
+                while requests:
+                    response = client.batch_write_item(RequestItems={table_name: requests})
+                    requests = response.get('UnprocessedItems', {}).get(table_name, [])
+            except ThrottledError:
+                unwritten = {request['PutRequest']['Item']['id'] for request in requests}
+                created.extend(entry for entry in chunk if entry.id not in unwritten)
+                if not created:
+                    raise
+                break
+            created.extend(chunk)
+        return created
+    
     def get_by_id(self, entry_id: str) -> Optional[Entry]:
         """
         Get an entry by ID.
@@ -60,21 +244,69 @@ class Repository:
             entry_id: ID of the entry to retrieve
             
         Returns:
-            Entry object if found, None otherwise
+            Entry object if found, None otherwise; an entry with journaled
+            writes is returned as they will leave it
         """
+        operation = self.journal.collapsed(entry_id) if self.journal is not None else None
+        if operation is not None and operation['op'] == 'put':
+            return _to_entry(operation['item'])
+        if operation is not None and operation['op'] == 'delete':
+            return None
+        
         response = self.table.get_item(Key={'id': entry_id})
         
         if 'Item' not in response:
             return None
         
-        item = response['Item']
-        return Entry(
-            id=item['id'],
-            name=item['name'],
-            value=int(item['value']),  # Convert Decimal back to int
-            created_at=item.get('created_at'),
-            updated_at=item.get('updated_at')
-        )
+        entry = _to_entry(response['Item'])
+        if operation is not None:
+            # A journaled update to a stored entry
+            for field in ('name', 'value', 'updated_at'):
+                if operation.get(field) is not None:
+                    setattr(entry, field, operation[field])
+        return entry
+    
+    def iter_all(self, continuation_token: Optional[str] = None,
+                 deadline: Optional[Deadline] = None) -> EntryStream:
+        """
+        Iterate over all entries one scan page at a time.
+        
+        Only the current page is held in memory, so callers can stream
+        entries into a response without materializing the whole table.
+        
+        Args:
+            continuation_token: Token from a stream that stopped early
+            deadline: Stop before reading another page once it has passed
+                (optional); the stream's token then continues the scan
+            
+        Returns:
+            EntryStream of Entry objects in scan order
+            
+        Raises:
+            ValueError: If the continuation token is invalid
+        """
+        scan_kwargs = {}
+        if continuation_token is not None:
+            scan_kwargs['ExclusiveStartKey'] = _decode_token(continuation_token, [])['keys'][0]
+        
+        def read(stream: EntryStream) -> Iterator[Entry]:
+            table = self.table
+            first = True
+            while True:
+                if not first and deadline is not None and deadline.expired():
+                    stream.continuation_token = _encode_token(
+                        {'where': [], 'keys': [scan_kwargs['ExclusiveStartKey']], 'done': [False]}
+                    )
+                    return
+                first = False
+                response = table.scan(**scan_kwargs)
+                for item in response.get('Items', []):
+                    yield _to_entry(item)
+                if 'LastEvaluatedKey' not in response:
+                    return
+                scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+        
+        return EntryStream(read)
     
     def get_all(self) -> List[Entry]:
         """
@@ -83,72 +315,647 @@ class Repository:
         Returns:
             List of all Entry objects
         """
-        response = self.table.scan()
-        items = response.get('Items', [])
+        return list(self.iter_all())
+    
+    def parallel_scan(self, on_page: Callable[[dict], T], **scan_kwargs) -> List[T]:
+        """
+        Scan the whole table with one worker thread per segment.
         
-        return [
-            Entry(
-                id=item['id'],
-                name=item['name'],
-                value=int(item['value']),
-                created_at=item.get('created_at'),
-                updated_at=item.get('updated_at')
-            )
-            for item in items
-        ]
+        Args:
+            on_page: Called with every scan response page, from the worker
+                thread that read it; its results are returned
+            **scan_kwargs: Extra scan arguments (Select, FilterExpression, ...)
+            
+        Returns:
+            The on_page results of every page, grouped by segment
+        """
+        segments = self.scan_segments
+        if segments == 1:
+            return self._scan_segment(on_page, scan_kwargs)
+        
+        with ThreadPoolExecutor(max_workers=segments) as executor:
+            futures = [
+                executor.submit(self._scan_segment, on_page,
+                                dict(scan_kwargs, Segment=segment, TotalSegments=segments))
+                for segment in range(segments)
+            ]
+            return [result for future in futures for result in future.result()]
     
-    def update(self, entry_id: str, name: Optional[str] = None, value: Optional[int] = None) -> Optional[Entry]:
+    def _scan_segment(self, on_page: Callable[[dict], T], scan_kwargs: dict) -> List[T]:
+        """Read every page of one scan segment."""
+        table = self.table
+        results = []
+        while True:
+            response = table.scan(**scan_kwargs)
+            results.append(on_page(response))
+            if 'LastEvaluatedKey' not in response:
+                return results
+            scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+    
+    def count(self, name: Optional[str] = None) -> int:
         """
-        Update an entry.
+        Count entries without transferring them.
         
         Args:
-            entry_id: ID of the entry to update
-            name: New name (optional)
-            value: New value (optional)
+            name: Only count entries with this exact name (optional, served by NameIndex)
             
         Returns:
-            Updated Entry object if found, None otherwise
+            Number of matching entries
+        """
+        if name is None:
+            return sum(self.parallel_scan(lambda response: response['Count'], Select='COUNT'))
+        
+        query_kwargs = {
+            'IndexName': NAME_INDEX,
+            'KeyConditionExpression': Key('name').eq(name),
+            'Select': 'COUNT'
+        }
+        total = 0
+        while True:
+            response = self.table.query(**query_kwargs)
+            total += response['Count']
+            if 'LastEvaluatedKey' not in response:
+                return total
+            query_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+    
+    def get_value_columns(self) -> ValueColumns:
+        """
+        Read the name and value of every entry into columnar buffers.
+        
+        Runs a parallel scan projected to the two attributes; each worker
+        packs its pages into arrays as they arrive, so only one raw page per
+        segment is held at a time.
+        
+        Returns:
+            ValueColumns with one row per entry
+        """
+        def pack(response: dict) -> ValueColumns:
+            columns = ValueColumns()
+            columns.add_all((item['name'], int(item['value'])) for item in response.get('Items', []))
+            return columns
+        
+        result = ValueColumns()
+        for columns in self.parallel_scan(
+            pack,
+            ProjectionExpression='#n, #v',
+            ExpressionAttributeNames={'#n': 'name', '#v': 'value'}
+        ):
+            result.extend(columns)
+        return result
+    
+    def scan_ids(self, on_ids: Callable[[List[str]], T]) -> List[T]:
+        """
+        Read the ID of every entry with a key-only parallel scan.
+        
+        Args:
+            on_ids: Called with the IDs of every scan page, from the worker
+                thread that read it; its results are returned
+            
+        Returns:
+            The on_ids results of every page
+        """
+        return self.parallel_scan(
+            lambda response: on_ids([item['id'] for item in response.get('Items', [])]),
+            ProjectionExpression='#id',
+            ExpressionAttributeNames={'#id': 'id'}
+        )
+    
+    def purge(self, created_before: Optional[str] = None, rate_limit: Optional[float] = None,
+              continuation_token: Optional[str] = None, deadline: Optional[Deadline] = None) -> PurgeResult:
+        """
+        Delete expired entries that TTL has not removed yet.
+        
+        Runs a key-only parallel scan and deletes each page of matches with
+        BatchWriteItem, sharing one rate limit across all segments.
+        
+        Args:
+            created_before: Also delete entries created before this UTC ISO
+                8601 timestamp (optional)
+            rate_limit: Maximum deletes per second (defaults to
+                PURGE_RATE_LIMIT, or DEFAULT_PURGE_RATE_LIMIT; 0 disables it)
+            continuation_token: Token from a purge that stopped at its deadline
+            deadline: Stop deleting once it has passed (optional)
+            
+        Returns:
+            PurgeResult with the number of entries deleted and, if it stopped
+            at the deadline, the token to continue from
+            
+        Raises:
+            ValueError: If the continuation token is invalid
+        """
+        if rate_limit is None:
+            rate_limit = float(os.environ.get('PURGE_RATE_LIMIT', DEFAULT_PURGE_RATE_LIMIT))
+        limiter = TokenBucket(rate_limit) if rate_limit > 0 else None
+        
+        condition = Attr(TTL_ATTRIBUTE).lte(int(time.time()))
+        if created_before is not None:
+            condition = condition | Attr('created_at').lt(created_before)
+        
+        # The cutoff moves with the clock, so only the action is checked
+        where = ['purge']
+        if continuation_token is None:
+            segments = self.scan_segments
+            state = {'where': where, 'keys': [None] * segments, 'done': [False] * segments}
+        else:
+            # Resume with the segment count the purge started with
+            state = _decode_token(continuation_token, where)
+            segments = len(state['keys'])
+        
+        result = PurgeResult()
+        lock = threading.Lock()
+        
+        def expired() -> bool:
+            return deadline is not None and deadline.expired()
+        
+        def run_segment(index: int):
+            table = self.table
+            scan_kwargs = {
+                'FilterExpression': condition,
+                'ProjectionExpression': '#id',
+                'ExpressionAttributeNames': {'#id': 'id'}
+            }
+            if segments > 1:
+                scan_kwargs.update(Segment=index, TotalSegments=segments)
+            
+            while not state['done'][index] and not expired():
+                if state['keys'][index] is not None:
+                    scan_kwargs['ExclusiveStartKey'] = state['keys'][index]
+                response = table.scan(**scan_kwargs)
+                keys = response.get('Items', [])
+                deleted = 0
+                with table.batch_writer() as batch:
+                    for key in keys:
+                        if limiter is not None:
+                            limiter.acquire()
+                        # Checked after the limiter, which can wait past the deadline
+                        if expired():
+                            break
+                        batch.delete_item(Key={'id': key['id']})
+                        deleted += 1
+                with lock:
+                    result.deleted += deleted
+                
+                if deleted < len(keys):
+                    # Deleted entries no longer match, so the page is read again from its start
+                    return
+                if 'LastEvaluatedKey' in response:
+                    state['keys'][index] = response['LastEvaluatedKey']
+                else:
+                    state['done'][index] = True
+        
+        if segments == 1:
+            run_segment(0)
+        else:
+            with ThreadPoolExecutor(max_workers=segments) as executor:
+                for future in [executor.submit(run_segment, index) for index in range(segments)]:
+                    future.result()
+        
+        if not all(state['done']):
+            result.continuation_token = _encode_token(state)
+        return result
+    
+    def get_by_name(self, name: str) -> List[Entry]:
+        """
+        Get all entries with a given name.
+        
+        Args:
+            name: Exact name to match
+            
+        Returns:
+            List of matching Entry objects
         """
-        # Build update expression
-        update_expr = "SET updated_at = :updated_at"
+        query_kwargs = {
+            'IndexName': NAME_INDEX,
+            'KeyConditionExpression': Key('name').eq(name)
+        }
+        entries = []
+        while True:
+            response = self.table.query(**query_kwargs)
+            entries.extend(_to_entry(item) for item in response.get('Items', []))
+            if 'LastEvaluatedKey' not in response:
+                return entries
+            query_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+    
+    def get_by_value_range(self, min_value: Optional[int] = None,
+                           max_value: Optional[int] = None) -> List[Entry]:
+        """
+        Get entries whose value lies within an inclusive range, ordered by value.
+        
+        There is no index on value, so this is a filtered scan.
+        
+        Args:
+            min_value: Lower bound (optional)
+            max_value: Upper bound (optional)
+            
+        Returns:
+            List of matching Entry objects
+        """
+        scan_kwargs = {}
+        condition = _value_condition(min_value, max_value)
+        if condition is not None:
+            scan_kwargs['FilterExpression'] = condition
+        
+        entries = []
+        while True:
+            response = self.table.scan(**scan_kwargs)
+            entries.extend(_to_entry(item) for item in response.get('Items', []))
+            if 'LastEvaluatedKey' not in response:
+                break
+            scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+        
+        return sorted(entries, key=lambda entry: (entry.value, entry.id))
+    
+    def get_changed_since(self, since: str, limit: Optional[int] = None) -> ChangeSet:
+        """
+        Get entries modified after a timestamp, oldest change first.
+        
+        Queries the UpdatedAtIndex one day bucket at a time, from the day
+        of ``since`` up to today, so the cost follows the number of changes
+        rather than the table size. Entries written before the index
+        existed have no ``updated_day`` and are not returned.
+        
+        Args:
+            since: Normalized UTC ISO 8601 timestamp (exclusive)
+            limit: Maximum number of entries to return (optional). Entries
+                sharing the updated_at of the last returned entry are always
+                included so the cursor never skips a change.
+            
+        Returns:
+            ChangeSet with the entries, the high-water-mark cursor to pass
+            as ``since`` on the next call, and whether more changes remain;
+            with no changes, the cursor moves up to the query time, less
+            DELTA_OVERLAP
+        """
+        entries: List[Entry] = []
+        cursor = since
+        queried_at = datetime.now(timezone.utc)
+        day = date.fromisoformat(since[:10])
+        today = queried_at.date()
+        
+        while day <= today:
+            query_kwargs = {
+                'IndexName': UPDATED_AT_INDEX,
+                'KeyConditionExpression': (
+                    Key('updated_day').eq(day.isoformat()) & Key('updated_at').gt(since)
+                )
+            }
+            if limit is not None:
+                query_kwargs['Limit'] = limit
+            
+            while True:
+                response = self.table.query(**query_kwargs)
+                for item in response.get('Items', []):
+                    if limit is not None and len(entries) >= limit and item['updated_at'] != cursor:
+                        return ChangeSet(entries=entries, cursor=cursor, has_more=True)
+                    entries.append(_to_entry(item))
+                    cursor = item['updated_at']
+                
+                if 'LastEvaluatedKey' not in response:
+                    break
+                query_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+            
+            day += timedelta(days=1)
+        
+        if not entries:
+            return ChangeSet.empty(since, queried_at)
+        return ChangeSet(entries=entries, cursor=cursor, has_more=False)
+    
+    @staticmethod
+    def _update_params(name: Optional[str], value: Optional[int], now: str) -> dict:
+        """Build the conditional update expression shared by update and transact_update."""
+        update_expr = "SET updated_at = :updated_at, updated_day = :updated_day"
         expr_attr_values = {
-            ':updated_at': datetime.now(timezone.utc).isoformat()
+            ':updated_at': now,
+            ':updated_day': now[:10]
         }
+        # Attribute name aliases (reserved keywords)
+        expr_attr_names = {'#id': 'id'}
         
         if name is not None:
             update_expr += ", #n = :name"
             expr_attr_values[':name'] = name
+            expr_attr_names['#n'] = 'name'
         
         if value is not None:
             update_expr += ", #v = :value"
             expr_attr_values[':value'] = Decimal(str(value))
-        
-        # Attribute name aliases (reserved keywords)
-        expr_attr_names = {}
-        if name is not None:
-            expr_attr_names['#n'] = 'name'
-        if value is not None:
             expr_attr_names['#v'] = 'value'
         
+        return {
+            'UpdateExpression': update_expr,
+            # Without the condition an update would create a partial item
+            'ConditionExpression': 'attribute_exists(#id)',
+            'ExpressionAttributeValues': expr_attr_values,
+            'ExpressionAttributeNames': expr_attr_names
+        }
+    
+    def update(self, entry_id: str, name: Optional[str] = None, value: Optional[int] = None) -> Optional[Entry]:
+        """
+        Update an entry.
+        
+        Args:
+            entry_id: ID of the entry to update
+            name: New name (optional)
+            value: New value (optional)
+            
+        Returns:
+            Updated Entry object if found, None otherwise
+            
+        Raises:
+            WriteDeferredError: If the update was throttled and journaled;
+                whether the entry exists is only checked when it is applied
+        """
+        now = datetime.now(timezone.utc).isoformat()
+        operation = {'op': 'update', 'id': entry_id, 'name': name, 'value': value, 'updated_at': now}
+        deferred = {key: val for key, val in operation.items() if key != 'op' and val is not None}
+        if self.journal is not None and self.journal.pending(entry_id):
+            # Apply after the journaled writes to the same entry
+            self._defer(operation, deferred)
+        
+        params = self._update_params(name, value, now)
+        
+        table = self.table
         try:
-            response = self.table.update_item(
-                Key={'id': entry_id},
-                UpdateExpression=update_expr,
-                ExpressionAttributeValues=expr_attr_values,
-                ExpressionAttributeNames=expr_attr_names if expr_attr_names else None,
-                ReturnValues='ALL_NEW'
-            )
+            response = table.update_item(Key={'id': entry_id}, ReturnValues='ALL_NEW', **params)
             
-            item = response['Attributes']
-            return Entry(
-                id=item['id'],
-                name=item['name'],
-                value=int(item['value']),
-                created_at=item.get('created_at'),
-                updated_at=item.get('updated_at')
-            )
-        except self.table.meta.client.exceptions.ResourceNotFoundException:
+            return _to_entry(response['Attributes'])
+        except (table.meta.client.exceptions.ConditionalCheckFailedException,
+                table.meta.client.exceptions.ResourceNotFoundException):
             return None
+        except ThrottledError:
+            if self.journal is None:
+                raise
+            self._defer(operation, deferred)
+    
+    def _defer(self, operation: dict, data: dict):
+        """Journal a write and report it as deferred."""
+        self.journal.append(operation)
+        raise WriteDeferredError(data['id'], data)
+    
+    def flush_journal(self, deadline: Optional[Deadline] = None) -> int:
+        """
+        Apply writes deferred by throttling, oldest first.
+        
+        Puts, with any later updates folded in, and deletes are sent with
+        BatchWriteItem 25 at a time. Updates to entries that were not
+        created through the journal are sent with conditional UpdateItem,
+        as BatchWriteItem can only replace whole items; updates to entries
+        deleted meanwhile are dropped. The flush stops at the first
+        throttled request and keeps the rest for a later invocation.
+        
+        Args:
+            deadline: Stop between requests once it has passed (optional);
+                the rest stays journaled
+            
+        Returns:
+            Number of journaled operations applied
+        """
+        if self.journal is None:
+            return 0
+        return self.journal.flush(lambda operations: self._apply_journaled(operations, deadline))
+    
+    def _apply_journaled(self, operations: List[dict], deadline: Optional[Deadline] = None) -> int:
+        """Write collapsed journal operations in order; returns how many were applied."""
+        table = self.table
+        # The resource's client serializes plain Python values like the table does
+        client = table.meta.client
+        table_name = DynamoDBConnection.get_table_name()
+        applied = 0
+        try:
+            while applied < len(operations) and (deadline is None or not deadline.expired()):
+                operation = operations[applied]
+                if operation['op'] == 'update':
+                    try:
+                        table.update_item(
+                            Key={'id': operation['id']},
+                            **self._update_params(operation.get('name'), operation.get('value'),
+                                                  operation['updated_at'])
+                        )
+                    except client.exceptions.ConditionalCheckFailedException:
+                        pass  # The entry no longer exists
+                    applied += 1
+                    continue
+                
+                end = applied
+                while (end < len(operations) and operations[end]['op'] != 'update'
+                       and end - applied < MAX_BATCH_WRITE_ITEMS):
+                    end += 1
+                response = client.batch_write_item(RequestItems={table_name: [
+                    {'PutRequest': {'Item': op['item']}} if op['op'] == 'put'
+                    else {'DeleteRequest': {'Key': {'id': op['id']}}}
+                    for op in operations[applied:end]
+                ]})
+                if response.get('UnprocessedItems', {}).get(table_name):
+                    # Throttled in part; puts and deletes are idempotent, so the chunk is resent later
+                    break
+                applied = end
+        except ThrottledError:
+            pass  # Keep the rest for a later invocation
+        return applied
+    
+    def transact_update(self, updates: List[dict]) -> List[dict]:
+        """
+        Update several entries atomically with a single TransactWriteItems call.
+        
+        Args:
+            updates: Dicts with the entry 'id' and optional 'name'/'value'
+                (at most MAX_TRANSACTION_ITEMS, each id at most once)
+            
+        Returns:
+            Per-entry results with the 'id' and the new 'updated_at'
+            
+        Raises:
+            TransactionCancelledError: If any entry is missing or the
+                transaction conflicts; no entry is updated
+        """
+        now = datetime.now(timezone.utc).isoformat()
+        items = []
+        for update in updates:
+            items.append({'Update': {
+                'TableName': DynamoDBConnection.get_table_name(),
+                'Key': {'id': update['id']},
+                **self._update_params(update.get('name'), update.get('value'), now)
+            }})
+        
+        # The resource's client serializes plain Python values like the table does
+        client = self.table.meta.client
+        try:
+            client.transact_write_items(TransactItems=items)
+        except client.exceptions.TransactionCanceledException as e:
+            reasons = e.response.get('CancellationReasons') or [{}] * len(updates)
+            raise TransactionCancelledError(
+                [update['id'] for update in updates],
+                [_cancellation_reason(reason.get('Code')) for reason in reasons]
+            )
+        
+        return [{'id': update['id'], 'updated_at': now} for update in updates]
+    
+    def bulk_update(self, changes: dict, name: Optional[str] = None,
+                    min_value: Optional[int] = None, max_value: Optional[int] = None,
+                    limit: Optional[int] = None, continuation_token: Optional[str] = None,
+                    concurrency: Optional[int] = None, rate_limit: Optional[float] = None,
+                    deadline: Optional[Deadline] = None) -> BulkUpdateResult:
+        """
+        Update every entry matching a predicate.
+        
+        Matches are read key-only: through a NameIndex query when a name is
+        given, otherwise through a filtered parallel scan. Each page of
+        matches is updated by a pool of conditional UpdateItem calls that
+        re-check the predicate, so entries that stopped matching (or are
+        still listed by the eventually consistent index) are left alone.
+        
+        Args:
+            changes: Dict with the new 'name' and/or 'value'
+            name: Match entries with this exact name (optional)
+            min_value: Match entries with at least this value (optional)
+            max_value: Match entries with at most this value (optional)
+            limit: Stop after this many matches (optional)
+            continuation_token: Token from a previous run with the same predicate
+            concurrency: UpdateItem calls in flight (defaults to
+                BULK_UPDATE_CONCURRENCY, or DEFAULT_BULK_UPDATE_CONCURRENCY)
+            rate_limit: Maximum updates per second across all workers (defaults
+                to BULK_UPDATE_RATE_LIMIT, or DEFAULT_BULK_UPDATE_RATE_LIMIT; 0 disables it)
+            deadline: Stop starting updates once it has passed (optional)
+            
+        Returns:
+            BulkUpdateResult with the counts of this run and, if it stopped at
+            the limit or the deadline, the token to continue from
+            
+        Raises:
+            ValueError: If the continuation token is invalid or was issued
+                for another predicate
+        """
+        if concurrency is None:
+            concurrency = int(os.environ.get('BULK_UPDATE_CONCURRENCY') or DEFAULT_BULK_UPDATE_CONCURRENCY)
+        if rate_limit is None:
+            rate_limit = float(os.environ.get('BULK_UPDATE_RATE_LIMIT', DEFAULT_BULK_UPDATE_RATE_LIMIT))
+        limiter = TokenBucket(rate_limit) if rate_limit > 0 else None
+        
+        where = [name, min_value, max_value]
+        if name is not None:
+            streams = 1
+            key_attributes = ('id', 'name')
+            read_kwargs = {
+                'IndexName': NAME_INDEX,
+                'KeyConditionExpression': Key('name').eq(name),
+                'ProjectionExpression': '#id, #n',
+                'ExpressionAttributeNames': {'#id': 'id', '#n': 'name'}
+            }
+        else:
+            streams = self.scan_segments
+            key_attributes = ('id',)
+            read_kwargs = {
+                'ProjectionExpression': '#id',
+                'ExpressionAttributeNames': {'#id': 'id'}
+            }
+        value_filter = _value_condition(min_value, max_value)
+        if value_filter is not None:
+            read_kwargs['FilterExpression'] = value_filter
+        
+        if continuation_token is None:
+            state = {'where': where, 'keys': [None] * streams, 'done': [False] * streams}
+        else:
+            # Resume with the segment count the run started with
+            state = _decode_token(continuation_token, where)
+            streams = len(state['keys'])
+        
+        params = self._update_params(changes.get('name'), changes.get('value'),
+                                     datetime.now(timezone.utc).isoformat())
+        conditions = [params['ConditionExpression']]
+        if name is not None:
+            conditions.append('#n = :where_name')
+            params['ExpressionAttributeNames']['#n'] = 'name'
+            params['ExpressionAttributeValues'][':where_name'] = name
+        if min_value is not None:
+            conditions.append('#v >= :where_min')
+            params['ExpressionAttributeNames']['#v'] = 'value'
+            params['ExpressionAttributeValues'][':where_min'] = Decimal(str(min_value))
+        if max_value is not None:
+            conditions.append('#v <= :where_max')
+            params['ExpressionAttributeNames']['#v'] = 'value'
+            params['ExpressionAttributeValues'][':where_max'] = Decimal(str(max_value))
+        params['ConditionExpression'] = ' AND '.join(conditions)
+        
+        result = BulkUpdateResult()
+        lock = threading.Lock()
+        remaining = [limit]
+        
+        def take(matches: int) -> int:
+            """Reserve up to this many matches from the limit."""
+            with lock:
+                if remaining[0] is None:
+                    return matches
+                taken = min(matches, remaining[0])
+                remaining[0] -= taken
+                return taken
+        
+        def give_back(matches: int):
+            """Return reserved matches that were not handled to the limit."""
+            with lock:
+                if remaining[0] is not None:
+                    remaining[0] += matches
+        
+        def expired() -> bool:
+            return deadline is not None and deadline.expired()
+        
+        def update_one(entry_id: str) -> Optional[bool]:
+            if limiter is not None:
+                limiter.acquire()
+            # Checked after the wait for a token, which can outlast the deadline
+            if expired():
+                return None
+            table = self.table
+            try:
+                table.update_item(Key={'id': entry_id}, **params)
+                return True
+            except table.meta.client.exceptions.ConditionalCheckFailedException:
+                return False
+        
+        def run_stream(index: int, updaters: ThreadPoolExecutor):
+            table = self.table
+            read = table.query if name is not None else table.scan
+            kwargs = dict(read_kwargs)
+            if streams > 1:
+                kwargs.update(Segment=index, TotalSegments=streams)
+            
+            while not state['done'][index] and remaining[0] != 0 and not expired():
+                if state['keys'][index] is not None:
+                    kwargs['ExclusiveStartKey'] = state['keys'][index]
+                response = read(**kwargs)
+                items = response.get('Items', [])
+                reserved = take(len(items))
+                outcomes = list(updaters.map(update_one, [item['id'] for item in items[:reserved]]))
+                # Workers can skip a match while a later one still runs, so the
+                # page is handled only up to the first match skipped; matches
+                # updated after it run again (with the same changes) on resume
+                handled = outcomes.index(None) if None in outcomes else len(outcomes)
+                give_back(reserved - handled)
+                with lock:
+                    result.matched += handled
+                    result.updated += sum(1 for outcome in outcomes[:handled] if outcome)
+                
+                if handled < len(items):
+                    # Stopped mid-page: resume after the last match handled
+                    if handled:
+                        state['keys'][index] = {attr: items[handled - 1][attr] for attr in key_attributes}
+                    return
+                if 'LastEvaluatedKey' in response:
+                    state['keys'][index] = response['LastEvaluatedKey']
+                else:
+                    state['done'][index] = True
+        
+        with ThreadPoolExecutor(max_workers=concurrency) as updaters:
+            if streams == 1:
+                run_stream(0, updaters)
+            else:
+                with ThreadPoolExecutor(max_workers=streams) as readers:
+                    futures = [readers.submit(run_stream, index, updaters) for index in range(streams)]
+                    for future in futures:
+                        future.result()
+        
+        if not all(state['done']):
+            result.continuation_token = _encode_token(state)
+        return result
     
     def delete(self, entry_id: str) -> bool:
         """
@@ -159,7 +966,15 @@ class Repository:
             
         Returns:
             True if deleted, False if not found
+            
+        Raises:
+            WriteDeferredError: If the entry has journaled writes; the delete
+                is journaled after them
         """
+        if self.journal is not None and self.journal.pending(entry_id):
+            # Deleting now would let the flush write the entry back
+            self._defer({'op': 'delete', 'id': entry_id}, {'id': entry_id})
+        
         try:
             response = self.table.delete_item(
                 Key={'id': entry_id},
@@ -167,5 +982,6 @@ class Repository:
             )
             # Check if Attributes exists and is not empty
             return 'Attributes' in response and bool(response['Attributes'])
-        except Exception:
+        except ClientError:
+            # ThrottledError is not a ClientError: it reaches the handler as a 429
             return False
@@ -0,0 +1,470 @@
+"""
+Per-container snapshot of the table for serving list locally.
+
+The snapshot is kept in process memory and persisted under /tmp in a
+compact binary format, so a runtime restart in the same container (after a
+timeout or a crash) starts warm. Reads within the staleness bound of the
+last refresh are served from the snapshot; after that, a delta refresh
+fetches only the entries whose updated_at is past the snapshot's
+high-water mark, through get_changed_since.
+
+Deletes made by other containers leave no updated_at behind, so the
+snapshot is rebuilt from a full scan every full-refresh interval. A cold or
+full refresh is not run up front: the read streams from the repository
+under its deadline like an uncached one, and the entries streamed past are
+kept. A scan stopped by the deadline is resumed by the continuation reads
+of the same container, and the snapshot is installed once one of them
+completes it.
+"""
+import logging
+import os
+import struct
+import threading
+import time
+from dataclasses import replace
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from src.database.database import Deadline
+from src.model.models import DELTA_OVERLAP, BulkUpdateResult, Entry, EntryStream, PurgeResult
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SNAPSHOT_PATH = '/tmp/entries.snapshot'
+DEFAULT_FULL_REFRESH_SECONDS = 900
+
+_MAGIC = b'ESNP'
+_VERSION = 1
+# magic, version, time of the last full refresh, entry count, high-water mark length
+_HEADER = struct.Struct('<4sBdIH')
+# value, then the UTF-8 lengths of id, name, created_at and updated_at
+_RECORD = struct.Struct('<qHIHH')
+
+# Caches live as long as the container, keyed by file path
+_caches: Dict[str, 'SnapshotCache'] = {}
+_caches_lock = threading.Lock()
+
+
+def encode_snapshot(entries: Iterable[Entry], high_water_mark: str, full_refresh_at: float) -> bytes:
+    """
+    Encode entries in the snapshot file format.
+
+    Args:
+        entries: Entries to store
+        high_water_mark: Normalized UTC ISO 8601 timestamp the snapshot is current to
+        full_refresh_at: Epoch seconds of the last full refresh
+
+    Returns:
+        The encoded snapshot
+    """
+    records = []
+    count = 0
+    for entry in entries:
+        fields = [
+            (entry.id or '').encode('utf-8'),
+            entry.name.encode('utf-8'),
+            (entry.created_at or '').encode('utf-8'),
+            (entry.updated_at or '').encode('utf-8')
+        ]
+        records.append(_RECORD.pack(entry.value, *(len(field) for field in fields)))
+        records.extend(fields)
+        count += 1
+
+    mark = high_water_mark.encode('utf-8')
+    header = _HEADER.pack(_MAGIC, _VERSION, full_refresh_at, count, len(mark))
+    return b''.join([header, mark, *records])
+
+
+def decode_snapshot(data: bytes):
+    """
+    Decode a snapshot written by encode_snapshot.
+
+    Args:
+        data: The encoded snapshot
+
+    Returns:
+        Tuple of the entries, the high-water mark and the time of the last full refresh
+
+    Raises:
+        ValueError: If the data is not a snapshot of this version or is truncated
+    """
+    try:
+        magic, version, full_refresh_at, count, mark_length = _HEADER.unpack_from(data)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError("Not a snapshot of this version")
+        offset = _HEADER.size
+        high_water_mark = data[offset:offset + mark_length].decode('utf-8')
+        offset += mark_length
+
+        entries = []
+        for _ in range(count):
+            value, *lengths = _RECORD.unpack_from(data, offset)
+            offset += _RECORD.size
+            fields = []
+            for length in lengths:
+                fields.append(data[offset:offset + length].decode('utf-8'))
+                offset += length
+            entry_id, name, created_at, updated_at = fields
+            entries.append(Entry(
+                id=entry_id or None,
+                name=name,
+                value=value,
+                created_at=created_at or None,
+                updated_at=updated_at or None
+            ))
+    except (struct.error, UnicodeDecodeError) as e:
+        raise ValueError(f"Corrupt snapshot: {e}")
+
+    if offset != len(data):
+        raise ValueError("Corrupt snapshot: trailing data")
+    return entries, high_water_mark, full_refresh_at
+
+
+class SnapshotCache:
+    """
+    Snapshot of every entry, refreshed from a repository on demand.
+
+    Entries are treated as immutable once stored; writes replace them.
+    """
+
+    def __init__(self, path: str = DEFAULT_SNAPSHOT_PATH, max_staleness: float = 30.0,
+                 full_refresh_interval: float = DEFAULT_FULL_REFRESH_SECONDS, clock=time.time):
+        """
+        Initialize the cache, loading the snapshot file if one exists.
+
+        Args:
+            path: Snapshot file
+            max_staleness: Seconds a refresh is trusted before the next read checks for changes
+            full_refresh_interval: Seconds between full rebuilds that pick up deletes
+            clock: Returns the current epoch time in seconds
+        """
+        self.path = path
+        self.max_staleness = max_staleness
+        self.full_refresh_interval = full_refresh_interval
+        self.clock = clock
+        self._entries: Dict[str, Entry] = {}
+        self._high_water_mark: Optional[str] = None
+        self._full_refresh_at = 0.0
+        self._checked_at = float('-inf')
+        self._lock = threading.Lock()
+        # Full scan in progress, possibly across invocations: its entries so
+        # far, when it started, and the token that continues it
+        self._rebuild: Optional[dict] = None
+        # Writes by this container while a rebuild runs, applied over its scan
+        self._rebuild_writes: Dict[str, Optional[Entry]] = {}
+        # IDs deleted by this container while a delta refresh runs
+        self._delta_discards: Optional[set] = None
+        self._load()
+
+    @property
+    def loaded(self) -> bool:
+        """Whether the snapshot holds a full copy of the table."""
+        return self._high_water_mark is not None
+
+    def entries(self, repository) -> Optional[List[Entry]]:
+        """
+        Get every entry, running a delta refresh first if the snapshot is stale.
+
+        The delta is fetched without holding the lock; reads meanwhile are
+        served from the snapshot as it is.
+
+        Args:
+            repository: Repository the snapshot is refreshed from
+
+        Returns:
+            The entries in the snapshot (shared, not to be modified), or None
+            if the snapshot is not loaded or due for a full refresh; the
+            caller then reads the repository through rebuild()
+        """
+        with self._lock:
+            now = self.clock()
+            if not self.loaded or now - self._full_refresh_at >= self.full_refresh_interval:
+                return None
+            if now - self._checked_at <= self.max_staleness or self._delta_discards is not None:
+                return list(self._entries.values())
+            since = datetime.fromisoformat(self._high_water_mark) - DELTA_OVERLAP
+            self._delta_discards = set()
+
+        try:
+            changes = repository.get_changed_since(since.isoformat())
+        except Exception:
+            with self._lock:
+                self._delta_discards = None
+            raise
+
+        with self._lock:
+            self._apply_delta(changes)
+            self._delta_discards = None
+            self._checked_at = now
+            return list(self._entries.values())
+
+    def rebuild(self, stream: EntryStream, continuation_token: Optional[str] = None) -> EntryStream:
+        """
+        Pass a full read of the repository through, keeping it as the new snapshot.
+
+        A read stopped early keeps the entries so far; the read continuing
+        it with its token adds to them, and the snapshot is replaced once a
+        read reaches the end of the table.
+
+        Args:
+            stream: EntryStream of every entry from the start of the table,
+                or from continuation_token
+            continuation_token: Token the stream continues from, if any
+
+        Returns:
+            EntryStream of the same entries and continuation token
+        """
+        with self._lock:
+            now = self.clock()
+            if continuation_token is None:
+                # Changes made while the scan runs are caught by the next delta
+                rebuild = self._rebuild = {
+                    'entries': {},
+                    'started': datetime.fromtimestamp(now, timezone.utc).isoformat(),
+                    'at': now,
+                    'token': None
+                }
+                self._rebuild_writes = {}
+            else:
+                rebuild = self._rebuild
+                if (rebuild is None or rebuild['token'] != continuation_token
+                        or now - rebuild['at'] >= self.full_refresh_interval):
+                    # Started by another container, or too old to install
+                    return stream
+
+        def read(rebuilt: EntryStream) -> Iterator[Entry]:
+            entries = rebuild['entries']
+            for entry in stream:
+                entries[entry.id] = replace(entry)
+                yield entry
+            rebuilt.continuation_token = stream.continuation_token
+            with self._lock:
+                if self._rebuild is not rebuild:
+                    return  # Replaced by a newer rebuild
+                if stream.continuation_token is not None:
+                    rebuild['token'] = stream.continuation_token
+                    return
+                self._rebuild = None
+                self._install(entries, rebuild['started'], rebuild['at'])
+
+        return EntryStream(read)
+
+    def put(self, entries: Iterable[Entry]):
+        """Store entries written by this container, without waiting for a refresh."""
+        with self._lock:
+            for entry in entries:
+                if self._rebuild is not None:
+                    self._rebuild_writes[entry.id] = replace(entry)
+                if self.loaded:
+                    self._entries[entry.id] = replace(entry)
+
+    def discard(self, entry_id: str):
+        """Drop an entry deleted by this container."""
+        with self._lock:
+            if self._rebuild is not None:
+                self._rebuild_writes[entry_id] = None
+            if self._delta_discards is not None:
+                self._delta_discards.add(entry_id)
+            self._entries.pop(entry_id, None)
+
+    def mark_stale(self):
+        """Make the next read run a delta refresh."""
+        with self._lock:
+            self._checked_at = float('-inf')
+
+    def expire(self):
+        """Make the next read rebuild the snapshot from a full scan."""
+        with self._lock:
+            self._checked_at = float('-inf')
+            self._full_refresh_at = 0.0
+            self._rebuild = None
+
+    def _install(self, entries: Dict[str, Entry], started: str, now: float):
+        """Replace the snapshot with a completed scan (lock held)."""
+        # The scan may have read an entry before this container wrote it
+        for entry_id, entry in self._rebuild_writes.items():
+            if entry is None:
+                entries.pop(entry_id, None)
+            else:
+                entries[entry_id] = entry
+        self._rebuild_writes = {}
+        self._entries = entries
+        self._high_water_mark = started
+        self._full_refresh_at = now
+        self._checked_at = self.clock()
+        self._save()
+
+    def _apply_delta(self, changes):
+        """Store entries changed since the high-water mark (lock held)."""
+        if not changes.entries:
+            return
+        for entry in changes.entries:
+            if entry.id in self._delta_discards:
+                continue
+            current = self._entries.get(entry.id)
+            # Keep this container's writes made after the query
+            if current is None or (entry.updated_at or '') >= (current.updated_at or ''):
+                self._entries[entry.id] = entry
+        self._high_water_mark = max(self._high_water_mark, changes.cursor)
+        self._save()
+
+    def _load(self):
+        try:
+            with open(self.path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return
+        except OSError as e:
+            logger.warning(f"Could not read snapshot {self.path}: {e}")
+            return
+
+        try:
+            entries, high_water_mark, full_refresh_at = decode_snapshot(data)
+        except ValueError as e:
+            logger.warning(f"Ignoring snapshot {self.path}: {e}")
+            return
+        self._entries = {entry.id: entry for entry in entries}
+        self._high_water_mark = high_water_mark
+        self._full_refresh_at = full_refresh_at
+
+    def _save(self):
+        data = encode_snapshot(self._entries.values(), self._high_water_mark, self._full_refresh_at)
+        # Write then rename, so a crash never leaves a partial snapshot
+        partial = f"{self.path}.partial"
+        try:
+            with open(partial, 'wb') as f:
+                f.write(data)
+            os.replace(partial, self.path)
+        except OSError as e:
+            # The in-memory snapshot still serves this process
+            logger.warning(f"Could not write snapshot {self.path}: {e}")
+
+
+def get_snapshot_cache() -> Optional[SnapshotCache]:
+    """
+    Get the container's snapshot cache configured by environment variables.
+
+    SNAPSHOT_MAX_STALENESS_SECONDS enables the cache when positive;
+    SNAPSHOT_FULL_REFRESH_SECONDS and SNAPSHOT_PATH tune it.
+
+    Returns:
+        The shared SnapshotCache, or None if the cache is disabled
+    """
+    max_staleness = float(os.environ.get('SNAPSHOT_MAX_STALENESS_SECONDS') or 0)
+    if max_staleness <= 0:
+        return None
+
+    path = os.environ.get('SNAPSHOT_PATH') or DEFAULT_SNAPSHOT_PATH
+    full_refresh_interval = float(
+        os.environ.get('SNAPSHOT_FULL_REFRESH_SECONDS') or DEFAULT_FULL_REFRESH_SECONDS
+    )
+    with _caches_lock:
+        cache = _caches.get(path)
+        if cache is None:
+            cache = _caches[path] = SnapshotCache(path, max_staleness, full_refresh_interval)
+        cache.max_staleness = max_staleness
+        cache.full_refresh_interval = full_refresh_interval
+        return cache
+
+
+class SnapshotRepository:
+    """
+    Repository wrapper that serves full-table reads from a SnapshotCache.
+
+    Writes go to the wrapped repository and are applied to the snapshot,
+    so this container reads its own writes. Every other method is passed
+    through unchanged.
+    """
+
+    def __init__(self, repository, cache: SnapshotCache):
+        """
+        Initialize the wrapper.
+
+        Args:
+            repository: Repository that stores the entries
+            cache: Snapshot the full-table reads are served from
+        """
+        self.repository = repository
+        self.cache = cache
+
+    def __getattr__(self, name):
+        return getattr(self.repository, name)
+
+    def iter_all(self, continuation_token: Optional[str] = None,
+                 deadline: Optional[Deadline] = None) -> EntryStream:
+        """
+        Iterate over all entries from the snapshot.
+
+        A cold or full refresh streams from the wrapped repository under
+        the deadline instead, and rebuilds the snapshot from the entries
+        read; a stream it stopped early is continued there, and the
+        continuation reads of this container complete the rebuild.
+
+        Args:
+            continuation_token: Token from a stream that stopped early
+            deadline: Stop reading the wrapped repository once it has passed (optional)
+
+        Returns:
+            EntryStream with a copy of each entry
+        """
+        if continuation_token is not None:
+            return self.cache.rebuild(
+                self.repository.iter_all(continuation_token=continuation_token, deadline=deadline),
+                continuation_token=continuation_token
+            )
+        entries = self.cache.entries(self.repository)
+        if entries is None:
+            return self.cache.rebuild(self.repository.iter_all(deadline=deadline))
+        return EntryStream(lambda stream: (replace(entry) for entry in entries))
+
+    def get_all(self) -> List[Entry]:
+        """
+        Get all entries from the snapshot.
+
+        Returns:
+            List of all entries
+        """
+        return list(self.iter_all())
+
+    def create(self, entry: Entry) -> Entry:
+        """Create an entry and add it to the snapshot."""
+        created = self.repository.create(entry)
+        self.cache.put([created])
+        return created
+
+    def create_many(self, entries: Iterable[Entry], deadline: Optional[Deadline] = None) -> List[Entry]:
+        """Create entries and add them to the snapshot."""
+        created = self.repository.create_many(entries, deadline=deadline)
+        self.cache.put(created)
+        return created
+
+    def update(self, entry_id: str, name: Optional[str] = None, value: Optional[int] = None) -> Optional[Entry]:
+        """Update an entry and replace it in the snapshot."""
+        updated = self.repository.update(entry_id, name=name, value=value)
+        if updated is not None:
+            self.cache.put([updated])
+        return updated
+
+    def transact_update(self, updates: List[dict]) -> List[dict]:
+        """Update entries atomically; the next read fetches them."""
+        results = self.repository.transact_update(updates)
+        self.cache.mark_stale()
+        return results
+
+    def bulk_update(self, changes: dict, **kwargs) -> BulkUpdateResult:
+        """Update entries matching a predicate; the next read fetches them."""
+        result = self.repository.bulk_update(changes, **kwargs)
+        self.cache.mark_stale()
+        return result
+
+    def delete(self, entry_id: str) -> bool:
+        """Delete an entry and drop it from the snapshot."""
+        deleted = self.repository.delete(entry_id)
+        self.cache.discard(entry_id)
+        return deleted
+
+    def purge(self, created_before: Optional[str] = None, **kwargs) -> PurgeResult:
+        """Purge entries; the next read rebuilds the snapshot."""
+        result = self.repository.purge(created_before=created_before, **kwargs)
+        self.cache.expire()
+        return result
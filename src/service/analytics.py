@@ -0,0 +1,131 @@
+"""
+Aggregates over the values of all entries.
+
+Uses NumPy when it is installed and falls back to pure Python otherwise;
+both give the same results (linear-interpolated percentiles and
+equal-width histograms, as numpy.percentile and numpy.histogram).
+"""
+import math
+from array import array
+from typing import Dict, List, Optional, Sequence
+
+from src.model.models import ValueColumns
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional
+    np = None
+
+DEFAULT_PERCENTILES = (50, 90, 99)
+DEFAULT_BINS = 10
+
+
+def _percentile_key(percentile: float) -> str:
+    return f"p{percentile:g}"
+
+
+def _histogram_edges(low: float, high: float, bins: int) -> List[float]:
+    """Equal-width bin edges, computed like numpy.linspace."""
+    if low == high:
+        low, high = low - 0.5, high + 0.5
+    step = (high - low) / bins
+    return [low + i * step for i in range(bins)] + [high]
+
+
+def _python_aggregates(columns: ValueColumns, percentiles: Sequence[float], bins: int) -> Dict:
+    values = array('q', sorted(columns.values))
+    n = len(values)
+
+    quantiles = {}
+    for percentile in percentiles:
+        rank = (n - 1) * percentile / 100
+        lower = math.floor(rank)
+        upper = min(lower + 1, n - 1)
+        quantiles[_percentile_key(percentile)] = float(
+            values[lower] + (values[upper] - values[lower]) * (rank - lower)
+        )
+
+    edges = _histogram_edges(values[0], values[-1], bins)
+    counts = [0] * bins
+    scale = bins / (edges[-1] - edges[0])
+    for value in values:
+        index = min(int((value - edges[0]) * scale), bins - 1)
+        # Correct float rounding at the edges, as numpy.histogram does
+        if value < edges[index]:
+            index -= 1
+        elif index < bins - 1 and value >= edges[index + 1]:
+            index += 1
+        counts[index] += 1
+
+    sums = [0] * len(columns.names)
+    name_counts = [0] * len(columns.names)
+    for code, value in zip(columns.name_codes, columns.values):
+        sums[code] += value
+        name_counts[code] += 1
+
+    return {
+        'mean': sum(values) / n,
+        'percentiles': quantiles,
+        'histogram': {'edges': edges, 'counts': counts},
+        'by_name': {
+            name: {'count': name_counts[code], 'mean': sums[code] / name_counts[code]}
+            for code, name in enumerate(columns.names)
+        }
+    }
+
+
+def _numpy_aggregates(columns: ValueColumns, percentiles: Sequence[float], bins: int) -> Dict:
+    # Zero-copy views of the array buffers
+    values = np.frombuffer(columns.values, dtype=np.int64)
+    codes = np.frombuffer(columns.name_codes, dtype=np.int32)
+
+    quantiles = np.percentile(values, list(percentiles)) if percentiles else []
+    counts, edges = np.histogram(values, bins=bins)
+    name_counts = np.bincount(codes, minlength=len(columns.names))
+    sums = np.bincount(codes, weights=values, minlength=len(columns.names))
+
+    return {
+        'mean': float(values.mean()),
+        'percentiles': {
+            _percentile_key(p): float(q) for p, q in zip(percentiles, quantiles)
+        },
+        'histogram': {'edges': edges.tolist(), 'counts': counts.tolist()},
+        'by_name': {
+            name: {'count': int(name_counts[code]), 'mean': float(sums[code] / name_counts[code])}
+            for code, name in enumerate(columns.names)
+        }
+    }
+
+
+def summarize_values(columns: ValueColumns, percentiles: Optional[Sequence[float]] = None,
+                     bins: int = DEFAULT_BINS) -> Dict:
+    """
+    Compute the distribution of entry values.
+
+    Args:
+        columns: Names and values of the entries
+        percentiles: Percentiles to report, 0-100 (defaults to DEFAULT_PERCENTILES)
+        bins: Number of equal-width histogram bins between min and max
+
+    Returns:
+        Dict with count, min, max, mean, percentiles (keyed "p50", ...),
+        histogram (edges and counts) and by_name (count and mean per name)
+    """
+    if percentiles is None:
+        percentiles = DEFAULT_PERCENTILES
+
+    if not len(columns):
+        return {
+            'count': 0, 'min': None, 'max': None, 'mean': None,
+            'percentiles': {_percentile_key(p): None for p in percentiles},
+            'histogram': {'edges': [], 'counts': []},
+            'by_name': {}
+        }
+
+    aggregate = _numpy_aggregates if np is not None else _python_aggregates
+    return {
+        'count': len(columns),
+        'min': min(columns.values),
+        'max': max(columns.values),
+        **aggregate(columns, percentiles, bins)
+    }
@@ -1,10 +1,18 @@
 """
 Service layer with business logic.
 """
+from datetime import datetime, timedelta, timezone
 from typing import Optional, List
 
-from src.repository.repository import Repository
-from src.model.models import Entry
+from src.database.database import Deadline
+from src.repository.repository import MAX_TRANSACTION_ITEMS, Repository
+from src.model.models import BulkUpdateResult, ChangeSet, Entry, EntryStream, PurgeResult
+from src.service.analytics import DEFAULT_BINS, summarize_values
+
+# Changes are read one day bucket at a time; older cursors must resync with a full list
+MAX_CHANGED_SINCE_DAYS = 31
+# Matches updated by one bulk_update invocation when no limit is given
+DEFAULT_BULK_UPDATE_LIMIT = 1000
 
 
 class Service:
@@ -29,6 +37,28 @@ class Service:
         entry = Entry(name=name, value=value)
         return self.repository.create(entry)
     
+    def create_test_entries(self, entries: List[dict],
+                            deadline: Optional[Deadline] = None) -> List[Optional[Entry]]:
+        """
+        Create many test entries in bulk.
+        
+        Args:
+            entries: Dicts with the 'name' and 'value' of each entry
+            deadline: Stop creating once it has passed (optional)
+            
+        Returns:
+            The entry created for each request entry, in request order, up to
+            the last one created; None marks a request entry that throttling
+            left unwritten, and the entries after the end of the list (stopped
+            by the deadline or throttling) were not created either
+        """
+        batch = [Entry(name=entry['name'], value=entry['value']) for entry in entries]
+        written = {id(entry) for entry in self.repository.create_many(batch, deadline=deadline)}
+        results = [entry if id(entry) in written else None for entry in batch]
+        while results and results[-1] is None:
+            results.pop()
+        return results
+    
     def get_test_entry(self, entry_id: str) -> Optional[Entry]:
         """
         Get a test entry by ID.
@@ -50,6 +80,94 @@ class Service:
         """
         return self.repository.get_all()
     
+    def iter_test_entries(self, continuation_token: Optional[str] = None,
+                          deadline: Optional[Deadline] = None) -> EntryStream:
+        """
+        Iterate over all test entries as the repository reads them.
+        
+        Args:
+            continuation_token: Token from a listing that stopped at its deadline
+            deadline: Stop reading once it has passed (optional)
+            
+        Returns:
+            EntryStream of Entry objects, with the token to continue with
+            once exhausted if the deadline stopped it
+            
+        Raises:
+            ValueError: If the continuation token is invalid
+        """
+        return self.repository.iter_all(continuation_token=continuation_token, deadline=deadline)
+    
+    def count_test_entries(self, name: Optional[str] = None) -> int:
+        """
+        Count test entries without listing them.
+        
+        Args:
+            name: Only count entries with this exact name (optional)
+            
+        Returns:
+            Number of matching entries
+        """
+        return self.repository.count(name=name)
+    
+    def get_value_analytics(self, percentiles: Optional[List[float]] = None,
+                            bins: int = DEFAULT_BINS) -> dict:
+        """
+        Summarize the distribution of values across all entries.
+        
+        Args:
+            percentiles: Percentiles to report, each between 0 and 100 (optional)
+            bins: Number of histogram bins (must be positive)
+            
+        Returns:
+            Dict with count, min, max, mean, percentiles, histogram and by_name
+            
+        Raises:
+            ValueError: If a percentile or the number of bins is out of range
+        """
+        if percentiles is not None and any(not 0 <= p <= 100 for p in percentiles):
+            raise ValueError("Percentiles must be between 0 and 100")
+        
+        if bins < 1:
+            raise ValueError("Bins must be positive")
+        
+        return summarize_values(self.repository.get_value_columns(), percentiles, bins)
+    
+    def list_changed_since(self, since: str, limit: Optional[int] = None) -> ChangeSet:
+        """
+        List entries modified after a timestamp.
+        
+        Args:
+            since: ISO 8601 timestamp; naive timestamps are treated as UTC
+            limit: Maximum number of entries to return (optional, must be positive)
+            
+        Returns:
+            ChangeSet with the modified entries and the cursor for the next call
+            
+        Raises:
+            ValueError: If validation fails or since is older than
+                MAX_CHANGED_SINCE_DAYS (the caller should resync with list)
+        """
+        try:
+            since_dt = datetime.fromisoformat(since)
+        except (TypeError, ValueError):
+            raise ValueError("Since must be an ISO 8601 timestamp")
+        
+        if since_dt.tzinfo is None:
+            since_dt = since_dt.replace(tzinfo=timezone.utc)
+        
+        if since_dt < datetime.now(timezone.utc) - timedelta(days=MAX_CHANGED_SINCE_DAYS):
+            raise ValueError(
+                f"Since must be within the last {MAX_CHANGED_SINCE_DAYS} days; resync with list"
+            )
+        
+        if limit is not None and limit < 1:
+            raise ValueError("Limit must be positive")
+        
+        # Stored timestamps are UTC isoformat strings, so compare in the same format
+        normalized = since_dt.astimezone(timezone.utc).isoformat()
+        return self.repository.get_changed_since(normalized, limit=limit)
+    
     def update_test_entry(self, entry_id: str, name: Optional[str] = None, 
                          value: Optional[int] = None) -> Optional[Entry]:
         """
@@ -66,16 +184,150 @@ class Service:
         Raises:
             ValueError: If validation fails
         """
-        # Validation
+        name_to_update = self._validate_update(name, value)
+        return self.repository.update(entry_id, name=name_to_update, value=value)
+    
+    @staticmethod
+    def _validate_update(name: Optional[str], value: Optional[int]) -> Optional[str]:
+        """
+        Validate the fields of an update.
+        
+        Args:
+            name: New name (optional, must not be empty if provided)
+            value: New value (optional, must be non-negative if provided)
+            
+        Returns:
+            The stripped name, or None if no name is updated
+            
+        Raises:
+            ValueError: If validation fails
+        """
         if name is not None and (not name or not name.strip()):
             raise ValueError("Name cannot be empty")
         
         if value is not None and value < 0:
             raise ValueError("Value must be non-negative")
         
-        # Update entry
-        name_to_update = name.strip() if name else None
-        return self.repository.update(entry_id, name=name_to_update, value=value)
+        return name.strip() if name else None
+    
+    def transact_update_test_entries(self, updates: List[dict]) -> List[dict]:
+        """
+        Update several test entries atomically: either all are updated or none.
+        
+        Args:
+            updates: Dicts with the entry 'id' and optional 'name'/'value',
+                validated like update_test_entry
+            
+        Returns:
+            Per-entry results with the 'id' and the new 'updated_at'
+            
+        Raises:
+            ValueError: If validation fails, an ID appears twice or there are
+                more than MAX_TRANSACTION_ITEMS updates
+            TransactionCancelledError: If any entry is missing or the
+                transaction conflicts
+        """
+        if not updates:
+            raise ValueError("Updates cannot be empty")
+        
+        if len(updates) > MAX_TRANSACTION_ITEMS:
+            raise ValueError(f"At most {MAX_TRANSACTION_ITEMS} updates per transaction")
+        
+        validated = []
+        seen = set()
+        for update in updates:
+            entry_id = update['id']
+            # A transaction may touch each item only once
+            if entry_id in seen:
+                raise ValueError(f"Duplicate id in transaction: {entry_id}")
+            seen.add(entry_id)
+            
+            value = update.get('value')
+            validated.append({
+                'id': entry_id,
+                'name': self._validate_update(update.get('name'), value),
+                'value': value
+            })
+        
+        return self.repository.transact_update(validated)
+    
+    def bulk_update_test_entries(self, where: dict, changes: dict, limit: Optional[int] = None,
+                                 continuation_token: Optional[str] = None,
+                                 deadline: Optional[Deadline] = None) -> BulkUpdateResult:
+        """
+        Update every test entry matching a predicate.
+        
+        Args:
+            where: Dict with an exact 'name' and/or an inclusive
+                'min_value'/'max_value' range
+            changes: Dict with the new 'name' and/or 'value', validated like
+                update_test_entry
+            limit: Maximum matches updated by this call (defaults to
+                DEFAULT_BULK_UPDATE_LIMIT)
+            continuation_token: Token from a previous call with the same where
+            deadline: Stop updating once it has passed (optional)
+            
+        Returns:
+            BulkUpdateResult with the counts and the token to continue with
+            while more matches remain
+            
+        Raises:
+            ValueError: If validation fails or the token does not belong to this predicate
+        """
+        name = where.get('name')
+        min_value = where.get('min_value')
+        max_value = where.get('max_value')
+        if name is None and min_value is None and max_value is None:
+            raise ValueError("Where must have a name or a value range")
+        if min_value is not None and max_value is not None and min_value > max_value:
+            raise ValueError("min_value cannot be greater than max_value")
+        
+        if changes.get('name') is None and changes.get('value') is None:
+            raise ValueError("Set must have a name or a value")
+        value = changes.get('value')
+        new_name = self._validate_update(changes.get('name'), value)
+        
+        if limit is None:
+            limit = DEFAULT_BULK_UPDATE_LIMIT
+        if limit < 1:
+            raise ValueError("Limit must be positive")
+        
+        return self.repository.bulk_update(
+            {'name': new_name, 'value': value},
+            name=name,
+            min_value=min_value,
+            max_value=max_value,
+            limit=limit,
+            continuation_token=continuation_token,
+            deadline=deadline
+        )
+    
+    def purge_entries(self, max_age_seconds: Optional[int] = None,
+                      continuation_token: Optional[str] = None,
+                      deadline: Optional[Deadline] = None) -> PurgeResult:
+        """
+        Delete expired entries, and optionally every entry older than a maximum age.
+        
+        Args:
+            max_age_seconds: Also delete entries created longer ago than this
+                (optional, must be positive)
+            continuation_token: Token from a purge that stopped at its deadline
+            deadline: Stop deleting once it has passed (optional)
+            
+        Returns:
+            PurgeResult with the number of entries deleted and the token to
+            continue with while more remain
+            
+        Raises:
+            ValueError: If max_age_seconds is not positive or the token is invalid
+        """
+        created_before = None
+        if max_age_seconds is not None:
+            if max_age_seconds < 1:
+                raise ValueError("Max age must be positive")
+            created_before = (datetime.now(timezone.utc) - timedelta(seconds=max_age_seconds)).isoformat()
+        return self.repository.purge(created_before=created_before,
+                                     continuation_token=continuation_token, deadline=deadline)
     
     def delete_test_entry(self, entry_id: str) -> bool:
         """
@@ -0,0 +1,4 @@
+"""Operator tools package"""
+from src.tools.dlq_replay import DLQReplayer, ReplayResult
+
+__all__ = ['DLQReplayer', 'ReplayResult']
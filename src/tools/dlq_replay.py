@@ -0,0 +1,219 @@
+"""
+Replay failed Lambda events from the SQS dead-letter queue.
+
+Messages are received 10 at a time and duplicate payloads are collapsed.
+Each distinct event is re-run through Handler.handle with bounded
+concurrency and a maximum rate. Only messages whose event succeeded
+(2xx) are deleted; failed ones become visible again for a later run.
+
+Usage:
+    python -m src.tools.dlq_replay --queue-url URL [--concurrency 4] [--max-rate 10]
+
+DYNAMODB_TABLE_NAME (or REPOSITORY_BACKEND) selects the storage the
+events are replayed against, as in the Lambda.
+"""
+import argparse
+import hashlib
+import json
+import logging
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional, Set
+
+import boto3
+
+from src.database.database import DynamoDBConnection, TokenBucket
+from src.messaging.handler import Handler
+from src.repository.factory import BACKEND_DYNAMODB, create_repository, get_backend
+from src.service.service import Service
+
+logger = logging.getLogger(__name__)
+
+# SQS ReceiveMessage and DeleteMessageBatch accept at most 10 messages
+SQS_BATCH_SIZE = 10
+
+
+@dataclass
+class ReplayResult:
+    """Counts for one replay run."""
+    received: int = 0
+    duplicates: int = 0
+    replayed: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    deleted: int = 0
+
+
+def payload_key(body: str) -> str:
+    """
+    Identify a message payload regardless of JSON formatting.
+
+    Args:
+        body: Message body
+
+    Returns:
+        Hash of the canonical JSON, or of the raw body if it is not JSON
+    """
+    try:
+        canonical = json.dumps(json.loads(body), sort_keys=True, separators=(',', ':'))
+    except ValueError:
+        canonical = body
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class DLQReplayer:
+    """Replays dead-letter queue messages through Handler.handle."""
+
+    def __init__(self, queue_url: str, handler: Handler, sqs_client=None,
+                 concurrency: int = 4, max_rate: float = 10.0,
+                 visibility_timeout: int = 300, wait_time_seconds: int = 1):
+        """
+        Initialize the replayer.
+
+        Args:
+            queue_url: URL of the dead-letter queue
+            handler: Handler the events are replayed through (shared by all workers)
+            sqs_client: boto3 SQS client (defaults to a new client)
+            concurrency: Events replayed at the same time
+            max_rate: Maximum events replayed per second (0 disables the limit)
+            visibility_timeout: Seconds received messages stay hidden; must
+                cover the replay of one batch
+            wait_time_seconds: Long-poll time of each receive
+        """
+        if concurrency < 1:
+            raise ValueError("Concurrency must be positive")
+        self.queue_url = queue_url
+        self.handler = handler
+        self.sqs = sqs_client or boto3.client('sqs')
+        self.concurrency = concurrency
+        self.limiter = TokenBucket(max_rate) if max_rate > 0 else None
+        self.visibility_timeout = visibility_timeout
+        self.wait_time_seconds = wait_time_seconds
+
+    def replay(self, max_messages: Optional[int] = None) -> ReplayResult:
+        """
+        Replay messages until the queue has nothing new to offer.
+
+        Args:
+            max_messages: Stop after receiving this many messages (optional)
+
+        Returns:
+            ReplayResult with the counts of the run
+        """
+        result = ReplayResult()
+        # Payload outcomes of this run, so duplicates across batches are not re-run
+        outcomes: Dict[str, bool] = {}
+        seen_ids: Set[str] = set()
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            while max_messages is None or result.received < max_messages:
+                batch_size = SQS_BATCH_SIZE
+                if max_messages is not None:
+                    batch_size = min(batch_size, max_messages - result.received)
+                messages = self.sqs.receive_message(
+                    QueueUrl=self.queue_url,
+                    MaxNumberOfMessages=batch_size,
+                    VisibilityTimeout=self.visibility_timeout,
+                    WaitTimeSeconds=self.wait_time_seconds
+                ).get('Messages', [])
+
+                # Failed messages reappear once their visibility timeout ends
+                new = [m for m in messages if m['MessageId'] not in seen_ids]
+                if not new:
+                    break
+                seen_ids.update(m['MessageId'] for m in new)
+                result.received += len(new)
+
+                self._replay_batch(new, outcomes, executor, result)
+        return result
+
+    def _replay_batch(self, messages: List[dict], outcomes: Dict[str, bool],
+                      executor: ThreadPoolExecutor, result: ReplayResult):
+        """Replay the distinct payloads of one batch and delete the successes."""
+        groups: Dict[str, List[dict]] = {}
+        for message in messages:
+            groups.setdefault(payload_key(message['Body']), []).append(message)
+
+        pending = {key: group for key, group in groups.items() if key not in outcomes}
+        result.duplicates += len(messages) - len(pending)
+        futures = {
+            key: executor.submit(self._replay_one, group[0]['Body'])
+            for key, group in pending.items()
+        }
+        for key, future in futures.items():
+            outcomes[key] = future.result()
+            result.replayed += 1
+            if outcomes[key]:
+                result.succeeded += 1
+            else:
+                result.failed += 1
+
+        succeeded = [m for key, group in groups.items() if outcomes[key] for m in group]
+        result.deleted += self._delete(succeeded)
+
+    def _replay_one(self, body: str) -> bool:
+        """Run one event through the handler; True if it succeeded."""
+        if self.limiter is not None:
+            self.limiter.acquire()
+        try:
+            event = json.loads(body)
+            response = self.handler.handle(event)
+        except Exception as e:
+            logger.warning(f"Replay failed: {e}")
+            return False
+
+        status = response.get('statusCode', 500)
+        if not 200 <= status < 300:
+            logger.warning(f"Replay returned {status}: {response.get('body')}")
+            return False
+        return True
+
+    def _delete(self, messages: List[dict]) -> int:
+        """Delete messages in batches of 10; returns how many were deleted."""
+        deleted = 0
+        for start in range(0, len(messages), SQS_BATCH_SIZE):
+            chunk = messages[start:start + SQS_BATCH_SIZE]
+            response = self.sqs.delete_message_batch(
+                QueueUrl=self.queue_url,
+                Entries=[
+                    {'Id': str(i), 'ReceiptHandle': m['ReceiptHandle']}
+                    for i, m in enumerate(chunk)
+                ]
+            )
+            deleted += len(response.get('Successful', []))
+            for failure in response.get('Failed', []):
+                logger.warning(f"Could not delete message: {failure}")
+        return deleted
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command-line entry point; prints the ReplayResult as JSON."""
+    parser = argparse.ArgumentParser(description="Replay the Lambda dead-letter queue")
+    parser.add_argument('--queue-url', required=True, help="URL of the dead-letter queue")
+    parser.add_argument('--concurrency', type=int, default=4, help="Events replayed at the same time")
+    parser.add_argument('--max-rate', type=float, default=10.0,
+                        help="Maximum events per second (0 disables the limit)")
+    parser.add_argument('--max-messages', type=int, help="Stop after this many messages")
+    parser.add_argument('--visibility-timeout', type=int, default=300,
+                        help="Seconds received messages stay hidden while replaying")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    if get_backend() == BACKEND_DYNAMODB:
+        DynamoDBConnection.initialize()
+    handler = Handler(service=Service(create_repository()))
+
+    replayer = DLQReplayer(
+        args.queue_url, handler,
+        concurrency=args.concurrency,
+        max_rate=args.max_rate,
+        visibility_timeout=args.visibility_timeout
+    )
+    result = replayer.replay(max_messages=args.max_messages)
+    print(json.dumps(asdict(result)))
+    return 0 if result.failed == 0 else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -6,6 +6,10 @@ resource "aws_dynamodb_table" "app_table" {
   billing_mode = "PAY_PER_REQUEST"
   hash_key     = "id"
 
+  # Change stream consumed by the Lambda to keep derived views up to date
+  stream_enabled   = var.stream_consumer_enabled
+  stream_view_type = var.stream_consumer_enabled ? "NEW_AND_OLD_IMAGES" : null
+
   attribute {
     name = "id"
     type = "S"
@@ -16,12 +20,36 @@ resource "aws_dynamodb_table" "app_table" {
     type = "S"
   }
 
+  attribute {
+    name = "updated_day"
+    type = "S"
+  }
+
+  attribute {
+    name = "updated_at"
+    type = "S"
+  }
+
   global_secondary_index {
     name            = "NameIndex"
     hash_key        = "name"
     projection_type = "ALL"
   }
 
+  # Incremental sync: entries bucketed by UTC day of their last update
+  global_secondary_index {
+    name            = "UpdatedAtIndex"
+    hash_key        = "updated_day"
+    range_key       = "updated_at"
+    projection_type = "ALL"
+  }
+
+  # Entries expire entry_ttl_seconds after creation (expires_at is set by the Lambda)
+  ttl {
+    attribute_name = "expires_at"
+    enabled        = true
+  }
+
   tags = {
     Name        = "${var.project_name}-${var.environment}"
     Environment = var.environment
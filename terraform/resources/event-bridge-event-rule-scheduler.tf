@@ -41,3 +41,34 @@ resource "aws_lambda_permission" "allow_eventbridge" {
   source_arn    = aws_cloudwatch_event_rule.lambda_schedule.arn
 }
 
+
+# Purge job: deletes entries TTL has not removed yet and, when purge_max_age_seconds is set,
+# anything created longer ago than that
+resource "aws_cloudwatch_event_rule" "purge_schedule" {
+  name                = "${var.function_name}-purge-${var.environment}"
+  description         = "Purge stale entries on a schedule"
+  schedule_expression = var.purge_schedule_expression
+  state               = var.scheduler_enabled ? "ENABLED" : "DISABLED"
+
+  tags = merge(var.tags, { Environment = var.environment })
+}
+
+resource "aws_cloudwatch_event_target" "purge_target" {
+  rule      = aws_cloudwatch_event_rule.purge_schedule.name
+  target_id = "LambdaPurgeTarget"
+  arn       = aws_lambda_function.function.arn
+
+  input = jsonencode({
+    action = "purge",
+    # max_age_seconds must be positive, so 0 leaves it out
+    data = { for key, value in { max_age_seconds = var.purge_max_age_seconds } : key => value if value > 0 }
+  })
+}
+
+resource "aws_lambda_permission" "allow_eventbridge_purge" {
+  statement_id  = "AllowPurgeFromEventBridge"
+  action        = "lambda:InvokeFunction"
+  function_name = aws_lambda_function.function.function_name
+  principal     = "events.amazonaws.com"
+  source_arn    = aws_cloudwatch_event_rule.purge_schedule.arn
+}
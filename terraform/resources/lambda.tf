@@ -69,8 +69,11 @@ resource "aws_lambda_function" "function" {
 
   environment {
     variables = {
-      ENVIRONMENT         = var.environment
-      DYNAMODB_TABLE_NAME = aws_dynamodb_table.app_table.name
+      ENVIRONMENT                    = var.environment
+      DYNAMODB_TABLE_NAME            = aws_dynamodb_table.app_table.name
+      ENTRY_TTL_SECONDS              = tostring(var.entry_ttl_seconds)
+      PURGE_RATE_LIMIT               = tostring(var.purge_rate_limit)
+      SNAPSHOT_MAX_STALENESS_SECONDS = tostring(var.snapshot_max_staleness_seconds)
     }
   }
 
@@ -132,6 +135,7 @@ resource "aws_iam_policy" "lambda_dynamodb" {
           "dynamodb:PutItem",
           "dynamodb:UpdateItem",
           "dynamodb:DeleteItem",
+          "dynamodb:BatchWriteItem",
           "dynamodb:Query",
           "dynamodb:Scan"
         ]
@@ -203,3 +207,54 @@ resource "aws_lambda_event_source_mapping" "dlq_processor" {
     aws_iam_role_policy_attachment.lambda_read_dlq
   ]
 }
+
+# IAM Policy for Lambda to read the table's change stream (derived views)
+resource "aws_iam_policy" "lambda_read_stream" {
+  count       = var.stream_consumer_enabled ? 1 : 0
+  name        = "${var.function_name}-${var.environment}-read-stream-policy"
+  description = "Allow Lambda to read the DynamoDB Stream of the app table"
+
+  policy = jsonencode({
+    Version = "2012-10-17"
+    Statement = [
+      {
+        Effect = "Allow"
+        Action = [
+          "dynamodb:DescribeStream",
+          "dynamodb:GetRecords",
+          "dynamodb:GetShardIterator",
+          "dynamodb:ListStreams"
+        ]
+        Resource = aws_dynamodb_table.app_table.stream_arn
+      }
+    ]
+  })
+
+  tags = merge(var.tags, { Environment = var.environment })
+}
+
+resource "aws_iam_role_policy_attachment" "lambda_read_stream" {
+  count      = var.stream_consumer_enabled ? 1 : 0
+  role       = aws_iam_role.lambda_role.name
+  policy_arn = aws_iam_policy.lambda_read_stream[0].arn
+}
+
+# Event Source Mapping: DynamoDB Stream -> view updaters
+# View updaters must not write back to the app table, or every write re-triggers the stream
+resource "aws_lambda_event_source_mapping" "stream_processor" {
+  count                              = var.stream_consumer_enabled ? 1 : 0
+  event_source_arn                   = aws_dynamodb_table.app_table.stream_arn
+  function_name                      = aws_lambda_function.function.arn
+  starting_position                  = "LATEST"
+  batch_size                         = 100
+  maximum_batching_window_in_seconds = 5
+  maximum_retry_attempts             = 10
+  bisect_batch_on_function_error     = true
+
+  # Lambda checkpoints before the first reported sequence number and retries from there
+  function_response_types = ["ReportBatchItemFailures"]
+
+  depends_on = [
+    aws_iam_role_policy_attachment.lambda_read_stream
+  ]
+}
@@ -77,3 +77,39 @@ variable "alarm_emails" {
   default     = []
 }
 
+
+variable "entry_ttl_seconds" {
+  description = "Lifetime of new entries before DynamoDB TTL deletes them (0 disables expiry)"
+  type        = number
+  default     = 0
+}
+
+variable "purge_schedule_expression" {
+  description = "Schedule expression for the purge job (enabled together with scheduler_enabled)"
+  type        = string
+  default     = "cron(0 3 * * ? *)"
+}
+
+variable "purge_max_age_seconds" {
+  description = "Entries created longer ago than this are deleted by the purge job (0 only purges entries past their TTL)"
+  type        = number
+  default     = 0
+}
+
+variable "purge_rate_limit" {
+  description = "Maximum deletes per second during a purge (0 disables the limit)"
+  type        = number
+  default     = 100
+}
+
+variable "snapshot_max_staleness_seconds" {
+  description = "Seconds list may be served from the container's /tmp snapshot before checking for changes (0 disables the snapshot)"
+  type        = number
+  default     = 0
+}
+
+variable "stream_consumer_enabled" {
+  description = "Enable the DynamoDB Stream and its Lambda event source mapping for derived views"
+  type        = bool
+  default     = false
+}
@@ -0,0 +1,108 @@
+"""
+Measure peak memory of the list response as the table grows.
+
+Scan pages come from a fake table that builds fresh items for every page,
+as boto3 does when it deserializes a response, so only the list pipeline
+itself is measured (no AWS or moto needed).
+
+The baseline rebuilds the previous pipeline: all scan items, then a list
+of Entry objects, then a list of dicts, then one json.dumps() string. The
+streaming pipeline encodes entries as each page arrives, so the memory it
+needs beyond the response body is one more body-sized copy (the encoded
+batches, held until the single join) and about one scan page, against
+roughly six body-sized copies for the baseline.
+
+Usage:
+    python -m tests.benchmarks.bench_list_memory [entries ...]
+"""
+import json
+import sys
+import tracemalloc
+from decimal import Decimal
+from unittest.mock import PropertyMock, patch
+
+from src.database.database import DynamoDBConnection
+from src.messaging.handler import Handler
+from src.repository.repository import Repository, _to_entry
+from src.service.service import Service
+
+# Roughly what fits in a 1 MB DynamoDB scan page for these items
+PAGE_SIZE = 5000
+
+
+class _FakeTable:
+    """Serves scan pages of freshly built items, like a deserialized response."""
+
+    def __init__(self, entries: int):
+        self.entries = entries
+
+    def scan(self, ExclusiveStartKey=None, **kwargs):
+        start = ExclusiveStartKey['id'] if ExclusiveStartKey else 0
+        end = min(start + PAGE_SIZE, self.entries)
+        response = {'Items': [
+            {
+                'id': f"{i:08d}-0000-4000-8000-000000000000",
+                'name': f"Team {i % 100}",
+                'value': Decimal((i * 7919) % 1000),
+                'created_at': '2025-01-01T00:00:00.000000+00:00',
+                'updated_at': '2025-01-01T00:00:00.000000+00:00',
+                'updated_day': '2025-01-01'
+            }
+            for i in range(start, end)
+        ]}
+        if end < self.entries:
+            response['LastEvaluatedKey'] = {'id': end}
+        return response
+
+
+def _baseline(repository: Repository) -> str:
+    """The pre-streaming list pipeline: four full copies of the data."""
+    table = repository.table
+    items, scan_kwargs = [], {}
+    while True:
+        response = table.scan(**scan_kwargs)
+        items.extend(response['Items'])
+        if 'LastEvaluatedKey' not in response:
+            break
+        scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+    entries = [_to_entry(item) for item in items]
+    return json.dumps({'data': [entry.to_dict() for entry in entries]})
+
+
+def _streaming(handler: Handler) -> str:
+    return handler.handle({'action': 'list'})['body']
+
+
+def _peak(operation):
+    """Return the result, the peak traced bytes and the result size in bytes."""
+    tracemalloc.start()
+    try:
+        result = operation()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return result, peak, sys.getsizeof(result)
+
+
+def main(sizes):
+    print(f"{'entries':>8} {'pipeline':<10} {'peak MiB':>9} {'body MiB':>9} {'overhead MiB':>13}")
+    for entries in sizes:
+        table = _FakeTable(entries)
+        with patch.object(DynamoDBConnection, 'get_table', return_value=table), \
+                patch.object(Repository, 'table', new_callable=PropertyMock, return_value=table):
+            repository = Repository()
+            handler = Handler(service=Service(repository))
+            baseline, _, _ = _peak(lambda: _baseline(repository))
+            streamed, _, _ = _peak(lambda: _streaming(handler))
+            assert streamed == baseline, "pipelines must produce the same body"
+            del baseline, streamed
+
+            for label, operation in (('baseline', lambda: _baseline(repository)),
+                                     ('streaming', lambda: _streaming(handler))):
+                _, peak, body = _peak(operation)
+                print(f"{entries:>8} {label:<10} {peak / 2**20:9.2f} {body / 2**20:9.2f} "
+                      f"{(peak - body) / 2**20:13.2f}")
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or [10_000, 50_000, 100_000])
@@ -0,0 +1,65 @@
+"""
+Benchmark Service and Handler on the in-memory backend at 100k+ entries.
+
+Usage:
+    python -m tests.benchmarks.bench_memory_backend [entries]
+"""
+import sys
+import time
+from contextlib import contextmanager
+
+from src.messaging.handler import Handler
+from src.repository.memory_repository import InMemoryRepository
+from src.service.service import Service
+from src.model.models import Entry
+
+
+@contextmanager
+def timed(label: str, operations: int = 1):
+    """Print the elapsed time of a block, per operation when several"""
+    start = time.perf_counter()
+    yield
+    elapsed = time.perf_counter() - start
+    per_op = f" ({elapsed / operations * 1e6:.1f} us/op)" if operations > 1 else ""
+    print(f"{label:<40} {elapsed * 1000:10.2f} ms{per_op}")
+
+
+def main(entries: int = 100_000):
+    repository = InMemoryRepository()
+    service = Service(repository)
+    handler = Handler(service=service)
+
+    with timed(f"create {entries} entries", entries):
+        ids = [
+            repository.create(Entry(name=f"Team {i % 100}", value=(i * 7919) % 1000)).id
+            for i in range(entries)
+        ]
+
+    lookups = ids[::100]
+    with timed(f"Service.get_test_entry x{len(lookups)}", len(lookups)):
+        for entry_id in lookups:
+            service.get_test_entry(entry_id)
+
+    with timed(f"Handler get x{len(lookups)}", len(lookups)):
+        for entry_id in lookups:
+            handler.handle({'action': 'get', 'data': {'id': entry_id}})
+
+    with timed(f"Service.update_test_entry x{len(lookups)}", len(lookups)):
+        for entry_id in lookups:
+            service.update_test_entry(entry_id, value=1)
+
+    with timed("get_by_name (1% of entries)"):
+        repository.get_by_name("Team 7")
+
+    with timed("get_by_value_range (first after writes)"):
+        repository.get_by_value_range(10, 12)
+
+    with timed("get_by_value_range (indexes current)"):
+        repository.get_by_value_range(10, 12)
+
+    with timed("Handler list"):
+        handler.handle({'action': 'list'})
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,85 @@
+"""
+Measure how batch validation and list encoding scale with worker processes.
+
+For each event size, the same batch_create event is validated and the same
+list body encoded inline (0 workers) and with 1, 2, 4... worker processes.
+Workers are started once per worker count and reused, as in a warm
+container, so their startup time is reported separately.
+
+Small events lose time to pickling chunks across the pipes; the speedup
+column shows where the pool starts to pay off, which is what
+PROCESS_POOL_MIN_ITEMS should be set to. Speedup needs as many vCPUs as
+workers (Lambda allocates about one vCPU per 1769 MB of memory).
+
+Usage:
+    python -m tests.benchmarks.bench_process_pool [entries ...] [--workers 1,2,4]
+"""
+import argparse
+import os
+import time
+
+from src.messaging.handler import validate_event
+from src.messaging.process_pool import WorkerPool
+from src.messaging.serialization import dumps_entry_list
+from src.model.models import Entry
+
+ROUNDS = 3
+
+
+def _best_of(operation) -> float:
+    """Fastest of ROUNDS runs, in seconds."""
+    timings = []
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        operation()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def _workloads(entries: int):
+    event = {'action': 'batch_create', 'data': {
+        'entries': [{'name': f'Team {i % 100}', 'value': i} for i in range(entries)]
+    }}
+    listed = [
+        Entry(id=f'{i:08d}-0000-4000-8000-000000000000', name=f'Team {i % 100}', value=i,
+              created_at='2025-01-01T00:00:00.000000+00:00',
+              updated_at='2025-01-01T00:00:00.000000+00:00')
+        for i in range(entries)
+    ]
+    return {
+        'validate': lambda pool: validate_event(event, pool=pool),
+        'encode': lambda pool: dumps_entry_list(listed, pool=pool),
+    }
+
+
+def main(sizes, worker_counts):
+    print(f"vCPUs available: {os.cpu_count()}")
+    pools = {}
+    for workers in worker_counts:
+        start = time.perf_counter()
+        # min_items=0 sends every event to the workers, to find the break-even size
+        pools[workers] = WorkerPool(workers, min_items=0)
+        print(f"start {workers} workers: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    try:
+        print(f"{'entries':>8} {'task':<9} {'workers':>7} {'ms':>9} {'items/s':>11} {'speedup':>8}")
+        for entries in sizes:
+            for task, operation in _workloads(entries).items():
+                inline = _best_of(lambda: operation(None))
+                rows = [(0, inline)] + [
+                    (workers, _best_of(lambda: operation(pools[workers]))) for workers in worker_counts
+                ]
+                for workers, seconds in rows:
+                    print(f"{entries:>8} {task:<9} {workers:>7} {seconds * 1000:9.1f} "
+                          f"{entries / seconds:11.0f} {inline / seconds:7.2f}x")
+    finally:
+        for pool in pools.values():
+            pool.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('entries', nargs='*', type=int, default=[100, 1000, 5000, 10000])
+    parser.add_argument('--workers', default='1,2,4', help="Comma-separated worker counts")
+    args = parser.parse_args()
+    main(args.entries, [int(w) for w in args.workers.split(',')])
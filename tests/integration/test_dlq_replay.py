@@ -0,0 +1,133 @@
+"""
+Integration tests for the DLQ replay tool against moto SQS
+"""
+import json
+import pytest
+import boto3
+from moto import mock_aws
+
+from src.messaging.handler import Handler
+from src.repository.memory_repository import InMemoryRepository
+from src.service.service import Service
+from src.tools.dlq_replay import DLQReplayer, payload_key
+
+
+@pytest.fixture
+def sqs(aws_credentials):
+    """Create a mock SQS client and dead-letter queue"""
+    with mock_aws():
+        client = boto3.client('sqs', region_name='us-east-1')
+        queue_url = client.create_queue(QueueName='lambda-deadletter')['QueueUrl']
+        yield client, queue_url
+
+
+@pytest.fixture
+def repository():
+    """In-memory storage the events are replayed against"""
+    return InMemoryRepository()
+
+
+def _send(client, queue_url, *events):
+    for event in events:
+        body = event if isinstance(event, str) else json.dumps(event)
+        client.send_message(QueueUrl=queue_url, MessageBody=body)
+
+
+def _messages_left(client, queue_url):
+    attributes = client.get_queue_attributes(
+        QueueUrl=queue_url,
+        AttributeNames=['ApproximateNumberOfMessages', 'ApproximateNumberOfMessagesNotVisible']
+    )['Attributes']
+    return int(attributes['ApproximateNumberOfMessages']) + int(attributes['ApproximateNumberOfMessagesNotVisible'])
+
+
+class TestDLQReplayer:
+    """Replay behaviour against a real (mocked) queue"""
+
+    def test_replays_and_deletes_successes(self, sqs, repository):
+        """Test every distinct event is replayed once and its messages deleted"""
+        client, queue_url = sqs
+        _send(client, queue_url, *[
+            {'action': 'create', 'data': {'name': f'Entry {i}', 'value': i}} for i in range(25)
+        ])
+        replayer = DLQReplayer(queue_url, Handler(service=Service(repository)), sqs_client=client,
+                               concurrency=4, max_rate=0, wait_time_seconds=0)
+
+        result = replayer.replay()
+
+        assert result.received == 25
+        assert result.succeeded == 25
+        assert result.deleted == 25
+        assert len(repository) == 25
+        assert _messages_left(client, queue_url) == 0
+
+    def test_duplicate_payloads_replayed_once(self, sqs, repository):
+        """Test duplicates, even formatted differently, are replayed once and all deleted"""
+        client, queue_url = sqs
+        event = {'action': 'create', 'data': {'name': 'Once', 'value': 1}}
+        _send(client, queue_url, event, json.dumps(event, indent=2), event,
+              {'action': 'create', 'data': {'value': 1, 'name': 'Once'}})
+        replayer = DLQReplayer(queue_url, Handler(service=Service(repository)), sqs_client=client,
+                               max_rate=0, wait_time_seconds=0)
+
+        result = replayer.replay()
+
+        assert result.replayed == 1
+        assert result.duplicates == 3
+        assert result.deleted == 4
+        assert len(repository) == 1
+
+    def test_failed_messages_stay_in_queue(self, sqs, repository):
+        """Test events that fail or are not JSON are kept for a later run"""
+        client, queue_url = sqs
+        _send(client, queue_url,
+              {'action': 'create', 'data': {'name': 'Good', 'value': 1}},
+              {'action': 'update', 'data': {'id': 'missing', 'value': 2}},
+              'not json')
+        replayer = DLQReplayer(queue_url, Handler(service=Service(repository)), sqs_client=client,
+                               max_rate=0, visibility_timeout=0, wait_time_seconds=0)
+
+        result = replayer.replay()
+
+        assert (result.succeeded, result.failed, result.deleted) == (1, 2, 1)
+        assert _messages_left(client, queue_url) == 2
+
+    def test_max_messages(self, sqs, repository):
+        """Test a run stops after max_messages"""
+        client, queue_url = sqs
+        _send(client, queue_url, *[
+            {'action': 'create', 'data': {'name': f'Entry {i}', 'value': i}} for i in range(15)
+        ])
+        replayer = DLQReplayer(queue_url, Handler(service=Service(repository)), sqs_client=client,
+                               max_rate=0, wait_time_seconds=0)
+
+        result = replayer.replay(max_messages=12)
+
+        assert result.received == 12
+        assert _messages_left(client, queue_url) == 3
+
+    def test_rate_limit(self, sqs, repository, monkeypatch):
+        """Test every replay takes a token from the rate limiter"""
+        client, queue_url = sqs
+        acquired = []
+        monkeypatch.setattr('src.tools.dlq_replay.TokenBucket.acquire',
+                            lambda self, tokens=1.0, max_wait=None: acquired.append(self.rate) or True)
+        _send(client, queue_url, *[
+            {'action': 'create', 'data': {'name': f'Entry {i}', 'value': i}} for i in range(3)
+        ])
+        replayer = DLQReplayer(queue_url, Handler(service=Service(repository)), sqs_client=client,
+                               max_rate=5, wait_time_seconds=0)
+
+        replayer.replay()
+
+        assert acquired == [5, 5, 5]
+
+
+class TestPayloadKey:
+    """Tests for duplicate detection"""
+
+    def test_ignores_json_formatting(self):
+        """Test key order and whitespace do not change the key"""
+        assert payload_key('{"a": 1, "b": [1, 2]}') == payload_key('{"b":[1,2],"a":1}')
+        assert payload_key('{"a": 1}') != payload_key('{"a": 2}')
+        assert payload_key('not json') == payload_key('not json')
@@ -1,69 +1,26 @@
 """
 Integration tests for DynamoDB operations using moto
 """
-import os
+import itertools
+import json
+import threading
 import pytest
-import boto3
-from moto import mock_aws
-from decimal import Decimal
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
 
-from src.database.database import DynamoDBConnection
+from src.database.database import Deadline, DynamoDBConnection, ThrottledError
+from src.messaging.handler import Handler
+from src.repository.errors import WriteDeferredError
+from src.repository.journal import WriteJournal
 from src.repository.repository import Repository
+from src.repository.snapshot import SnapshotCache, SnapshotRepository
 from src.service.service import Service
 from src.model.models import Entry
 
 
-@pytest.fixture
-def aws_credentials():
-    """Mock AWS credentials for moto"""
-    os.environ['AWS_ACCESS_KEY_ID'] = 'testing'
-    os.environ['AWS_SECRET_ACCESS_KEY'] = 'testing'
-    os.environ['AWS_SECURITY_TOKEN'] = 'testing'
-    os.environ['AWS_SESSION_TOKEN'] = 'testing'
-    os.environ['AWS_DEFAULT_REGION'] = 'us-east-1'
-
-
-@pytest.fixture
-def dynamodb_table(aws_credentials):
-    """Create a mock DynamoDB table for testing"""
-    with mock_aws():
-        # Set environment variable for table name
-        os.environ['DYNAMODB_TABLE_NAME'] = 'test-table'
-        
-        # Create DynamoDB resource
-        dynamodb = boto3.resource('dynamodb', region_name='us-east-1')
-        
-        # Create table
-        table = dynamodb.create_table(
-            TableName='test-table',
-            KeySchema=[
-                {'AttributeName': 'id', 'KeyType': 'HASH'}
-            ],
-            AttributeDefinitions=[
-                {'AttributeName': 'id', 'AttributeType': 'S'},
-                {'AttributeName': 'name', 'AttributeType': 'S'}
-            ],
-            GlobalSecondaryIndexes=[
-                {
-                    'IndexName': 'NameIndex',
-                    'KeySchema': [
-                        {'AttributeName': 'name', 'KeyType': 'HASH'}
-                    ],
-                    'Projection': {'ProjectionType': 'ALL'}
-                }
-            ],
-            BillingMode='PAY_PER_REQUEST'
-        )
-        
-        # Reset DynamoDB connection to force re-initialization with mocked resource
-        DynamoDBConnection._table = None
-        DynamoDBConnection._table_name = None
-        
-        yield table
-        
-        # Cleanup
-        if 'DYNAMODB_TABLE_NAME' in os.environ:
-            del os.environ['DYNAMODB_TABLE_NAME']
+def _one_hour_ago():
+    """Return a UTC ISO 8601 timestamp one hour in the past"""
+    return (datetime.now(timezone.utc) - timedelta(hours=1)).isoformat()
 
 
 class TestRepositoryIntegration:
@@ -121,6 +78,57 @@ class TestRepositoryIntegration:
         assert len(results) == 3
         assert all(isinstance(e, Entry) for e in results)
     
+    def test_get_all_reads_every_scan_page(self, dynamodb_table):
+        """Test listing follows LastEvaluatedKey past the 1 MB scan page limit"""
+        repository = Repository()
+        # Names are GSI keys (at most 2048 bytes), so use many entries to pass 1 MB
+        repository.create_many(Entry(name=f"{i:04d}" + "x" * 2000, value=i) for i in range(600))
+        
+        entries = repository.get_all()
+        
+        assert 'LastEvaluatedKey' in dynamodb_table.scan()
+        assert sorted(entry.value for entry in entries) == list(range(600))
+    
+    def test_create_sets_ttl_attribute(self, dynamodb_table, monkeypatch):
+        """Test ENTRY_TTL_SECONDS stamps expires_at relative to created_at"""
+        monkeypatch.setenv('ENTRY_TTL_SECONDS', '3600')
+        repository = Repository()
+        
+        created = repository.create(Entry(name="Expiring", value=1, created_at="2025-01-01T00:00:00+00:00"))
+        without_ttl = Repository(ttl_seconds=0).create(Entry(name="Forever", value=2))
+        
+        item = dynamodb_table.get_item(Key={'id': created.id})['Item']
+        assert int(item['expires_at']) == 1735689600 + 3600
+        assert 'expires_at' not in dynamodb_table.get_item(Key={'id': without_ttl.id})['Item']
+    
+    def test_purge_deletes_expired_entries(self, dynamodb_table):
+        """Test purge removes entries past expires_at across scan segments"""
+        expiring = Repository(scan_segments=3, ttl_seconds=60)
+        expired = expiring.create_many(
+            Entry(name=f"Expired {i}", value=i, created_at="2020-01-01T00:00:00+00:00") for i in range(40)
+        )
+        alive = expiring.create(Entry(name="Alive", value=1))
+        kept = Repository(ttl_seconds=0).create(Entry(name="No TTL", value=2))
+        
+        result = expiring.purge(rate_limit=1000)
+        
+        assert (result.deleted, result.continuation_token) == (40, None)
+        assert expiring.get_by_id(expired[0].id) is None
+        assert {e.id for e in expiring.get_all()} == {alive.id, kept.id}
+    
+    def test_purge_rate_limit(self, dynamodb_table, monkeypatch):
+        """Test every delete takes a token from the shared rate limiter"""
+        acquired = []
+        monkeypatch.setattr('src.repository.repository.TokenBucket.acquire',
+                            lambda self, tokens=1.0, max_wait=None: acquired.append(self.rate) or True)
+        repository = Repository(ttl_seconds=1)
+        repository.create_many(
+            Entry(name="Expired", value=i, created_at="2020-01-01T00:00:00+00:00") for i in range(5)
+        )
+        
+        assert repository.purge(rate_limit=25).deleted == 5
+        assert acquired == [25] * 5
+    
     def test_update_entry(self, dynamodb_table):
         """Test updating an entry"""
         repository = Repository()
@@ -152,6 +160,14 @@ class TestRepositoryIntegration:
         assert updated.name == "Updated Name"
         assert updated.value == 10  # Should remain unchanged
     
+    def test_update_missing_entry(self, dynamodb_table):
+        """Test updating an unknown ID returns None without creating an item"""
+        repository = Repository()
+        
+        assert repository.update('missing-id', name="Ghost", value=1) is None
+        assert repository.get_by_id('missing-id') is None
+        assert dynamodb_table.scan()['Count'] == 0
+    
     def test_delete_entry(self, dynamodb_table):
         """Test deleting an entry"""
         repository = Repository()
@@ -176,6 +192,466 @@ class TestRepositoryIntegration:
         result = repository.delete("non-existent-id")
         
         assert result is False
+    
+    def test_get_changed_since(self, dynamodb_table):
+        """Test only entries updated after the cursor are returned"""
+        repository = Repository()
+        
+        first = repository.create(Entry(name="Entry 1", value=10))
+        repository.create(Entry(name="Entry 2", value=20))
+        baseline = repository.get_changed_since(_one_hour_ago())
+        
+        updated = repository.update(first.id, value=11)
+        changes = repository.get_changed_since(baseline.cursor)
+        
+        assert len(baseline.entries) == 2
+        assert [e.id for e in changes.entries] == [first.id]
+        assert changes.entries[0].value == 11
+        assert changes.cursor == updated.updated_at
+        assert changes.has_more is False
+    
+    def test_get_changed_since_with_limit(self, dynamodb_table):
+        """Test limit returns the oldest changes and a resumable cursor"""
+        repository = Repository()
+        
+        created = [repository.create(Entry(name=f"Entry {i}", value=i)) for i in range(3)]
+        
+        first_page = repository.get_changed_since(_one_hour_ago(), limit=2)
+        second_page = repository.get_changed_since(first_page.cursor, limit=2)
+        
+        assert [e.id for e in first_page.entries] == [c.id for c in created[:2]]
+        assert first_page.has_more is True
+        assert [e.id for e in second_page.entries] == [created[2].id]
+        assert second_page.has_more is False
+    
+    def test_snapshot_delta_refresh(self, dynamodb_table, tmp_path):
+        """Test a stale snapshot picks up changes through the UpdatedAtIndex"""
+        table = Repository()
+        first = table.create(Entry(name="Entry 1", value=1))
+        cache = SnapshotCache(str(tmp_path / 'entries.snapshot'), max_staleness=0)
+        repository = SnapshotRepository(table, cache)
+        assert [e.id for e in repository.get_all()] == [first.id]
+        
+        table.update(first.id, value=2)
+        second = table.create(Entry(name="Entry 2", value=3))
+        
+        assert {e.id: e.value for e in repository.get_all()} == {first.id: 2, second.id: 3}
+
+
+    def test_bulk_update_scan_segments_with_token(self, dynamodb_table):
+        """Test a filtered parallel scan bulk update resumes every segment from its token"""
+        repository = Repository(scan_segments=3)
+        repository.create_many(Entry(name=f"Entry {i}", value=i % 2) for i in range(40))
+        
+        runs, token = [], None
+        while True:
+            result = repository.bulk_update({'value': 7}, max_value=0, limit=6,
+                                            continuation_token=token, rate_limit=0)
+            runs.append(result.matched)
+            token = result.continuation_token
+            if token is None:
+                break
+        
+        assert sum(runs) == 20
+        assert all(matched <= 6 for matched in runs)
+        assert sorted(e.value for e in repository.get_all()) == [1] * 20 + [7] * 20
+    
+    def test_bulk_update_skips_entries_that_stopped_matching(self, dynamodb_table, monkeypatch):
+        """Test the conditional update re-checks the predicate for each match"""
+        repository = Repository()
+        entry = repository.create(Entry(name="Team A", value=1))
+        
+        class RenamingTable:
+            """Renames the entry after the index lists it, like a concurrent writer"""
+            def __getattr__(self, name):
+                return getattr(dynamodb_table, name)
+            
+            def query(self, **kwargs):
+                response = dynamodb_table.query(**kwargs)
+                dynamodb_table.update_item(Key={'id': entry.id}, UpdateExpression='SET #n = :n',
+                                           ExpressionAttributeNames={'#n': 'name'},
+                                           ExpressionAttributeValues={':n': 'Team B'})
+                return response
+        monkeypatch.setattr(Repository, 'table', property(lambda self: RenamingTable()))
+        
+        result = repository.bulk_update({'value': 0}, name="Team A", rate_limit=0)
+        
+        assert (result.matched, result.updated) == (1, 0)
+        assert dynamodb_table.get_item(Key={'id': entry.id})['Item']['value'] == 1
+    
+    def test_bulk_update_rate_limit_and_token_checks(self, dynamodb_table, monkeypatch):
+        """Test every update takes a token and tokens are bound to their predicate"""
+        acquired = []
+        monkeypatch.setattr('src.repository.repository.TokenBucket.acquire',
+                            lambda self, tokens=1.0, max_wait=None: acquired.append(self.rate) or True)
+        repository = Repository()
+        repository.create_many(Entry(name="Team A", value=i) for i in range(3))
+        
+        result = repository.bulk_update({'value': 0}, name="Team A", limit=2, rate_limit=50)
+        
+        assert acquired == [50, 50]
+        with pytest.raises(ValueError, match="does not match"):
+            repository.bulk_update({'value': 0}, name="Team B", continuation_token=result.continuation_token)
+        with pytest.raises(ValueError, match="Invalid continuation token"):
+            repository.bulk_update({'value': 0}, name="Team A", continuation_token="not-a-token")
+    
+    def test_throttled_writes_are_journaled_and_flushed(self, dynamodb_table, monkeypatch, tmp_path):
+        """Test throttled writes are journaled, later writes queue behind them, and a flush applies them"""
+        existing = Repository().create(Entry(name="Existing", value=1))
+        throttled = {'put_item', 'update_item'}
+        
+        class ThrottledTable:
+            """Throttles the listed single-item writes"""
+            def __getattr__(self, name):
+                if name in throttled:
+                    def throttle(**kwargs):
+                        raise ThrottledError("Throttled by DynamoDB")
+                    return throttle
+                return getattr(dynamodb_table, name)
+        monkeypatch.setattr(Repository, 'table', property(lambda self: ThrottledTable()))
+        repository = Repository(journal=WriteJournal(str(tmp_path / 'journal.jsonl')))
+        
+        with pytest.raises(WriteDeferredError) as created:
+            repository.create(Entry(name="New", value=2))
+        with pytest.raises(WriteDeferredError):
+            repository.update(existing.id, value=5)
+        throttled.clear()
+        # Pending ids stay journaled even once DynamoDB accepts writes again
+        new_id = created.value.entry_id
+        with pytest.raises(WriteDeferredError):
+            repository.update(new_id, name="Renamed")
+        
+        assert len(repository.journal) == 3
+        assert repository.flush_journal() == 2
+        assert len(repository.journal) == 0
+        assert dynamodb_table.get_item(Key={'id': existing.id})['Item']['value'] == 5
+        item = dynamodb_table.get_item(Key={'id': new_id})['Item']
+        assert (item['name'], item['value']) == ("Renamed", 2)
+        assert repository.update(new_id, value=3).value == 3
+    
+    def test_journaled_entries_are_read_and_deleted_in_order(self, dynamodb_table, monkeypatch, tmp_path):
+        """Test reads of a journaled entry see its writes and a delete is not undone by the flush"""
+        class ThrottledTable:
+            """Throttles puts"""
+            def __getattr__(self, name):
+                return getattr(dynamodb_table, name)
+            
+            def put_item(self, **kwargs):
+                raise ThrottledError("Throttled by DynamoDB")
+        monkeypatch.setattr(Repository, 'table', property(lambda self: ThrottledTable()))
+        repository = Repository(journal=WriteJournal(str(tmp_path / 'journal.jsonl')))
+        stored = repository.create_many([Entry(name="Stored", value=1)])[0]
+        repository.journal.append({'op': 'update', 'id': stored.id, 'name': "Renamed", 'value': None,
+                                   'updated_at': _one_hour_ago()})
+        
+        with pytest.raises(WriteDeferredError) as created:
+            repository.create(Entry(name="New", value=2))
+        new_id = created.value.entry_id
+        
+        assert (repository.get_by_id(new_id).name, repository.get_by_id(new_id).value) == ("New", 2)
+        assert (repository.get_by_id(stored.id).name, repository.get_by_id(stored.id).value) == ("Renamed", 1)
+        with pytest.raises(WriteDeferredError):
+            repository.delete(new_id)
+        assert repository.get_by_id(new_id) is None
+        
+        assert repository.flush_journal() == 2
+        assert 'Item' not in dynamodb_table.get_item(Key={'id': new_id})
+        assert dynamodb_table.get_item(Key={'id': stored.id})['Item']['name'] == "Renamed"
+    
+    def test_flush_stops_at_deadline(self, dynamodb_table, tmp_path):
+        """Test a flush past its deadline keeps the journaled writes for a later invocation"""
+        repository = Repository(journal=WriteJournal(str(tmp_path / 'journal.jsonl')))
+        repository.journal.append({'op': 'put', 'item': repository._to_item(Entry(name="First", value=1))})
+        repository.journal.append({'op': 'update', 'id': 'other', 'name': None, 'value': 1,
+                                   'updated_at': _one_hour_ago()})
+        # The put passes the check; the update does not
+        deadline = Deadline(1.5, clock=itertools.count().__next__)
+        
+        assert repository.flush_journal(deadline=deadline) == 1
+        assert len(repository.journal) == 1
+        assert dynamodb_table.scan()['Count'] == 1
+    
+    def test_throttled_flush_keeps_remaining_writes(self, dynamodb_table, monkeypatch, tmp_path):
+        """Test a flush stops at the first throttled write and keeps it and the rest"""
+        repository = Repository(journal=WriteJournal(str(tmp_path / 'journal.jsonl')))
+        repository.journal.append({'op': 'update', 'id': 'missing', 'name': None, 'value': 1,
+                                   'updated_at': _one_hour_ago()})
+        repository.journal.append({'op': 'update', 'id': 'blocked', 'name': None, 'value': 1,
+                                   'updated_at': _one_hour_ago()})
+        repository.journal.append({'op': 'put', 'item': repository._to_item(Entry(name="Later", value=1))})
+        calls = []
+        
+        def update_item(**kwargs):
+            calls.append(kwargs['Key']['id'])
+            if kwargs['Key']['id'] == 'blocked':
+                raise ThrottledError("Throttled by DynamoDB")
+            return dynamodb_table.update_item(**kwargs)
+        monkeypatch.setattr(Repository, 'table', property(
+            lambda self: type('Table', (), {'update_item': staticmethod(update_item),
+                                            'meta': dynamodb_table.meta})()))
+        
+        # The update to a missing entry is applied as a no-op
+        assert repository.flush_journal() == 1
+        assert calls == ['missing', 'blocked']
+        assert WriteJournal(repository.journal.path)._operations[0]['id'] == 'blocked'
+        assert len(repository.journal) == 2
+        assert dynamodb_table.scan()['Count'] == 0
+    
+    def test_list_stops_at_deadline_and_resumes(self, dynamodb_table, monkeypatch):
+        """Test a list past its deadline returns the pages read so far and a token for the rest"""
+        Repository().create_many(Entry(name=f"Entry {i}", value=i) for i in range(5))
+        
+        class PagedTable:
+            """Returns two items per scan page"""
+            def __getattr__(self, name):
+                return getattr(dynamodb_table, name)
+            
+            def scan(self, **kwargs):
+                return dynamodb_table.scan(Limit=2, **kwargs)
+        monkeypatch.setattr(Repository, 'table', property(lambda self: PagedTable()))
+        handler = Handler(Service(Repository()))
+        # Expires at the first check, after the first page
+        deadline = Deadline(0.5, clock=itertools.count().__next__)
+        
+        first = json.loads(handler.handle({'action': 'list'}, deadline=deadline)['body'])
+        rest = json.loads(handler.handle({
+            'action': 'list', 'data': {'continuation_token': first['continuation_token']}
+        })['body'])
+        invalid = handler.handle({'action': 'list', 'data': {'continuation_token': 'not-a-token'}})
+        
+        assert len(first['data']) == 2
+        assert 'continuation_token' not in rest
+        assert sorted(e['value'] for e in first['data'] + rest['data']) == [0, 1, 2, 3, 4]
+        assert invalid['statusCode'] == 400
+    
+    def test_bulk_update_stops_at_deadline(self, dynamodb_table):
+        """Test updates stop at the deadline and the token resumes after the last one made"""
+        repository = Repository()
+        repository.create_many(Entry(name="Team A", value=i + 1) for i in range(5))
+        # The page read and two updates pass the check; the third update does not
+        deadline = Deadline(3.5, clock=itertools.count().__next__)
+        
+        first = repository.bulk_update({'value': 0}, name="Team A", concurrency=1, rate_limit=0,
+                                       deadline=deadline)
+        rest = repository.bulk_update({'value': 0}, name="Team A", rate_limit=0,
+                                      continuation_token=first.continuation_token)
+        
+        assert (first.matched, first.updated) == (2, 2)
+        assert first.continuation_token is not None
+        assert (rest.matched, rest.updated, rest.continuation_token) == (3, 3, None)
+        assert [e.value for e in repository.get_all()] == [0] * 5
+    
+    def test_bulk_update_resumes_from_first_skipped_match(self, dynamodb_table):
+        """Test a match skipped before one that ran is not lost from the token"""
+        class ScriptedDeadline:
+            """Expires for the second and fourth updates, like workers racing the deadline"""
+            checks = [False, False, True, False, True]
+            
+            def expired(self):
+                return self.checks.pop(0) if self.checks else True
+        
+        repository = Repository()
+        repository.create_many(Entry(name="Team A", value=i + 1) for i in range(5))
+        
+        first = repository.bulk_update({'value': 0}, name="Team A", concurrency=1, rate_limit=0,
+                                       deadline=ScriptedDeadline())
+        rest = repository.bulk_update({'value': 0}, name="Team A", rate_limit=0,
+                                      continuation_token=first.continuation_token)
+        
+        assert (first.matched, first.updated) == (1, 1)
+        assert (rest.matched, rest.updated, rest.continuation_token) == (4, 4, None)
+        assert [e.value for e in repository.get_all()] == [0] * 5
+    
+    def test_bulk_update_checks_deadline_after_rate_limit(self, dynamodb_table, monkeypatch):
+        """Test an update waiting for a token past the deadline is not made"""
+        now = [0]
+        deadline = Deadline(1, clock=lambda: now[0])
+        # The wait for the first token uses up the deadline
+        monkeypatch.setattr('src.repository.repository.TokenBucket.acquire',
+                            lambda self, tokens=1.0, max_wait=None: now.append(now.pop() + 2) or True)
+        repository = Repository()
+        repository.create_many(Entry(name="Team A", value=i + 1) for i in range(2))
+        
+        result = repository.bulk_update({'value': 0}, name="Team A", concurrency=1, rate_limit=50,
+                                        deadline=deadline)
+        
+        assert (result.matched, result.updated) == (0, 0)
+        assert result.continuation_token is not None
+        assert sorted(e.value for e in repository.get_all()) == [1, 2]
+    
+    def test_purge_stops_at_deadline(self, dynamodb_table):
+        """Test a purge past its deadline returns what it deleted and a token for the rest"""
+        repository = Repository(scan_segments=1, ttl_seconds=1)
+        repository.create_many(
+            Entry(name="Expired", value=i, created_at="2020-01-01T00:00:00+00:00") for i in range(5)
+        )
+        # The page read and two deletes pass the check; the third delete does not
+        deadline = Deadline(3.5, clock=itertools.count().__next__)
+        
+        first = repository.purge(rate_limit=0, deadline=deadline)
+        rest = repository.purge(rate_limit=0, continuation_token=first.continuation_token)
+        
+        assert first.deleted == 2
+        assert first.continuation_token is not None
+        assert (rest.deleted, rest.continuation_token) == (3, None)
+        assert repository.count() == 0
+        with pytest.raises(ValueError):
+            repository.purge(continuation_token=first.continuation_token[:-4])
+    
+    @pytest.mark.parametrize('action, data', [
+        ('get', {}),
+        ('update', {'value': 2}),
+        ('delete', {}),
+    ])
+    def test_throttled_single_entry_calls_return_429(self, dynamodb_table, monkeypatch, action, data):
+        """Test get, update and delete of an existing entry report throttling, not a missing entry"""
+        entry = Repository().create(Entry(name="Existing", value=1))
+        
+        class ThrottledTable:
+            """Throttles every single-item call, like an open circuit breaker"""
+            def __getattr__(self, name):
+                if name in ('get_item', 'update_item', 'delete_item'):
+                    def throttle(**kwargs):
+                        raise ThrottledError("DynamoDB circuit breaker is open", retry_after=5)
+                    return throttle
+                return getattr(dynamodb_table, name)
+        monkeypatch.setattr(Repository, 'table', property(lambda self: ThrottledTable()))
+        handler = Handler(service=Service(Repository()))
+        
+        response = handler.handle({'action': action, 'data': {'id': entry.id, **data}})
+        
+        assert response['statusCode'] == 429
+        assert json.loads(response['body'])['retry_after_seconds'] == 5
+        assert dynamodb_table.get_item(Key={'id': entry.id})['Item']['value'] == 1
+    
+    def test_batch_create_throttled_midway_reports_written_ids(self, dynamodb_table, monkeypatch):
+        """Test a batch throttled after some writes returns their IDs instead of a 429"""
+        client = dynamodb_table.meta.client
+        calls = []
+        
+        def batch_write_item(RequestItems):
+            calls.append(len(RequestItems['test-table']))
+            requests = RequestItems['test-table']
+            if len(calls) == 2:
+                # Write the last 20; leave the first 5 unprocessed
+                client.batch_write_item(RequestItems={'test-table': requests[5:]})
+                return {'UnprocessedItems': {'test-table': requests[:5]}}
+            if len(calls) == 3:
+                raise ThrottledError("Throttled by DynamoDB")
+            return client.batch_write_item(RequestItems=RequestItems)
+        
+        class ThrottledTable:
+            meta = type('Meta', (), {'client': type('Client', (), {
+                'batch_write_item': staticmethod(batch_write_item)})()})()
+        monkeypatch.setattr(Repository, 'table', property(lambda self: ThrottledTable()))
+        handler = Handler(service=Service(Repository()))
+        entries = [{'name': f"Entry {i}", 'value': i} for i in range(60)]
+        
+        response = handler.handle({'action': 'batch_create', 'data': {'entries': entries}})
+        
+        data = json.loads(response['body'])['data']
+        assert response['statusCode'] == 200
+        assert calls == [25, 25, 5]
+        assert (data['created'], data['unprocessed']) == (45, 15)
+        assert len(data['ids']) == 50
+        assert data['ids'][25:30] == [None] * 5
+        written = {item['id']: int(item['value']) for item in dynamodb_table.scan()['Items']}
+        assert written == {entry_id: i for i, entry_id in enumerate(data['ids']) if entry_id}
+    
+    def test_batch_create_throttled_at_once_returns_429(self, dynamodb_table, monkeypatch):
+        """Test a batch throttled before any write still fails fast with a 429"""
+        def batch_write_item(RequestItems):
+            raise ThrottledError("Throttled by DynamoDB")
+        
+        class ThrottledTable:
+            meta = type('Meta', (), {'client': type('Client', (), {
+                'batch_write_item': staticmethod(batch_write_item)})()})()
+        monkeypatch.setattr(Repository, 'table', property(lambda self: ThrottledTable()))
+        handler = Handler(service=Service(Repository()))
+        
+        response = handler.handle({'action': 'batch_create', 'data': {'entries': [{'name': "A", 'value': 1}]}})
+        
+        assert response['statusCode'] == 429
+        assert dynamodb_table.scan()['Count'] == 0
+    
+    def test_create_many_stops_at_deadline(self, dynamodb_table):
+        """Test a batch past its deadline stops between BatchWriteItem requests"""
+        repository = Repository()
+        deadline = Deadline(1.5, clock=itertools.count().__next__)
+        
+        created = repository.create_many((Entry(name="Entry", value=i) for i in range(60)),
+                                         deadline=deadline)
+        
+        assert [entry.value for entry in created] == list(range(25))
+        assert repository.count() == 25
+    
+    def test_count_scans_segments_in_parallel(self, dynamodb_table):
+        """Test count sums COUNT scans over every segment without reading items"""
+        repository = Repository(scan_segments=3)
+        repository.create_many(Entry(name=f"Entry {i}", value=i) for i in range(25))
+        
+        pages = repository.parallel_scan(lambda response: response, Select='COUNT')
+        
+        assert repository.count() == 25
+        assert sum(page['Count'] for page in pages) == 25
+        assert all('Items' not in page for page in pages)
+        assert len(pages) >= 3
+    
+    def test_parallel_scan_single_segment(self, dynamodb_table):
+        """Test a single segment scans the table without TotalSegments"""
+        repository = Repository(scan_segments=1)
+        repository.create(Entry(name="Entry", value=1))
+        
+        assert repository.count() == 1
+    
+    def test_scan_segments_from_env(self, dynamodb_table, monkeypatch):
+        """Test DYNAMODB_SCAN_SEGMENTS configures the default segment count"""
+        monkeypatch.setenv('DYNAMODB_SCAN_SEGMENTS', '8')
+        
+        assert Repository().scan_segments == 8
+        with pytest.raises(ValueError):
+            Repository(scan_segments=0)
+
+
+class TestConnectionConcurrency:
+    """Stress tests for sharing one connection across many threads"""
+    
+    def test_threads_get_own_table_over_shared_client(self, dynamodb_table):
+        """Test each thread gets its own Table bound to the shared client"""
+        tables = []
+        # Keep every thread alive until all have their table
+        barrier = threading.Barrier(4)
+        
+        def grab():
+            tables.append(DynamoDBConnection.get_table())
+            barrier.wait()
+        
+        threads = [threading.Thread(target=grab) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        assert len({id(table) for table in tables}) == 4
+        assert all(table.meta.client is DynamoDBConnection.get_client() for table in tables)
+    
+    def test_parallel_repository_calls(self, dynamodb_table):
+        """Test many threads sharing one Repository create, read and update safely"""
+        repository = Repository()
+        
+        def work(i):
+            created = repository.create(Entry(name=f"Entry {i}", value=i))
+            fetched = repository.get_by_id(created.id)
+            updated = repository.update(created.id, value=i + 1000)
+            return created.id, fetched.value, updated.value
+        
+        with ThreadPoolExecutor(max_workers=32) as executor:
+            results = list(executor.map(work, range(200)))
+        
+        assert [(fetched, updated) for _, fetched, updated in results] == [
+            (i, i + 1000) for i in range(200)
+        ]
+        assert len(repository.get_all()) == 200
 
 
 class TestServiceIntegration:
@@ -220,6 +696,19 @@ class TestServiceIntegration:
         
         assert len(results) == 2
     
+    def test_list_changed_since(self, dynamodb_table):
+        """Test listing changes through service with a naive timestamp"""
+        repository = Repository()
+        service = Service(repository)
+        
+        created = service.create_test_entry(name="Entry 1", value=10)
+        
+        since = (datetime.now(timezone.utc) - timedelta(hours=1)).replace(tzinfo=None)
+        changes = service.list_changed_since(since.isoformat())
+        
+        assert [e.id for e in changes.entries] == [created.id]
+        assert changes.cursor == created.updated_at
+    
     def test_update_entry(self, dynamodb_table):
         """Test updating entry through service"""
         repository = Repository()
@@ -0,0 +1,99 @@
+"""
+Integration tests for the PostgreSQL backend (docker-compose postgres-test)
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+psycopg2 = pytest.importorskip('psycopg2')
+
+from src.database.postgres import PostgresConnection  # noqa: E402
+from src.model.models import Entry  # noqa: E402
+
+
+class TestPostgresRepositoryIntegration:
+    """PostgreSQL-specific behaviour: COPY, keyset pagination and pooling"""
+
+    def test_create_many_escapes_copy_fields(self, postgres_repository):
+        """Test COPY round-trips names with tabs, newlines and backslashes"""
+        name = "Tab\there\nnew line \\ backslash"
+
+        created = postgres_repository.create_many([Entry(name=name, value=7)])
+
+        assert postgres_repository.get_by_id(created[0].id).name == name
+
+    def test_keyset_pagination(self, postgres_repository):
+        """Test pages follow ID order without gaps or repeats"""
+        created = postgres_repository.create_many(
+            Entry(id=f"id-{i:03d}", name="Entry", value=i) for i in range(25)
+        )
+
+        first, after = postgres_repository.get_page(limit=10)
+        second, after = postgres_repository.get_page(after, limit=10)
+        third, after = postgres_repository.get_page(after, limit=10)
+
+        ids = [entry.id for entry in first + second + third]
+        assert ids == sorted(entry.id for entry in created)
+        assert after is None
+
+    def test_pool_survives_warm_invocations(self, postgres_repository):
+        """Test re-initialization keeps the pool and its prepared statements"""
+        created = postgres_repository.create(Entry(name="Warm", value=1))
+        pool = PostgresConnection._pool
+
+        PostgresConnection.initialize()
+        with PostgresConnection.connection() as conn:
+            prepared = set(conn.prepared)
+
+        assert PostgresConnection._pool is pool
+        assert {'entry_put'} <= prepared
+        assert postgres_repository.get_by_id(created.id).name == "Warm"
+
+    def test_recovers_from_dropped_connection(self, postgres_repository):
+        """Test a connection killed while frozen is replaced transparently"""
+        created = postgres_repository.create(Entry(name="Reconnect", value=1))
+        with PostgresConnection.connection() as conn:
+            pid = conn.get_backend_pid()
+        admin = psycopg2.connect(PostgresConnection._dsn)
+        admin.autocommit = True
+        admin.cursor().execute("SELECT pg_terminate_backend(%s)", (pid,))
+        admin.close()
+
+        assert postgres_repository.get_by_id(created.id).name == "Reconnect"
+
+    def test_writes_are_not_retried_on_dropped_connection(self, postgres_repository):
+        """Test a non-idempotent write surfaces the dropped connection instead of repeating"""
+        with PostgresConnection.connection() as conn:
+            pid = conn.get_backend_pid()
+        admin = psycopg2.connect(PostgresConnection._dsn)
+        admin.autocommit = True
+        admin.cursor().execute("SELECT pg_terminate_backend(%s)", (pid,))
+        admin.close()
+
+        with pytest.raises((psycopg2.OperationalError, psycopg2.InterfaceError)):
+            postgres_repository.create_many([Entry(name="Once", value=1)])
+        assert postgres_repository.count() == 0
+
+    def test_callers_wait_for_a_free_connection(self, postgres_repository, monkeypatch):
+        """Test more parallel callers than POSTGRES_POOL_MAX wait instead of raising PoolError"""
+        monkeypatch.setenv('POSTGRES_POOL_MAX', '2')
+        PostgresConnection.reset()
+        PostgresConnection.initialize()
+
+        def slow_query(_):
+            return postgres_repository._run(lambda conn: postgres_repository._scalar(
+                conn, "SELECT 1 FROM pg_sleep(0.05)", ()
+            ))
+
+        with ThreadPoolExecutor(max_workers=6) as executor:
+            results = list(executor.map(slow_query, range(6)))
+
+        assert results == [1] * 6
+
+    def test_dsn_is_required(self, monkeypatch):
+        """Test the pool refuses to start without POSTGRES_DSN"""
+        monkeypatch.delenv('POSTGRES_DSN', raising=False)
+        PostgresConnection.reset()
+
+        with pytest.raises(ValueError, match="POSTGRES_DSN"):
+            PostgresConnection.initialize()
@@ -0,0 +1,296 @@
+"""
+Parity tests run against every repository backend
+"""
+import itertools
+import json
+import pytest
+from datetime import datetime, timedelta, timezone
+
+from src.database.database import Deadline
+from src.messaging.encoding import GZIP_BASE64, encode_data
+from src.messaging.handler import Handler
+from src.repository.memory_repository import InMemoryRepository
+from src.repository.repository import Repository
+from src.service.service import Service
+from src.model.models import Entry
+from src.repository.errors import TransactionCancelledError
+
+
+@pytest.fixture(params=['dynamodb', 'memory', 'postgres'])
+def repository(request):
+    """Create a repository for each backend"""
+    if request.param == 'dynamodb':
+        request.getfixturevalue('dynamodb_table')
+        return Repository()
+    if request.param == 'postgres':
+        return request.getfixturevalue('postgres_repository')
+    return InMemoryRepository()
+
+
+class TestRepositoryParity:
+    """Behaviour every Repository backend must share"""
+
+    def test_create_and_get(self, repository):
+        """Test created entries can be read back"""
+        created = repository.create(Entry(name="Test", value=42))
+
+        result = repository.get_by_id(created.id)
+
+        assert result == created
+        assert result.created_at == result.updated_at
+
+    def test_create_many(self, repository):
+        """Test bulk creates stamp and store every entry"""
+        created = repository.create_many(Entry(name=f"Entry {i}", value=i) for i in range(30))
+
+        assert len(created) == 30
+        assert all(entry.id and entry.updated_at for entry in created)
+        assert repository.get_by_id(created[29].id) == created[29]
+        assert len(repository.get_all()) == 30
+
+    def test_get_missing(self, repository):
+        """Test missing entries return None"""
+        assert repository.get_by_id("missing") is None
+
+    def test_get_all(self, repository):
+        """Test all entries are listed"""
+        ids = {repository.create(Entry(name=f"Entry {i}", value=i)).id for i in range(3)}
+
+        assert {entry.id for entry in repository.get_all()} == ids
+
+    def test_iter_all_resumes_after_deadline(self, repository):
+        """Test listings stopped by their deadline continue with the token, reading every entry once"""
+        ids = [entry.id for entry in repository.create_many(Entry(name=f"Entry {i}", value=i) for i in range(5))]
+        seen = []
+        token = None
+        while True:
+            # Already past the deadline: each listing reads as little as it can
+            stream = repository.iter_all(continuation_token=token,
+                                         deadline=Deadline(0, clock=itertools.count().__next__))
+            seen.extend(entry.id for entry in stream)
+            token = stream.continuation_token
+            if token is None:
+                break
+
+        assert sorted(seen) == sorted(ids)
+
+    def test_scan_ids(self, repository):
+        """Test every ID is read, in pages passed to the callback"""
+        ids = {entry.id for entry in repository.create_many(Entry(name=f"Entry {i}", value=i) for i in range(30))}
+
+        pages = repository.scan_ids(lambda page: page)
+
+        assert {entry_id for page in pages for entry_id in page} == ids
+
+    def test_count(self, repository):
+        """Test counting all entries and entries with a name"""
+        repository.create_many(Entry(name=f"Team {i % 3}", value=i) for i in range(10))
+
+        assert repository.count() == 10
+        assert repository.count(name="Team 0") == 4
+        assert repository.count(name="Team 9") == 0
+
+    def test_purge_created_before(self, repository):
+        """Test purge deletes only entries created before the cutoff"""
+        old = repository.create(Entry(name="Old", value=1, created_at="2020-01-01T00:00:00+00:00"))
+        new = repository.create(Entry(name="New", value=2))
+        cutoff = (datetime.now(timezone.utc) - timedelta(days=1)).isoformat()
+
+        assert repository.purge(created_before=cutoff).to_dict() == {
+            'deleted': 1, 'continuation_token': None, 'has_more': False
+        }
+        assert repository.get_by_id(old.id) is None
+        assert repository.get_by_id(new.id) == new
+        assert repository.purge(created_before=cutoff).deleted == 0
+
+    def test_purge_expired_entries(self, repository):
+        """Test purge deletes entries past their TTL, with or without a cutoff"""
+        kept = repository.create(Entry(name="No TTL", value=1, created_at="2020-01-01T00:00:00+00:00"))
+        repository.ttl_seconds = 3600
+        expired = repository.create_many(
+            Entry(name="Expired", value=i, created_at="2020-01-01T00:00:00+00:00") for i in range(3)
+        )
+        alive = repository.create(Entry(name="Alive", value=2))
+
+        assert repository.purge().deleted == 3
+        assert repository.get_by_id(expired[0].id) is None
+        assert {e.id for e in repository.get_all()} == {kept.id, alive.id}
+        assert repository.purge().deleted == 0
+
+    def test_get_value_columns(self, repository):
+        """Test every entry's name and value are read into the columns"""
+        repository.create_many(Entry(name=f"Team {i % 3}", value=i) for i in range(30))
+
+        columns = repository.get_value_columns()
+
+        rows = sorted((columns.names[code], value) for code, value in zip(columns.name_codes, columns.values))
+        assert rows == sorted((f"Team {i % 3}", i) for i in range(30))
+        assert sorted(columns.names) == ["Team 0", "Team 1", "Team 2"]
+
+    def test_update(self, repository):
+        """Test partial updates keep other fields and bump updated_at"""
+        created = repository.create(Entry(name="Original", value=10))
+
+        updated = repository.update(created.id, name="Updated")
+
+        assert updated.name == "Updated"
+        assert updated.value == 10
+        assert updated.updated_at > created.updated_at
+        assert repository.get_by_id(created.id) == updated
+
+    def test_update_missing(self, repository):
+        """Test updating a missing entry returns None and creates nothing"""
+        assert repository.update("missing", value=1) is None
+        assert repository.get_by_id("missing") is None
+
+    def test_transact_update(self, repository):
+        """Test transactional updates apply every change with one timestamp"""
+        first = repository.create(Entry(name="First", value=1))
+        second = repository.create(Entry(name="Second", value=2))
+
+        results = repository.transact_update([
+            {'id': first.id, 'name': 'Renamed', 'value': None},
+            {'id': second.id, 'name': None, 'value': 20}
+        ])
+
+        assert [r['id'] for r in results] == [first.id, second.id]
+        assert repository.get_by_id(first.id).name == "Renamed"
+        assert repository.get_by_id(first.id).value == 1
+        assert repository.get_by_id(second.id).value == 20
+        assert repository.get_by_id(second.id).updated_at == results[1]['updated_at']
+
+    def test_transact_update_is_all_or_nothing(self, repository):
+        """Test a missing entry cancels the whole transaction"""
+        created = repository.create(Entry(name="Kept", value=1))
+
+        with pytest.raises(TransactionCancelledError) as error:
+            repository.transact_update([
+                {'id': created.id, 'name': None, 'value': 99},
+                {'id': 'missing', 'name': None, 'value': 1}
+            ])
+
+        assert error.value.failures() == [{'id': 'missing', 'reason': 'not_found'}]
+        assert repository.get_by_id(created.id) == created
+        assert repository.get_by_id('missing') is None
+
+    def test_bulk_update_by_name_resumes_with_token(self, repository):
+        """Test a bulk update stops at the limit and continues from its token"""
+        matching = [repository.create(Entry(name="Team A", value=i)) for i in range(5)]
+        other = repository.create(Entry(name="Team B", value=1))
+
+        first = repository.bulk_update({'name': None, 'value': 0}, name="Team A", limit=3)
+        second = repository.bulk_update({'name': None, 'value': 0}, name="Team A", limit=3,
+                                        continuation_token=first.continuation_token)
+
+        assert (first.matched, first.updated) == (3, 3)
+        assert first.continuation_token is not None
+        assert (second.matched, second.updated) == (2, 2)
+        assert second.continuation_token is None
+        assert [repository.get_by_id(e.id).value for e in matching] == [0] * 5
+        assert repository.get_by_id(other.id) == other
+
+    def test_bulk_update_by_value_range(self, repository):
+        """Test a value range alone matches through a filtered read"""
+        created = [repository.create(Entry(name="Entry", value=value)) for value in (5, 10, 15, 20)]
+
+        result = repository.bulk_update({'name': 'Mid', 'value': None}, min_value=10, max_value=15)
+
+        assert (result.matched, result.updated, result.continuation_token) == (2, 2, None)
+        assert [repository.get_by_id(e.id).name for e in created] == ["Entry", "Mid", "Mid", "Entry"]
+        assert repository.get_by_id(created[1].id).value == 10
+
+    def test_delete(self, repository):
+        """Test deleting removes the entry once"""
+        created = repository.create(Entry(name="To Delete", value=1))
+
+        assert repository.delete(created.id) is True
+        assert repository.delete(created.id) is False
+        assert repository.get_by_id(created.id) is None
+
+    def test_get_by_name(self, repository):
+        """Test the name index follows creates and renames"""
+        first = repository.create(Entry(name="Team A", value=1))
+        second = repository.create(Entry(name="Team A", value=2))
+        repository.create(Entry(name="Team B", value=3))
+        repository.update(second.id, name="Team B")
+
+        assert [e.id for e in repository.get_by_name("Team A")] == [first.id]
+        assert len(repository.get_by_name("Team B")) == 2
+        assert repository.get_by_name("Team C") == []
+
+    def test_get_by_value_range(self, repository):
+        """Test value ranges are inclusive and ordered by value"""
+        for value in (30, 10, 20, 40):
+            repository.create(Entry(name="Entry", value=value))
+
+        assert [e.value for e in repository.get_by_value_range(15, 30)] == [20, 30]
+        assert [e.value for e in repository.get_by_value_range(min_value=30)] == [30, 40]
+        assert [e.value for e in repository.get_by_value_range(max_value=10)] == [10]
+
+    def test_get_changed_since(self, repository):
+        """Test changes are returned oldest first with a resumable cursor"""
+        since = (datetime.now(timezone.utc) - timedelta(hours=1)).isoformat()
+        created = [repository.create(Entry(name=f"Entry {i}", value=i)) for i in range(3)]
+        repository.update(created[0].id, value=100)
+
+        first_page = repository.get_changed_since(since, limit=2)
+        second_page = repository.get_changed_since(first_page.cursor)
+
+        assert [e.id for e in first_page.entries] == [created[1].id, created[2].id]
+        assert first_page.has_more is True
+        assert [e.id for e in second_page.entries] == [created[0].id]
+        assert second_page.has_more is False
+
+    @pytest.mark.parametrize('limit', [None, 5])
+    def test_idle_cursor_advances(self, repository, limit):
+        """Test a query with no changes moves the cursor up to the query time, less the overlap"""
+        since = (datetime.now(timezone.utc) - timedelta(days=20)).isoformat()
+
+        before = datetime.now(timezone.utc) - timedelta(seconds=1)
+        idle = repository.get_changed_since(since, limit=limit)
+        after = datetime.now(timezone.utc) - timedelta(seconds=1)
+
+        assert idle.entries == []
+        assert before.isoformat() <= idle.cursor <= after.isoformat()
+
+    def test_idle_cursor_never_moves_back(self, repository):
+        """Test a cursor within the overlap of the query time is kept as it is"""
+        created = repository.create(Entry(name="Latest", value=1))
+
+        idle = repository.get_changed_since(created.updated_at)
+
+        assert idle.entries == []
+        assert idle.cursor == created.updated_at
+
+
+class TestHandlerParity:
+    """End-to-end Handler behaviour on every backend"""
+
+    def test_create_get_list(self, repository):
+        """Test the CRUD flow through Handler and Service"""
+        handler = Handler(service=Service(repository))
+
+        created = handler.handle({'action': 'create', 'data': {'name': 'Test', 'value': 1}})
+        entry_id = json.loads(created['body'])['data']['id']
+        fetched = handler.handle({'action': 'get', 'data': {'id': entry_id}})
+        listed = handler.handle({'action': 'list'})
+        missing = handler.handle({'action': 'update', 'data': {'id': 'missing', 'value': 2}})
+
+        assert json.loads(fetched['body'])['data']['name'] == 'Test'
+        assert [e['id'] for e in json.loads(listed['body'])['data']] == [entry_id]
+        assert missing['statusCode'] == 404
+
+    def test_compressed_batch_create(self, repository):
+        """Test a compressed batch_create stores every entry"""
+        handler = Handler(service=Service(repository))
+        entries = [{'name': f'Entry {i}', 'value': i} for i in range(60)]
+
+        response = handler.handle({
+            'action': 'batch_create',
+            'encoding': GZIP_BASE64,
+            'data': encode_data({'entries': entries})
+        })
+
+        ids = json.loads(response['body'])['data']['ids']
+        assert len(ids) == 60
+        assert repository.get_by_id(ids[59]).name == 'Entry 59'
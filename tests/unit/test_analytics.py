@@ -0,0 +1,99 @@
+"""
+Unit tests for value analytics over columnar buffers
+"""
+import random
+import pytest
+
+from src.model.models import ValueColumns
+from src.service import analytics
+from src.service.analytics import summarize_values
+
+
+@pytest.fixture(params=['python', 'numpy'])
+def backend(request, monkeypatch):
+    """Run each test with the pure Python and the NumPy implementation"""
+    if request.param == 'numpy':
+        pytest.importorskip('numpy')
+    else:
+        monkeypatch.setattr(analytics, 'np', None)
+    return request.param
+
+
+def _columns(rows):
+    columns = ValueColumns()
+    columns.add_all(rows)
+    return columns
+
+
+class TestValueColumns:
+    """Tests for the columnar buffers"""
+    
+    def test_names_are_encoded_once(self):
+        """Test names are stored once and rows keep integer codes"""
+        columns = _columns([("A", 1), ("B", 2), ("A", 3)])
+        
+        assert columns.names == ["A", "B"]
+        assert list(columns.name_codes) == [0, 1, 0]
+        assert list(columns.values) == [1, 2, 3]
+        assert columns.values.itemsize + columns.name_codes.itemsize == 12
+    
+    def test_extend_remaps_codes(self):
+        """Test merging buffers maps each page's codes onto the shared names"""
+        merged = _columns([("A", 1)])
+        merged.extend(_columns([("B", 2), ("A", 3)]))
+        
+        assert merged.names == ["A", "B"]
+        assert list(merged.name_codes) == [0, 1, 0]
+        assert len(merged) == 3
+
+
+class TestSummarizeValues:
+    """Tests for summarize_values"""
+    
+    def test_distribution(self, backend):
+        """Test percentiles, histogram and per-name means on known values"""
+        columns = _columns([("A", v) for v in range(0, 100, 2)] + [("B", v) for v in range(1, 100, 2)])
+        
+        summary = summarize_values(columns, percentiles=[0, 25, 50, 100], bins=4)
+        
+        assert (summary['count'], summary['min'], summary['max']) == (100, 0, 99)
+        assert summary['mean'] == pytest.approx(49.5)
+        assert summary['percentiles'] == pytest.approx({'p0': 0, 'p25': 24.75, 'p50': 49.5, 'p100': 99})
+        assert summary['histogram']['edges'] == pytest.approx([0, 24.75, 49.5, 74.25, 99])
+        assert summary['histogram']['counts'] == [25, 25, 25, 25]
+        assert summary['by_name'] == {
+            'A': {'count': 50, 'mean': pytest.approx(49)},
+            'B': {'count': 50, 'mean': pytest.approx(50)}
+        }
+    
+    def test_single_value(self, backend):
+        """Test a single distinct value gets a unit-wide histogram"""
+        summary = summarize_values(_columns([("A", 7), ("A", 7)]), bins=2)
+        
+        assert summary['percentiles'] == {'p50': 7.0, 'p90': 7.0, 'p99': 7.0}
+        assert summary['histogram'] == {'edges': [6.5, 7.0, 7.5], 'counts': [0, 2]}
+    
+    def test_empty(self, backend):
+        """Test an empty table has a count of zero and no statistics"""
+        summary = summarize_values(ValueColumns(), percentiles=[50])
+        
+        assert summary['count'] == 0
+        assert summary['percentiles'] == {'p50': None}
+        assert summary['histogram'] == {'edges': [], 'counts': []}
+    
+    def test_python_matches_numpy(self, monkeypatch):
+        """Test the pure Python fallback gives the same results as NumPy"""
+        pytest.importorskip('numpy')
+        rng = random.Random(7)
+        columns = _columns((f"Team {rng.randrange(20)}", rng.randrange(10_000)) for _ in range(5000))
+        
+        with_numpy = summarize_values(columns, percentiles=[1, 33.3, 50, 99.9], bins=17)
+        monkeypatch.setattr(analytics, 'np', None)
+        without_numpy = summarize_values(columns, percentiles=[1, 33.3, 50, 99.9], bins=17)
+        
+        assert without_numpy['histogram']['counts'] == with_numpy['histogram']['counts']
+        assert without_numpy['mean'] == pytest.approx(with_numpy['mean'])
+        assert without_numpy['percentiles'] == pytest.approx(with_numpy['percentiles'])
+        assert without_numpy['histogram']['edges'] == pytest.approx(with_numpy['histogram']['edges'])
+        for name, stats in with_numpy['by_name'].items():
+            assert without_numpy['by_name'][name] == pytest.approx(stats)
@@ -0,0 +1,262 @@
+"""
+Unit tests for the DynamoDB client factory, rate limiter and circuit breaker
+"""
+import json
+import pytest
+import boto3
+from botocore.awsrequest import AWSResponse
+from botocore.config import Config
+
+from src.database.database import (
+    CircuitBreaker,
+    ClientConfig,
+    Deadline,
+    ThrottledError,
+    ThrottleGuard,
+    TokenBucket,
+)
+
+
+class FakeClock:
+    """Manually advanced monotonic clock"""
+
+    def __init__(self):
+        self.now = 0.0
+        self.slept = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    """Create a fake clock"""
+    return FakeClock()
+
+
+class FakeTransport:
+    """Answers DynamoDB requests at the HTTP layer and counts them"""
+
+    def __init__(self, client):
+        self.responses = []
+        self.requests = 0
+        client.meta.events.register('before-send.dynamodb', self._send)
+
+    def add(self, status, body):
+        self.responses.append((status, body))
+
+    def _send(self, request, **kwargs):
+        self.requests += 1
+        status, body = self.responses.pop(0)
+        raw = _RawBody(json.dumps(body).encode())
+        return AWSResponse(request.url, status, {}, raw)
+
+
+class _RawBody:
+    def __init__(self, data):
+        self.data = data
+
+    def stream(self, **kwargs):
+        yield self.data
+
+
+@pytest.fixture
+def client():
+    """Create a DynamoDB client without botocore retries"""
+    return boto3.client(
+        'dynamodb', region_name='us-east-1',
+        aws_access_key_id='testing', aws_secret_access_key='testing',
+        config=Config(retries={'mode': 'standard', 'total_max_attempts': 1})
+    )
+
+
+@pytest.fixture
+def transport(client):
+    """Attach a fake transport to the client"""
+    return FakeTransport(client)
+
+
+THROTTLED = {
+    '__type': 'com.amazonaws.dynamodb.v20120810#ProvisionedThroughputExceededException',
+    'message': 'Rate exceeded'
+}
+
+
+class TestClientConfig:
+    """Unit tests for ClientConfig"""
+
+    def test_defaults_use_adaptive_retries(self, monkeypatch):
+        """Test adaptive retry mode is the default"""
+        monkeypatch.delenv('DYNAMODB_RETRY_MODE', raising=False)
+
+        config = ClientConfig.from_env()
+
+        assert config.botocore_config().retries == {'mode': 'adaptive', 'total_max_attempts': 5}
+
+    def test_from_env(self, monkeypatch):
+        """Test settings are read from environment variables"""
+        monkeypatch.setenv('DYNAMODB_TARGET_RPS', '50')
+        monkeypatch.setenv('DYNAMODB_BREAKER_THRESHOLD', '3')
+
+        config = ClientConfig.from_env()
+
+        assert config.target_rps == 50.0
+        assert config.breaker_threshold == 3
+
+    def test_connection_pool_settings_from_env(self, monkeypatch):
+        """Test pool size, keep-alive and timeouts reach the botocore config"""
+        monkeypatch.setenv('DYNAMODB_MAX_POOL_CONNECTIONS', '50')
+        monkeypatch.setenv('DYNAMODB_TCP_KEEPALIVE', 'false')
+        monkeypatch.setenv('DYNAMODB_CONNECT_TIMEOUT', '2')
+        monkeypatch.setenv('DYNAMODB_READ_TIMEOUT', '3.5')
+
+        botocore_config = ClientConfig.from_env().botocore_config()
+
+        assert botocore_config.max_pool_connections == 50
+        assert botocore_config.tcp_keepalive is False
+        assert botocore_config.connect_timeout == 2.0
+        assert botocore_config.read_timeout == 3.5
+
+    def test_from_env_invalid_number(self, monkeypatch):
+        """Test non-numeric settings are rejected"""
+        monkeypatch.setenv('DYNAMODB_MAX_ATTEMPTS', 'many')
+
+        with pytest.raises(ValueError, match='DYNAMODB_MAX_ATTEMPTS'):
+            ClientConfig.from_env()
+
+
+class TestTokenBucket:
+    """Unit tests for TokenBucket"""
+
+    def test_burst_then_waits_for_refill(self, clock):
+        """Test calls beyond the burst wait for tokens at the target rate"""
+        bucket = TokenBucket(rate=10, capacity=2, clock=clock, sleep=clock.sleep)
+
+        assert bucket.acquire() is True
+        assert bucket.acquire() is True
+        assert bucket.acquire() is True
+
+        assert clock.slept == [pytest.approx(0.1)]
+
+    def test_rejects_when_wait_exceeds_max_wait(self, clock):
+        """Test a call is rejected instead of waiting too long"""
+        bucket = TokenBucket(rate=1, capacity=1, clock=clock, sleep=clock.sleep)
+        bucket.acquire()
+
+        assert bucket.acquire(max_wait=0.5) is False
+        assert clock.slept == []
+
+
+class TestCircuitBreaker:
+    """Unit tests for CircuitBreaker"""
+
+    def test_opens_after_threshold_and_fails_fast(self, clock):
+        """Test consecutive failures open the breaker"""
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30, clock=clock)
+        breaker.record_failure()
+        breaker.record_failure()
+
+        with pytest.raises(ThrottledError) as exc_info:
+            breaker.before_call()
+
+        assert breaker.state == CircuitBreaker.OPEN
+        assert exc_info.value.retry_after == 30
+
+    def test_half_open_trial_closes_on_success(self, clock):
+        """Test a successful trial call after the timeout closes the breaker"""
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30, clock=clock)
+        breaker.record_failure()
+        clock.now = 31
+
+        breaker.before_call()
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        with pytest.raises(ThrottledError):
+            breaker.before_call()
+
+        breaker.record_success()
+        assert breaker.state == CircuitBreaker.CLOSED
+
+    def test_half_open_trial_failure_reopens(self, clock):
+        """Test a failed trial call reopens the breaker"""
+        breaker = CircuitBreaker(failure_threshold=5, reset_timeout=30, clock=clock)
+        for _ in range(5):
+            breaker.record_failure()
+        clock.now = 31
+        breaker.before_call()
+
+        breaker.record_failure()
+
+        assert breaker.state == CircuitBreaker.OPEN
+
+
+class TestDeadline:
+    """Unit tests for Deadline"""
+
+    def test_from_context_keeps_margin(self, clock, monkeypatch):
+        """Test the deadline falls DEADLINE_MARGIN_SECONDS before the function timeout"""
+        monkeypatch.setenv('DEADLINE_MARGIN_SECONDS', '5')
+        context = type('Context', (), {'get_remaining_time_in_millis': lambda self: 30000})()
+
+        deadline = Deadline.from_context(context, clock=clock)
+
+        assert deadline.remaining() == 25
+        clock.now = 24.9
+        assert not deadline.expired()
+        clock.now = 25
+        assert deadline.expired()
+        assert deadline.remaining() == 0
+
+    def test_margin_capped_at_half_the_remaining_time(self, clock):
+        """Test a short timeout still leaves half of it for the work"""
+        context = type('Context', (), {'get_remaining_time_in_millis': lambda self: 3000})()
+
+        assert Deadline.from_context(context, margin=2, clock=clock).remaining() == 1.5
+
+    def test_no_deadline_without_context(self):
+        """Test direct invocations without a Lambda context run unbounded"""
+        assert Deadline.from_context(None) is None
+
+
+class TestThrottleGuard:
+    """Unit tests for ThrottleGuard installed on a client"""
+
+    def test_throttling_error_raises_and_trips_breaker(self, client, transport, clock):
+        """Test throttled calls raise ThrottledError and open the breaker"""
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30, clock=clock)
+        ThrottleGuard(breaker=breaker).install(client)
+        transport.add(400, THROTTLED)
+
+        with pytest.raises(ThrottledError):
+            client.get_item(TableName='t', Key={'id': {'S': '1'}})
+        with pytest.raises(ThrottledError, match='circuit breaker'):
+            client.get_item(TableName='t', Key={'id': {'S': '1'}})
+
+        # The open breaker failed the second call without sending it
+        assert transport.requests == 1
+
+    def test_success_passes_through(self, client, transport, clock):
+        """Test successful calls are returned unchanged"""
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30, clock=clock)
+        ThrottleGuard(breaker=breaker).install(client)
+        transport.add(200, {'Item': {'id': {'S': '1'}}})
+
+        response = client.get_item(TableName='t', Key={'id': {'S': '1'}})
+
+        assert response['Item'] == {'id': {'S': '1'}}
+        assert breaker.state == CircuitBreaker.CLOSED
+
+    def test_rate_limit_rejects_when_bucket_empty(self, client, transport, clock):
+        """Test calls beyond the target rate are rejected past the max wait"""
+        limiter = TokenBucket(rate=1, capacity=1, clock=clock, sleep=clock.sleep)
+        ThrottleGuard(limiter=limiter, limiter_max_wait=0).install(client)
+        transport.add(200, {})
+
+        client.get_item(TableName='t', Key={'id': {'S': '1'}})
+        with pytest.raises(ThrottledError, match='rate limit'):
+            client.get_item(TableName='t', Key={'id': {'S': '1'}})
+
+        assert transport.requests == 1
@@ -0,0 +1,72 @@
+"""
+Unit tests for compressed event payloads
+"""
+import base64
+import gzip
+import json
+import pytest
+
+from src.messaging.encoding import GZIP_BASE64, decode_event, encode_data
+
+# Lambda async invocation payload limit
+ASYNC_PAYLOAD_LIMIT = 256 * 1024
+
+
+class TestDecodeEvent:
+    """Tests for decode_event"""
+    
+    def test_round_trip(self):
+        """Test encoded data decodes to the original and drops the encoding"""
+        data = {'entries': [{'name': 'Équipe', 'value': 1}]}
+        event = {'action': 'batch_create', 'encoding': GZIP_BASE64, 'data': encode_data(data)}
+        
+        assert decode_event(event) == {'action': 'batch_create', 'data': data}
+    
+    def test_plain_event_unchanged(self):
+        """Test events without an encoding are returned as they are"""
+        event = {'action': 'list'}
+        
+        assert decode_event(event) is event
+    
+    @pytest.mark.parametrize('encoding, data, message', [
+        ('zstd', 'abc', 'Unsupported encoding'),
+        (GZIP_BASE64, {'name': 'x'}, 'base64 string'),
+        (GZIP_BASE64, 'not base64!', 'not valid base64'),
+        (GZIP_BASE64, base64.b64encode(b'plain text').decode(), 'not valid gzip'),
+        (GZIP_BASE64, base64.b64encode(gzip.compress(b'{"a": '))[:-12].decode(), 'truncated'),
+        (GZIP_BASE64, base64.b64encode(gzip.compress(b'{not json')).decode(), 'not valid JSON'),
+        (GZIP_BASE64, encode_data([1, 2]), 'must be a JSON object'),
+        (GZIP_BASE64, encode_data('text'), 'must be a JSON object'),
+    ])
+    def test_invalid_data(self, encoding, data, message):
+        """Test undecodable data is rejected with a clear error"""
+        with pytest.raises(ValueError, match=message):
+            decode_event({'action': 'create', 'encoding': encoding, 'data': data})
+    
+    @pytest.mark.parametrize('event', [None, [1, 2], 'list', 42])
+    def test_event_not_an_object(self, event):
+        """Test an event that is not a JSON object is rejected, not a TypeError"""
+        with pytest.raises(ValueError, match='Event must be a JSON object'):
+            decode_event(event)
+    
+    def test_decompressed_size_limit(self, monkeypatch):
+        """Test a small payload cannot expand past the decompressed size limit"""
+        bomb = base64.b64encode(gzip.compress(b'[' + b'0,' * 5_000_000 + b'0]')).decode()
+        event = {'action': 'create', 'encoding': GZIP_BASE64, 'data': bomb}
+        
+        with pytest.raises(ValueError, match='exceeds 1000 bytes'):
+            decode_event(event, max_size=1000)
+        
+        monkeypatch.setenv('MAX_DECOMPRESSED_BYTES', '2048')
+        with pytest.raises(ValueError, match='exceeds 2048 bytes'):
+            decode_event(event)
+    
+    def test_compression_fits_more_entries(self):
+        """Test a batch too large for an async invocation fits once compressed"""
+        data = {'entries': [{'name': f'Player {i % 500}', 'value': i % 1000} for i in range(10_000)]}
+        plain = json.dumps({'action': 'batch_create', 'data': data})
+        compressed = json.dumps({'action': 'batch_create', 'encoding': GZIP_BASE64, 'data': encode_data(data)})
+        
+        assert len(plain) > ASYNC_PAYLOAD_LIMIT
+        assert len(compressed) < ASYNC_PAYLOAD_LIMIT
+        assert len(plain) / len(compressed) > 4
@@ -5,8 +5,11 @@ import json
 import pytest
 from unittest.mock import Mock
 
+from src.database.database import ThrottledError
 from src.messaging.handler import Handler
-from src.model.models import Entry
+from src.messaging.encoding import GZIP_BASE64, encode_data
+from src.model.models import BulkUpdateResult, ChangeSet, Entry, PurgeResult
+from src.repository.errors import TransactionCancelledError, WriteDeferredError
 
 
 class TestHandlerUnit:
@@ -57,6 +60,60 @@ class TestHandlerUnit:
             value=42
         )
     
+    def test_handle_batch_create_success(self, handler, mock_service):
+        """Test batch_create creates every entry and returns their IDs"""
+        mock_service.create_test_entries.return_value = [Entry(id="1"), Entry(id="2")]
+        entries = [{'name': 'A', 'value': 1}, {'name': 'B', 'value': 2}]
+        
+        response = handler.handle({'action': 'batch_create', 'data': {'entries': entries}})
+        
+        assert response['statusCode'] == 200
+        assert json.loads(response['body'])['data'] == {'created': 2, 'ids': ['1', '2'], 'unprocessed': 0}
+        mock_service.create_test_entries.assert_called_once_with(entries, deadline=None)
+    
+    def test_handle_batch_create_partly_written(self, handler, mock_service):
+        """Test entries a throttled batch did not write get a null ID and count as unprocessed"""
+        mock_service.create_test_entries.return_value = [Entry(id="1"), None, Entry(id="3")]
+        entries = [{'name': str(i), 'value': i} for i in range(4)]
+        
+        response = handler.handle({'action': 'batch_create', 'data': {'entries': entries}})
+        
+        assert response['statusCode'] == 200
+        assert json.loads(response['body'])['data'] == {'created': 2, 'ids': ['1', None, '3'], 'unprocessed': 2}
+    
+    def test_handle_compressed_data(self, handler, mock_service):
+        """Test gzip+base64 data is decoded before validation and dispatch"""
+        mock_service.create_test_entries.return_value = [Entry(id=str(i)) for i in range(1000)]
+        entries = [{'name': f'Entry {i}', 'value': i} for i in range(1000)]
+        
+        response = handler.handle({
+            'action': 'batch_create',
+            'encoding': GZIP_BASE64,
+            'data': encode_data({'entries': entries})
+        })
+        
+        assert response['statusCode'] == 200
+        mock_service.create_test_entries.assert_called_once_with(entries, deadline=None)
+    
+    def test_handle_compressed_data_is_validated(self, handler, mock_service):
+        """Test decoded data is checked against the schema like plain data"""
+        response = handler.handle({
+            'action': 'create',
+            'encoding': GZIP_BASE64,
+            'data': encode_data({'name': '', 'value': 1})
+        })
+        
+        assert response['statusCode'] == 400
+        assert 'Validation error' in json.loads(response['body'])['error']
+        mock_service.create_test_entry.assert_not_called()
+    
+    def test_handle_undecodable_data(self, handler, mock_service):
+        """Test corrupt compressed data is rejected with 400"""
+        response = handler.handle({'action': 'create', 'encoding': GZIP_BASE64, 'data': 'AAAA'})
+        
+        assert response['statusCode'] == 400
+        assert 'gzip' in json.loads(response['body'])['error']
+    
     def test_handle_get_success(self, handler, mock_service):
         """Test successful get action"""
         entry = Entry(id="123", name="Test", value=42)
@@ -87,7 +144,7 @@ class TestHandlerUnit:
             Entry(id="1", name="Entry 1", value=10),
             Entry(id="2", name="Entry 2", value=20)
         ]
-        mock_service.list_test_entries.return_value = entries
+        mock_service.iter_test_entries.return_value = iter(entries)
         
         event = {'action': 'list'}
         response = handler.handle(event)
@@ -97,6 +154,55 @@ class TestHandlerUnit:
         assert len(body['data']) == 2
         assert body['data'][0]['id'] == '1'
     
+    def test_handle_count_success(self, handler, mock_service):
+        """Test count returns only the number of entries"""
+        mock_service.count_test_entries.return_value = 7
+        
+        all_entries = handler.handle({'action': 'count'})
+        by_name = handler.handle({'action': 'count', 'data': {'name': 'Team'}})
+        
+        assert json.loads(all_entries['body']) == {'data': {'count': 7}}
+        assert by_name['statusCode'] == 200
+        mock_service.count_test_entries.assert_called_with(name='Team')
+    
+    def test_handle_analytics_success(self, handler, mock_service):
+        """Test analytics passes the options through and returns the summary"""
+        mock_service.get_value_analytics.return_value = {'count': 0}
+        
+        response = handler.handle({'action': 'analytics', 'data': {'percentiles': [50, 99.9], 'bins': 5}})
+        default = handler.handle({'action': 'analytics'})
+        
+        assert json.loads(response['body']) == {'data': {'count': 0}}
+        assert default['statusCode'] == 200
+        mock_service.get_value_analytics.assert_any_call(percentiles=[50, 99.9], bins=5)
+        mock_service.get_value_analytics.assert_called_with(percentiles=None, bins=10)
+    
+    def test_handle_list_changed_since_success(self, handler, mock_service):
+        """Test list_changed_since returns entries and the cursor"""
+        mock_service.list_changed_since.return_value = ChangeSet(
+            entries=[Entry(id="1", name="Entry 1", value=10, updated_at="2025-01-02T00:00:00+00:00")],
+            cursor="2025-01-02T00:00:00+00:00",
+            has_more=False
+        )
+        
+        event = {'action': 'list_changed_since', 'data': {'since': '2025-01-01T00:00:00+00:00', 'limit': 5}}
+        response = handler.handle(event)
+        
+        assert response['statusCode'] == 200
+        body = json.loads(response['body'])
+        assert body['data'][0]['id'] == '1'
+        assert body['cursor'] == '2025-01-02T00:00:00+00:00'
+        assert body['has_more'] is False
+        mock_service.list_changed_since.assert_called_once_with('2025-01-01T00:00:00+00:00', limit=5)
+    
+    def test_handle_list_changed_since_missing_since(self, handler, mock_service):
+        """Test list_changed_since without since fails schema validation"""
+        event = {'action': 'list_changed_since', 'data': {}}
+        response = handler.handle(event)
+        
+        assert response['statusCode'] == 400
+        mock_service.list_changed_since.assert_not_called()
+    
     def test_handle_update_success(self, handler, mock_service):
         """Test successful update action"""
         updated_entry = Entry(id="123", name="Updated", value=100)
@@ -110,6 +216,70 @@ class TestHandlerUnit:
         assert body['message'] == 'Entry updated successfully'
         assert body['data']['name'] == 'Updated'
     
+    def test_handle_transact_update_success(self, handler, mock_service):
+        """Test transact_update returns the per-entry results"""
+        results = [{'id': '1', 'updated_at': '2025-01-01T12:00:00+00:00'}]
+        mock_service.transact_update_test_entries.return_value = results
+        
+        event = {'action': 'transact_update', 'data': {'updates': [{'id': '1', 'value': 3}]}}
+        response = handler.handle(event)
+        
+        assert response['statusCode'] == 200
+        assert json.loads(response['body'])['data'] == results
+        mock_service.transact_update_test_entries.assert_called_once_with([{'id': '1', 'value': 3}])
+    
+    def test_handle_transact_update_cancelled_returns_409(self, handler, mock_service):
+        """Test a cancelled transaction reports which entries caused it"""
+        mock_service.transact_update_test_entries.side_effect = TransactionCancelledError(
+            ['1', '2'], [None, 'not_found']
+        )
+        
+        event = {'action': 'transact_update', 'data': {'updates': [{'id': '1'}, {'id': '2'}]}}
+        response = handler.handle(event)
+        
+        assert response['statusCode'] == 409
+        assert json.loads(response['body'])['reasons'] == [{'id': '2', 'reason': 'not_found'}]
+    
+    def test_handle_transact_update_schema_limits(self, handler, mock_service):
+        """Test transact_update needs between 1 and 100 updates"""
+        empty = handler.handle({'action': 'transact_update', 'data': {'updates': []}})
+        too_many = handler.handle({
+            'action': 'transact_update',
+            'data': {'updates': [{'id': str(i)} for i in range(101)]}
+        })
+        
+        assert empty['statusCode'] == 400
+        assert too_many['statusCode'] == 400
+        mock_service.transact_update_test_entries.assert_not_called()
+    
+    def test_handle_bulk_update_reports_progress(self, handler, mock_service):
+        """Test bulk_update returns the counts and the continuation token"""
+        mock_service.bulk_update_test_entries.return_value = BulkUpdateResult(
+            matched=3, updated=2, continuation_token='abc'
+        )
+        
+        event = {'action': 'bulk_update', 'data': {
+            'where': {'name': 'Team A'}, 'set': {'value': 0}, 'limit': 3
+        }}
+        response = handler.handle(event)
+        
+        assert response['statusCode'] == 200
+        assert json.loads(response['body'])['data'] == {
+            'matched': 3, 'updated': 2, 'continuation_token': 'abc', 'has_more': True
+        }
+        mock_service.bulk_update_test_entries.assert_called_once_with(
+            {'name': 'Team A'}, {'value': 0}, limit=3, continuation_token=None, deadline=None
+        )
+    
+    def test_handle_bulk_update_schema(self, handler, mock_service):
+        """Test bulk_update needs a predicate and at least one field to set"""
+        no_where = handler.handle({'action': 'bulk_update', 'data': {'where': {}, 'set': {'value': 0}}})
+        no_set = handler.handle({'action': 'bulk_update', 'data': {'where': {'name': 'A'}, 'set': {}}})
+        
+        assert no_where['statusCode'] == 400
+        assert no_set['statusCode'] == 400
+        mock_service.bulk_update_test_entries.assert_not_called()
+    
     def test_handle_delete_success(self, handler, mock_service):
         """Test successful delete action"""
         mock_service.delete_test_entry.return_value = True
@@ -121,6 +291,20 @@ class TestHandlerUnit:
         body = json.loads(response['body'])
         assert body['message'] == 'Entry deleted successfully'
     
+    def test_handle_purge_success(self, handler, mock_service):
+        """Test purge reports how many entries were deleted"""
+        mock_service.purge_entries.return_value = PurgeResult(deleted=12, continuation_token='next')
+        
+        response = handler.handle({'action': 'purge', 'data': {'max_age_seconds': 86400}})
+        
+        assert response['statusCode'] == 200
+        assert json.loads(response['body'])['data'] == {
+            'deleted': 12, 'continuation_token': 'next', 'has_more': True
+        }
+        mock_service.purge_entries.assert_called_once_with(
+            max_age_seconds=86400, continuation_token=None, deadline=None
+        )
+    
     def test_handle_schema_validation_empty_name(self, handler, mock_service):
         """Test create with empty name fails schema validation"""
         event = {'action': 'create', 'data': {'name': '', 'value': 42}}
@@ -158,3 +342,42 @@ class TestHandlerUnit:
         assert response['statusCode'] == 400
         body = json.loads(response['body'])
         assert 'Validation error' in body['error']
+    
+    @pytest.mark.parametrize('event', [
+        None,
+        [{'action': 'list'}],
+        {'action': 'create', 'encoding': GZIP_BASE64, 'data': encode_data([1, 2])},
+    ])
+    def test_handle_non_object_event_returns_400(self, handler, mock_service, event):
+        """Test an event or encoded data that is not an object is a 400, not a 500"""
+        response = handler.handle(event)
+        
+        assert response['statusCode'] == 400
+        assert 'must be a JSON object' in json.loads(response['body'])['error']
+    
+    def test_handle_throttled_returns_429(self, handler, mock_service):
+        """Test throttling and an open circuit breaker fail fast with 429"""
+        mock_service.get_test_entry.side_effect = ThrottledError(
+            "DynamoDB circuit breaker is open", retry_after=12.5
+        )
+        
+        event = {'action': 'get', 'data': {'id': '123'}}
+        response = handler.handle(event)
+        
+        assert response['statusCode'] == 429
+        body = json.loads(response['body'])
+        assert body['retry_after_seconds'] == 12.5
+    
+    def test_handle_deferred_write_returns_202(self, handler, mock_service):
+        """Test a throttled write that was journaled is accepted with 202"""
+        mock_service.update_test_entry.side_effect = WriteDeferredError(
+            '123', {'id': '123', 'value': 5, 'updated_at': '2025-01-01T00:00:00+00:00'}
+        )
+        
+        event = {'action': 'update', 'data': {'id': '123', 'value': 5}}
+        response = handler.handle(event)
+        
+        assert response['statusCode'] == 202
+        body = json.loads(response['body'])
+        assert body['data'] == {'id': '123', 'value': 5, 'updated_at': '2025-01-01T00:00:00+00:00'}
+        assert 'lost if the container is retired' in body['message']
@@ -0,0 +1,247 @@
+"""
+Unit tests for the Bloom filter of entry IDs
+"""
+import io
+import json
+import time
+
+import pytest
+
+from src.database.database import ThrottledError
+from src.model.models import Entry
+from src.repository import id_filter as id_filter_module
+from src.repository.errors import WriteDeferredError
+from src.repository.factory import create_repository
+from src.repository.id_filter import BloomFilter, IdFilter, IdFilterRepository, get_id_filter, publish_metrics
+from src.repository.memory_repository import InMemoryRepository
+
+
+class FakeClock:
+    """Epoch clock advanced by hand, starting at the real time"""
+
+    def __init__(self):
+        self.now = time.time()
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    """Create a clock the tests advance"""
+    return FakeClock()
+
+
+@pytest.fixture
+def table(mocker):
+    """Shared storage, written directly to simulate other containers"""
+    storage = InMemoryRepository()
+    mocker.spy(storage, 'get_by_id')
+    mocker.spy(storage, 'scan_ids')
+    return storage
+
+
+@pytest.fixture
+def repository(table, clock):
+    """Build an IdFilterRepository over the shared storage"""
+    return IdFilterRepository(table, IdFilter(max_staleness=10, full_refresh_interval=600, clock=clock))
+
+
+class TestBloomFilter:
+    """Tests for the Bloom filter itself"""
+
+    def test_no_false_negatives(self):
+        """Test every added key is reported present"""
+        bloom = BloomFilter(2000, 0.01)
+        keys = [f'id-{i}' for i in range(2000)]
+        for key in keys:
+            bloom.add(key)
+
+        assert all(key in bloom for key in keys)
+
+    def test_false_positive_rate_near_target(self):
+        """Test keys never added are reported present at about the configured rate"""
+        bloom = BloomFilter(5000, 0.01)
+        for i in range(5000):
+            bloom.add(f'id-{i}')
+
+        false_positives = sum(f'missing-{i}' in bloom for i in range(20000))
+
+        assert false_positives / 20000 < 0.02
+
+    @pytest.mark.parametrize('capacity, rate', [(0, 0.01), (10, 0), (10, 1)])
+    def test_invalid_parameters(self, capacity, rate):
+        """Test the filter rejects sizes it cannot build"""
+        with pytest.raises(ValueError):
+            BloomFilter(capacity, rate)
+
+
+class TestIdFilterRepository:
+    """Tests for answering lookups of missing IDs from the filter"""
+
+    def test_unbuilt_filter_passes_lookups_through(self, repository, table):
+        """Test lookups reach the repository while the first build runs in the background"""
+        assert repository.get_by_id('missing') is None
+        table.get_by_id.assert_called_once_with('missing')
+
+        repository.id_filter._refresh_thread.join()
+        assert repository.get_by_id('missing') is None
+        table.get_by_id.assert_called_once()
+        table.scan_ids.assert_called_once()
+
+    def test_missing_ids_skip_the_repository(self, repository, table):
+        """Test get, update and delete of unknown IDs return without a repository call"""
+        existing = table.create(Entry(name="Existing", value=1))
+        repository.id_filter.refresh(table)
+
+        assert repository.get_by_id('missing') is None
+        assert repository.update('missing', value=2) is None
+        assert repository.delete('missing') is False
+        assert repository.get_by_id(existing.id) == existing
+
+        table.get_by_id.assert_called_once_with(existing.id)
+        table.scan_ids.assert_called_once()
+        assert repository.id_filter.take_metrics() == {'lookups': 4, 'skipped': 3, 'false_positives': 0}
+
+    def test_throttled_delete_is_not_a_false_positive(self, repository, table, mocker):
+        """Test a throttled delete propagates without counting the ID as a false positive"""
+        existing = table.create(Entry(name="Existing", value=1))
+        repository.id_filter.refresh(table)
+        mocker.patch.object(table, 'delete', side_effect=ThrottledError("Throttled by DynamoDB"))
+
+        with pytest.raises(ThrottledError):
+            repository.delete(existing.id)
+
+        assert repository.id_filter.take_metrics()['false_positives'] == 0
+
+    def test_local_writes_are_added(self, repository, table):
+        """Test IDs created by this container are found before any refresh"""
+        repository.id_filter.refresh(table)
+        created = repository.create(Entry(name="New", value=1))
+        batch = repository.create_many([Entry(name="Batch", value=i) for i in range(3)])
+
+        assert repository.get_by_id(created.id) == created
+        assert all(repository.get_by_id(entry.id) == entry for entry in batch)
+
+    def test_writes_during_rebuild_are_added(self, repository, table, mocker):
+        """Test IDs created by this container while a full refresh scans are in the rebuilt filter"""
+        scan_ids = table.scan_ids
+        created = []
+
+        def scan_then_write(add_page):
+            scan_ids(add_page)
+            created.append(repository.create(Entry(name="During", value=1)))
+        mocker.patch.object(table, 'scan_ids', side_effect=scan_then_write)
+
+        repository.id_filter.refresh(table)
+
+        assert repository.get_by_id(created[0].id) == created[0]
+
+    def test_deferred_create_is_added(self, repository, table, mocker):
+        """Test a journaled create is passed on to later calls for its ID"""
+        repository.id_filter.refresh(table)
+        mocker.patch.object(table, 'create', side_effect=WriteDeferredError('journaled', {'id': 'journaled'}))
+
+        with pytest.raises(WriteDeferredError):
+            repository.create(Entry(name="Deferred", value=1))
+
+        assert repository.id_filter.might_exist('journaled', table)
+
+    def test_stale_filter_passes_lookups_through(self, repository, table, clock):
+        """Test IDs created elsewhere are found once the filter is stale, and after its refresh"""
+        repository.id_filter.refresh(table)
+        elsewhere = table.create(Entry(name="Elsewhere", value=1))
+
+        # Within the staleness bound the new ID is not known yet
+        assert repository.get_by_id(elsewhere.id) is None
+        clock.now += 11
+        assert repository.get_by_id(elsewhere.id) == elsewhere
+
+        repository.id_filter._refresh_thread.join()
+        table.get_by_id.reset_mock()
+        assert repository.get_by_id(elsewhere.id) == elsewhere
+        assert repository.get_by_id('missing') is None
+        table.get_by_id.assert_called_once_with(elsewhere.id)
+        table.scan_ids.assert_called_once()
+
+    def test_deleted_ids_count_as_false_positives_until_rebuild(self, repository, table, clock):
+        """Test deleted IDs reach the repository until a full rebuild drops them"""
+        entry = table.create(Entry(name="Deleted", value=1))
+        repository.id_filter.refresh(table)
+        table.delete(entry.id)
+
+        assert repository.get_by_id(entry.id) is None
+        assert repository.id_filter.take_metrics()['false_positives'] == 1
+
+        clock.now += 601
+        repository.id_filter.refresh(table)
+        assert repository.get_by_id(entry.id) is None
+        assert table.scan_ids.call_count == 2
+        assert repository.id_filter.take_metrics() == {'lookups': 1, 'skipped': 1, 'false_positives': 0}
+
+    def test_over_capacity_rebuilds_larger(self, repository, table, clock):
+        """Test a filter filled past its capacity is rebuilt at the next refresh"""
+        repository.id_filter.refresh(table)
+        repository.create_many([Entry(name="Bulk", value=i) for i in range(1100)])
+
+        clock.now += 11
+        repository.id_filter.refresh(table)
+
+        # Sized for twice the IDs counted, less the few that collided as false positives
+        assert table.scan_ids.call_count == 2
+        assert 2100 < repository.id_filter._bloom.capacity <= 2200
+        assert repository.id_filter._bloom.count == 1100
+
+    def test_failed_refresh_keeps_passing_through(self, repository, table, mocker):
+        """Test a refresh that fails in the background leaves lookups going to the repository"""
+        mocker.patch.object(table, 'scan_ids', side_effect=RuntimeError('scan failed'))
+
+        repository.get_by_id('missing')
+        repository.id_filter._refresh_thread.join()
+        repository.get_by_id('missing')
+        repository.id_filter._refresh_thread.join()
+
+        assert table.get_by_id.call_count == 2
+        assert table.scan_ids.call_count == 2
+
+
+class TestIdFilterConfiguration:
+    """Tests for enabling the filter and publishing its metrics"""
+
+    def test_disabled_by_default(self, monkeypatch):
+        """Test the filter is only used when ID_FILTER_MAX_STALENESS_SECONDS is set"""
+        monkeypatch.setattr(id_filter_module, '_filter', None)
+        monkeypatch.delenv('ID_FILTER_MAX_STALENESS_SECONDS', raising=False)
+        assert get_id_filter() is None
+
+        monkeypatch.setenv('ID_FILTER_MAX_STALENESS_SECONDS', '5')
+        monkeypatch.setenv('ID_FILTER_FALSE_POSITIVE_RATE', '0.001')
+        shared = get_id_filter()
+        assert shared is get_id_filter()
+        assert shared.false_positive_rate == 0.001
+
+    def test_factory_wraps_backend(self, monkeypatch):
+        """Test the factory wraps the backend when the filter is enabled"""
+        monkeypatch.setattr(id_filter_module, '_filter', None)
+        monkeypatch.setenv('ID_FILTER_MAX_STALENESS_SECONDS', '5')
+
+        repository = create_repository('memory')
+
+        assert isinstance(repository, IdFilterRepository)
+        assert repository.get_by_id('missing') is None
+
+    def test_publish_metrics_as_emf(self, repository, monkeypatch):
+        """Test the counters are logged bare as an Embedded Metric Format record and reset"""
+        output = io.StringIO()
+        monkeypatch.setattr(id_filter_module._metrics_handler, 'stream', output)
+        repository.id_filter.refresh(repository.repository)
+        repository.get_by_id('missing')
+
+        publish_metrics(repository.id_filter, namespace='Test')
+        publish_metrics(repository.id_filter, namespace='Test')
+
+        lines = output.getvalue().splitlines()
+        assert len(lines) == 1
+        record = json.loads(lines[0])
+        assert record['_aws']['CloudWatchMetrics'][0]['Namespace'] == 'Test'
+        assert (record['IdFilterLookups'], record['IdFilterSkippedCalls'], record['IdFilterFalsePositives']) == (1, 1, 0)
@@ -0,0 +1,141 @@
+"""
+Unit tests for the write journal
+"""
+import pytest
+
+from src.repository import journal as journal_module
+from src.repository.journal import WriteJournal, collapse, get_write_journal
+
+
+def _put(entry_id, value=1, updated_at='2025-01-01T00:00:00+00:00'):
+    return {'op': 'put', 'item': {
+        'id': entry_id, 'name': 'Entry', 'value': value,
+        'created_at': updated_at, 'updated_at': updated_at, 'updated_day': updated_at[:10]
+    }}
+
+
+def _update(entry_id, name=None, value=None, updated_at='2025-01-02T00:00:00+00:00'):
+    return {'op': 'update', 'id': entry_id, 'name': name, 'value': value, 'updated_at': updated_at}
+
+
+@pytest.fixture
+def journal(tmp_path):
+    """Create an empty journal on tmp_path"""
+    return WriteJournal(str(tmp_path / 'journal.jsonl'))
+
+
+class TestCollapse:
+    """Tests for merging journaled operations per id"""
+
+    def test_updates_fold_into_put(self):
+        """Test updates after a put are applied to the put item"""
+        operations = collapse([
+            _put('a'),
+            _update('a', value=5),
+            _update('a', name='Renamed', updated_at='2025-01-03T00:00:00+00:00')
+        ])
+
+        assert operations == [{'op': 'put', 'item': {
+            'id': 'a', 'name': 'Renamed', 'value': 5, 'created_at': '2025-01-01T00:00:00+00:00',
+            'updated_at': '2025-01-03T00:00:00+00:00', 'updated_day': '2025-01-03'
+        }}]
+
+    def test_updates_merge_latest_wins(self):
+        """Test updates to the same id merge, later fields overriding earlier ones"""
+        operations = collapse([_update('a', name='First', value=1), _update('a', value=2)])
+
+        assert operations == [_update('a', name='First', value=2)]
+
+    def test_order_of_first_write_kept(self):
+        """Test ids keep the order they were first journaled in"""
+        operations = collapse([_put('b'), _update('a', value=1), _update('b', value=2), _put('c')])
+
+        assert [op.get('id') or op['item']['id'] for op in operations] == ['b', 'a', 'c']
+
+    def test_delete_replaces_earlier_writes(self):
+        """Test a delete drops the writes before it and later updates, but not a later put"""
+        operations = collapse([
+            _put('a'), _update('a', value=2), {'op': 'delete', 'id': 'a'}, _update('a', value=3),
+            _update('b', value=1), {'op': 'delete', 'id': 'b'}, _put('b', value=4)
+        ])
+
+        assert operations == [{'op': 'delete', 'id': 'a'}, _put('b', value=4)]
+
+    def test_input_not_modified(self):
+        """Test collapsing leaves the journaled operations untouched"""
+        put = _put('a')
+
+        collapse([put, _update('a', value=9)])
+
+        assert put == _put('a')
+
+
+class TestWriteJournal:
+    """Tests for journal persistence and flushing"""
+
+    def test_append_survives_restart(self, journal):
+        """Test a new process in the same container reloads the journal"""
+        journal.append(_put('a'))
+        journal.append(_update('b', value=3))
+
+        reloaded = WriteJournal(journal.path)
+
+        assert len(reloaded) == 2
+        assert reloaded.pending('a') and reloaded.pending('b')
+        assert not reloaded.pending('c')
+
+    def test_collapsed_state_of_one_id(self, journal):
+        """Test the journaled state of an id is its collapsed operation"""
+        journal.append(_put('a'))
+        journal.append(_update('b', value=2))
+        journal.append(_update('a', value=5))
+
+        assert journal.collapsed('a')['item']['value'] == 5
+        assert journal.collapsed('b') == _update('b', value=2)
+        assert journal.collapsed('c') is None
+
+    def test_partial_line_skipped(self, journal):
+        """Test a line cut short by a crash is skipped"""
+        journal.append(_put('a'))
+        with open(journal.path, 'a') as f:
+            f.write('{"op": "put", "ite')
+
+        assert len(WriteJournal(journal.path)) == 1
+
+    def test_flush_keeps_unapplied_operations(self, journal):
+        """Test operations not applied stay journaled, collapsed, for the next flush"""
+        for operation in (_put('a'), _update('a', value=2), _put('b'), _put('c')):
+            journal.append(operation)
+        seen = []
+
+        applied = journal.flush(lambda operations: seen.append(operations) or 1)
+
+        assert applied == 1
+        assert [op['item']['id'] for op in seen[0]] == ['a', 'b', 'c']
+        assert seen[0][0]['item']['value'] == 2
+        assert not journal.pending('a')
+        assert [op['item']['id'] for op in WriteJournal(journal.path)._operations] == ['b', 'c']
+
+    def test_failed_flush_keeps_everything(self, journal):
+        """Test an unexpected error while applying loses nothing"""
+        journal.append(_put('a'))
+
+        def fail(operations):
+            raise RuntimeError("network down")
+
+        with pytest.raises(RuntimeError):
+            journal.flush(fail)
+
+        assert journal.pending('a')
+        assert journal.flush(lambda operations: len(operations)) == 1
+        assert len(journal) == 0
+
+    def test_disabled_by_default(self, monkeypatch, tmp_path):
+        """Test the journal is only used when WRITE_JOURNAL_ENABLED is set"""
+        monkeypatch.setattr(journal_module, '_journals', {})
+        monkeypatch.delenv('WRITE_JOURNAL_ENABLED', raising=False)
+        assert get_write_journal() is None
+
+        monkeypatch.setenv('WRITE_JOURNAL_ENABLED', 'true')
+        monkeypatch.setenv('WRITE_JOURNAL_PATH', str(tmp_path / 'journal.jsonl'))
+        assert get_write_journal() is get_write_journal()
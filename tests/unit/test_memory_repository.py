@@ -0,0 +1,82 @@
+"""
+Unit tests for the in-memory repository backend and backend selection
+"""
+import pytest
+
+from src.repository import factory
+from src.repository.factory import create_repository
+from src.repository.memory_repository import InMemoryRepository
+from src.repository.repository import Repository
+from src.service.service import Service
+from src.model.models import Entry
+
+
+class TestInMemoryRepository:
+    """Unit tests for InMemoryRepository"""
+    
+    @pytest.fixture
+    def repository(self):
+        """Create an empty in-memory repository"""
+        return InMemoryRepository()
+    
+    def test_returned_entries_are_copies(self, repository):
+        """Test callers cannot mutate stored entries"""
+        created = repository.create(Entry(name="Test", value=1))
+        
+        fetched = repository.get_by_id(created.id)
+        fetched.value = 999
+        
+        assert repository.get_by_id(created.id).value == 1
+    
+    def test_value_index_survives_updates_back_and_forth(self, repository):
+        """Test index keys removed and re-added are not duplicated"""
+        created = repository.create(Entry(name="Test", value=1))
+        repository.create(Entry(name="Other", value=0))
+        
+        repository.update(created.id, value=2)
+        repository.update(created.id, value=1)
+        repository.update(created.id, value=2)
+        repository.update(created.id, value=1)
+        
+        assert [e.value for e in repository.get_by_value_range()] == [0, 1]
+    
+    def test_indexes_at_scale(self, repository):
+        """Test indexes stay consistent with 100k entries"""
+        for i in range(100_000):
+            repository.create(Entry(name=f"Team {i % 100}", value=(i * 7919) % 1000))
+        service = Service(repository)
+        
+        by_name = repository.get_by_name("Team 7")
+        by_value = repository.get_by_value_range(10, 12)
+        
+        assert len(repository) == 100_000
+        assert len(by_name) == 1000
+        assert all(e.name == "Team 7" for e in by_name)
+        assert [e.value for e in by_value] == [10] * 100 + [11] * 100 + [12] * 100
+        assert service.get_test_entry(by_name[0].id) == by_name[0]
+
+
+class TestCreateRepository:
+    """Unit tests for backend selection"""
+    
+    def test_memory_backend_is_shared_per_container(self, monkeypatch):
+        """Test the memory backend keeps data across invocations"""
+        monkeypatch.setenv('REPOSITORY_BACKEND', 'memory')
+        monkeypatch.setattr(factory, '_memory_repository', None)
+        
+        first = create_repository()
+        
+        assert isinstance(first, InMemoryRepository)
+        assert create_repository() is first
+    
+    def test_dynamodb_is_default(self, monkeypatch, mocker):
+        """Test DynamoDB is used when no backend is configured"""
+        monkeypatch.delenv('REPOSITORY_BACKEND', raising=False)
+        mocker.patch('src.repository.repository.DynamoDBConnection')
+        
+        assert isinstance(create_repository(), Repository)
+    
+    def test_unknown_backend(self):
+        """Test unknown backends are rejected"""
+        with pytest.raises(ValueError, match='Unknown repository backend'):
+            create_repository('cassandra')
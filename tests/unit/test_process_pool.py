@@ -0,0 +1,147 @@
+"""
+Unit tests for the worker process pool and the work it takes over
+"""
+import json
+import os
+from unittest.mock import Mock
+
+import pytest
+from jsonschema import ValidationError
+
+from src.messaging import process_pool
+from src.messaging.handler import Handler, validate_event
+from src.messaging.process_pool import WorkerError, WorkerPool, get_process_pool
+from src.messaging.serialization import dumps_entry_list
+from src.model.models import Entry
+
+
+def _square_all(numbers):
+    return [n * n for n in numbers]
+
+
+def _fail_on_three(numbers):
+    if 3 in numbers:
+        raise ValueError("three")
+    return numbers
+
+
+def _exit_worker(_):
+    os._exit(1)
+
+
+@pytest.fixture(scope='module')
+def pool():
+    """Two workers shared by the tests, with every batch sent to them"""
+    workers = WorkerPool(2, min_items=0)
+    yield workers
+    workers.close()
+
+
+def _entries(count):
+    return [
+        Entry(id=f'id-{i}', name=f'Team "{i}" ✓', value=i,
+              created_at='2025-01-01T00:00:00+00:00', updated_at='2025-01-02T00:00:00+00:00')
+        for i in range(count)
+    ]
+
+
+class TestWorkerPool:
+    """Tests for running chunks in worker processes"""
+
+    def test_results_in_input_order(self, pool):
+        """Test results come back in chunk order whichever worker finishes first"""
+        chunks = [[i, i + 1] for i in range(0, 40, 2)]
+
+        assert list(pool.imap(_square_all, chunks)) == [_square_all(c) for c in chunks]
+
+    def test_task_error_leaves_pool_usable(self, pool):
+        """Test a failing chunk raises WorkerError and the next call still works"""
+        with pytest.raises(WorkerError, match='ValueError: three'):
+            list(pool.imap(_fail_on_three, [[1], [2], [3], [4], [5]]))
+
+        assert list(pool.imap(_square_all, [[2], [3]])) == [[4], [9]]
+
+    def test_abandoned_iteration_leaves_pool_usable(self, pool):
+        """Test replies still in flight are collected when the caller stops early"""
+        results = pool.imap(_square_all, [[i] for i in range(10)])
+        assert next(results) == [0]
+        results.close()
+
+        assert list(pool.imap(_square_all, [[5]])) == [[25]]
+
+    def test_dead_worker_is_replaced(self, monkeypatch):
+        """Test a pool whose worker died is reported broken and replaced"""
+        monkeypatch.setattr(process_pool, '_pool', None)
+        monkeypatch.setenv('PROCESS_POOL_WORKERS', '1')
+        first = get_process_pool()
+        try:
+            with pytest.raises(WorkerError, match='exited'):
+                list(first.imap(_exit_worker, [[1]]))
+
+            second = get_process_pool()
+            assert first.broken
+            assert second is not first
+            assert list(second.imap(_square_all, [[3]])) == [[9]]
+        finally:
+            process_pool.close_process_pool()
+
+    def test_disabled_by_default(self, monkeypatch):
+        """Test no processes are started unless PROCESS_POOL_WORKERS is set"""
+        monkeypatch.delenv('PROCESS_POOL_WORKERS', raising=False)
+
+        assert get_process_pool() is None
+
+
+class TestPooledWork:
+    """Tests that pooled validation and encoding match the inline results"""
+
+    def test_encoding_matches_inline(self, pool):
+        """Test list bodies encoded by the workers are byte-for-byte the same"""
+        entries = _entries(2500)
+
+        assert dumps_entry_list(iter(entries), batch_size=300, pool=pool) == dumps_entry_list(entries)
+        assert dumps_entry_list([], pool=pool) == '{"data": []}'
+
+    def test_small_lists_stay_inline(self):
+        """Test lists under min_items never reach the workers"""
+        small = Mock(min_items=100)
+
+        body = dumps_entry_list(_entries(99), pool=small)
+
+        small.imap.assert_not_called()
+        assert len(json.loads(body)['data']) == 99
+
+    def test_validation_accepts_valid_batch(self, pool):
+        """Test a valid large batch passes chunked validation"""
+        entries = [{'name': f'Entry {i}', 'value': i} for i in range(2500)]
+
+        validate_event({'action': 'batch_create', 'data': {'entries': entries}}, pool=pool)
+
+    @pytest.mark.parametrize('event, message', [
+        ({'action': 'batch_create', 'data': {'entries': [{'name': 'ok', 'value': 1}] * 2000
+                                             + [{'name': 'bad', 'value': 'x'}]}}, "'x' is not of type 'integer'"),
+        ({'action': 'batch_create', 'data': {'entries': [{'name': 'ok', 'value': 1}] * 10, 'extra': 1}},
+         "Additional properties"),
+        ({'action': 'batch_create', 'data': {'entries': [{'name': 'ok', 'value': 1}] * 10001}}, "Too many entries"),
+    ])
+    def test_validation_errors(self, pool, event, message):
+        """Test errors in a chunk, in the envelope and in the batch size are reported"""
+        with pytest.raises(ValidationError, match=message):
+            validate_event(event, pool=pool)
+
+    def test_handler_uses_configured_pool(self, monkeypatch, mocker):
+        """Test the handler encodes list bodies in the pool when enabled"""
+        monkeypatch.setattr(process_pool, '_pool', None)
+        monkeypatch.setenv('PROCESS_POOL_WORKERS', '2')
+        monkeypatch.setenv('PROCESS_POOL_MIN_ITEMS', '10')
+        service = Mock()
+        service.iter_test_entries.return_value = iter(_entries(25))
+        imap = mocker.spy(WorkerPool, 'imap')
+        try:
+            response = Handler(service=service).handle({'action': 'list'})
+        finally:
+            process_pool.close_process_pool()
+
+        assert response['statusCode'] == 200
+        assert json.loads(response['body'])['data'][24]['id'] == 'id-24'
+        imap.assert_called_once()
@@ -0,0 +1,140 @@
+"""
+Unit tests for sampled invocation profiling
+"""
+import logging
+import tracemalloc
+import pstats
+import pytest
+from unittest.mock import Mock
+
+from src.messaging.handler import lambda_handler
+from src.messaging.profiling import InvocationProfiler, ProfilingConfig
+
+
+def _work(size):
+    """Allocate and compute something worth profiling"""
+    data = [str(i) * 10 for i in range(size)]
+    return sum(len(item) for item in data)
+
+
+class TestProfilingConfig:
+    """Tests for ProfilingConfig.from_env"""
+
+    def test_disabled_by_default(self, monkeypatch):
+        """Test profiling is off without PROFILING_SAMPLE_RATE"""
+        monkeypatch.delenv('PROFILING_SAMPLE_RATE', raising=False)
+
+        assert InvocationProfiler.from_env().should_profile() is False
+
+    def test_from_env(self, monkeypatch):
+        """Test every setting is read from the environment"""
+        monkeypatch.setenv('PROFILING_SAMPLE_RATE', '0.25')
+        monkeypatch.setenv('PROFILING_MODE', 'cpu')
+        monkeypatch.setenv('PROFILING_TOP_N', '5')
+        monkeypatch.setenv('PROFILING_DUMP_DIR', '/tmp/profiles')
+
+        config = ProfilingConfig.from_env()
+
+        assert config == ProfilingConfig(
+            sample_rate=0.25, cpu=True, memory=False, top_n=5, dump_dir='/tmp/profiles'
+        )
+
+    @pytest.mark.parametrize('name, value', [
+        ('PROFILING_MODE', 'gpu'),
+        ('PROFILING_SAMPLE_RATE', 'often'),
+        ('PROFILING_TOP_N', 'ten'),
+    ])
+    def test_invalid_value_disables_profiling(self, monkeypatch, caplog, name, value):
+        """Test an invalid setting logs a warning and turns profiling off"""
+        monkeypatch.setenv('PROFILING_SAMPLE_RATE', '1')
+        monkeypatch.setenv(name, value)
+
+        config = ProfilingConfig.from_env()
+
+        assert config == ProfilingConfig()
+        assert InvocationProfiler(config).should_profile() is False
+        assert "Profiling disabled" in caplog.text
+
+
+class TestInvocationProfiler:
+    """Tests for InvocationProfiler"""
+
+    def test_sampling(self):
+        """Test only invocations drawn below the sample rate are profiled"""
+        draws = iter([0.05, 0.5])
+        profiler = InvocationProfiler(ProfilingConfig(sample_rate=0.1), sample=lambda: next(draws))
+
+        assert profiler.should_profile() is True
+        assert profiler.should_profile() is False
+
+    def test_unsampled_calls_function_directly(self):
+        """Test a disabled profiler neither samples nor traces memory"""
+        sample = Mock()
+        profiler = InvocationProfiler(ProfilingConfig(sample_rate=0), sample=sample)
+
+        assert profiler.run(_work, 10) == _work(10)
+        sample.assert_not_called()
+        assert tracemalloc.is_tracing() is False
+
+    def test_logs_cpu_and_memory_summary(self, caplog):
+        """Test a sampled invocation logs its top functions and allocation sites"""
+        profiler = InvocationProfiler(ProfilingConfig(sample_rate=1, top_n=3))
+
+        with caplog.at_level(logging.INFO, logger='src.messaging.profiling'):
+            result = profiler.run(_work, 1000, label='req-1')
+
+        summary = caplog.records[-1].getMessage()
+        assert result == _work(1000)
+        assert summary.startswith('profile req-1:')
+        assert '_work' in summary
+        assert 'peak' in summary and 'test_profiling.py' in summary
+        assert tracemalloc.is_tracing() is False
+
+    def test_dumps_to_directory(self, tmp_path):
+        """Test summaries and pstats files are written to the dump directory"""
+        profiler = InvocationProfiler(ProfilingConfig(
+            sample_rate=1, memory=False, dump_dir=str(tmp_path)
+        ))
+
+        profiler.run(_work, 100, label='a/b')
+
+        assert 'cpu (by cumulative time)' in (tmp_path / 'profile-a_b.txt').read_text()
+        stats = pstats.Stats(str(tmp_path / 'profile-a_b.prof'))
+        assert any(func == '_work' for (_, _, func) in stats.stats)
+
+    def test_exceptions_propagate_and_are_profiled(self, caplog):
+        """Test a failing invocation still raises and still reports its profile"""
+        def fail():
+            raise RuntimeError("boom")
+
+        profiler = InvocationProfiler(ProfilingConfig(sample_rate=1, memory=False))
+
+        with caplog.at_level(logging.INFO, logger='src.messaging.profiling'):
+            with pytest.raises(RuntimeError):
+                profiler.run(fail)
+
+        assert 'fail' in caplog.records[-1].getMessage()
+
+    def test_keeps_existing_tracing(self):
+        """Test tracing started by someone else is left running"""
+        tracemalloc.start()
+        try:
+            InvocationProfiler(ProfilingConfig(sample_rate=1, cpu=False)).run(_work, 10)
+            assert tracemalloc.is_tracing() is True
+        finally:
+            tracemalloc.stop()
+
+
+class TestLambdaHandlerProfiling:
+    """Tests for profiling wired into lambda_handler"""
+
+    def test_sampled_invocation_is_profiled(self, monkeypatch, tmp_path):
+        """Test lambda_handler profiles Handler.handle under the request ID"""
+        monkeypatch.setenv('REPOSITORY_BACKEND', 'memory')
+        monkeypatch.setenv('PROFILING_SAMPLE_RATE', '1')
+        monkeypatch.setenv('PROFILING_DUMP_DIR', str(tmp_path))
+
+        response = lambda_handler({'action': 'list'}, Mock(aws_request_id='req-42', get_remaining_time_in_millis=lambda: 30000))
+
+        assert response['statusCode'] == 200
+        assert 'handle' in (tmp_path / 'profile-req-42.txt').read_text()
@@ -0,0 +1,84 @@
+"""
+Unit tests for streaming entry serialization
+"""
+import json
+import sys
+import tracemalloc
+
+from src.messaging.serialization import dumps_entry_list
+from src.model.models import Entry, EntryStream
+
+
+class TestDumpsEntryList:
+    """Tests for dumps_entry_list"""
+    
+    def test_matches_json_dumps(self):
+        """Test the streamed body is identical to json.dumps of the dicts"""
+        entries = [
+            Entry(id="1", name="Plain", value=10, created_at="2025-01-01T00:00:00+00:00",
+                  updated_at="2025-01-02T00:00:00+00:00"),
+            Entry(id="2", name='Quote " backslash \\ tab \t', value=0),
+            Entry(id="3", name="Équipe ⛹ 🏀", value=2**40)
+        ]
+        
+        body = dumps_entry_list(iter(entries))
+        
+        assert body == json.dumps({'data': [entry.to_dict() for entry in entries]})
+    
+    def test_batches_join_seamlessly(self):
+        """Test entries spanning several encode batches keep their separators"""
+        entries = [Entry(id=str(i), name="Entry", value=i) for i in range(7)]
+        
+        body = dumps_entry_list(iter(entries), batch_size=3)
+        
+        assert body == json.dumps({'data': [entry.to_dict() for entry in entries]})
+    
+    def test_empty(self):
+        """Test an empty listing matches json.dumps"""
+        assert dumps_entry_list(iter([])) == json.dumps({'data': []})
+    
+    def test_peak_memory_is_twice_the_body(self):
+        """Test the memory beyond the body is one body-sized copy and a batch, not per-entry objects"""
+        def entries():
+            for i in range(20000):
+                yield Entry(id=f'{i:036d}', name=f'Team {i % 100}', value=i,
+                            created_at='2025-01-01T00:00:00+00:00', updated_at='2025-01-01T00:00:00+00:00')
+        
+        tracemalloc.start()
+        try:
+            body = dumps_entry_list(entries())
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        
+        # json.dumps of the dicts peaks above four bodies for the same entries
+        assert peak < 2 * sys.getsizeof(body) + 256 * 1024
+    
+
+        """Test entries are encoded while the iterator is read, in a single pass"""
+        produced = []
+        
+        def entries():
+            for i in range(3):
+                produced.append(i)
+                yield Entry(id=str(i), name="Entry", value=i)
+        
+        body = json.loads(dumps_entry_list(entries()))
+        
+        assert produced == [0, 1, 2]
+        assert [entry['id'] for entry in body['data']] == ['0', '1', '2']
+    
+    def test_stopped_stream_adds_token(self):
+        """Test a stream stopped by its deadline reports its token after the entries"""
+        def read(stream):
+            yield Entry(id="1", name="Entry", value=1)
+            stream.continuation_token = "next-page"
+        
+        body = dumps_entry_list(EntryStream(read))
+        complete = dumps_entry_list(EntryStream(lambda stream: iter([])))
+        
+        assert json.loads(body) == {
+            'data': [Entry(id="1", name="Entry", value=1).to_dict()],
+            'continuation_token': "next-page"
+        }
+        assert complete == json.dumps({'data': []})
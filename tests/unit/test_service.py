@@ -2,10 +2,11 @@
 Unit tests for Service with mocked repository
 """
 import pytest
+from datetime import datetime, timedelta, timezone
 from unittest.mock import Mock
 
-from src.service.service import Service
-from src.model.models import Entry
+from src.service.service import DEFAULT_BULK_UPDATE_LIMIT, Service
+from src.model.models import BulkUpdateResult, ChangeSet, Entry, PurgeResult, ValueColumns
 
 
 class TestServiceUnit:
@@ -46,6 +47,24 @@ class TestServiceUnit:
         assert call_args.name == "Test Entry"
         assert call_args.value == 42
     
+    def test_create_test_entries(self, service, mock_repository):
+        """Test bulk creates go through create_many in request order"""
+        mock_repository.create_many.side_effect = lambda entries, deadline=None: list(entries)
+        
+        result = service.create_test_entries([{'name': 'A', 'value': 1}, {'name': 'B', 'value': 2}])
+        
+        assert [(e.name, e.value) for e in result] == [('A', 1), ('B', 2)]
+    
+    def test_create_test_entries_marks_unwritten(self, service, mock_repository):
+        """Test entries a throttled batch did not write are None in their request position"""
+        mock_repository.create_many.side_effect = lambda entries, deadline=None: [
+            entry for entry in entries if entry.value in (1, 3)
+        ]
+        
+        result = service.create_test_entries([{'name': str(i), 'value': i} for i in range(1, 5)])
+        
+        assert [entry and entry.value for entry in result] == [1, None, 3]
+    
     def test_get_test_entry(self, service, mock_repository):
         """Test getting an entry by ID"""
         expected_entry = Entry(id="123", name="Test", value=42)
@@ -66,6 +85,62 @@ class TestServiceUnit:
         assert result == entries
         mock_repository.get_all.assert_called_once()
     
+    def test_count_test_entries(self, service, mock_repository):
+        """Test counting delegates to the repository"""
+        mock_repository.count.return_value = 3
+        
+        assert service.count_test_entries(name="Team") == 3
+        mock_repository.count.assert_called_once_with(name="Team")
+    
+    def test_get_value_analytics(self, service, mock_repository):
+        """Test analytics summarize the repository's value columns"""
+        columns = ValueColumns()
+        columns.add_all([("A", 1), ("B", 3)])
+        mock_repository.get_value_columns.return_value = columns
+        
+        summary = service.get_value_analytics(percentiles=[50], bins=2)
+        
+        assert summary['count'] == 2
+        assert summary['percentiles'] == {'p50': 2.0}
+        assert summary['by_name']['B'] == {'count': 1, 'mean': 3.0}
+    
+    def test_get_value_analytics_validation(self, service, mock_repository):
+        """Test out-of-range percentiles and bins are rejected"""
+        with pytest.raises(ValueError, match="Percentiles"):
+            service.get_value_analytics(percentiles=[101])
+        with pytest.raises(ValueError, match="Bins"):
+            service.get_value_analytics(bins=0)
+        
+        mock_repository.get_value_columns.assert_not_called()
+    
+    def test_list_changed_since_normalizes_timestamp(self, service, mock_repository):
+        """Test since is converted to UTC before querying the repository"""
+        change_set = ChangeSet(entries=[Entry(id="1", name="A", value=1)], cursor="c")
+        mock_repository.get_changed_since.return_value = change_set
+        
+        since = datetime.now(timezone(timedelta(hours=2))).replace(microsecond=0)
+        
+        result = service.list_changed_since(since.isoformat(), limit=10)
+        
+        assert result == change_set
+        mock_repository.get_changed_since.assert_called_once_with(
+            since.astimezone(timezone.utc).isoformat(), limit=10
+        )
+    
+    def test_list_changed_since_invalid_timestamp(self, service, mock_repository):
+        """Test non-ISO timestamps are rejected"""
+        with pytest.raises(ValueError, match="ISO 8601"):
+            service.list_changed_since("yesterday")
+        
+        mock_repository.get_changed_since.assert_not_called()
+    
+    def test_list_changed_since_too_old(self, service, mock_repository):
+        """Test cursors outside the lookback window require a full resync"""
+        with pytest.raises(ValueError, match="resync"):
+            service.list_changed_since("2000-01-01T00:00:00+00:00")
+        
+        mock_repository.get_changed_since.assert_not_called()
+    
     def test_update_test_entry(self, service, mock_repository):
         """Test updating an entry"""
         updated_entry = Entry(id="123", name="Updated", value=100)
@@ -76,6 +151,87 @@ class TestServiceUnit:
         assert result == updated_entry
         mock_repository.update.assert_called_once_with("123", name="Updated", value=100)
     
+    def test_transact_update_validates_every_update(self, service, mock_repository):
+        """Test transactional updates reuse the single-update validation"""
+        mock_repository.transact_update.return_value = [{'id': '1'}, {'id': '2'}]
+        
+        result = service.transact_update_test_entries([
+            {'id': '1', 'name': '  Padded  '},
+            {'id': '2', 'value': 5}
+        ])
+        
+        assert result == [{'id': '1'}, {'id': '2'}]
+        mock_repository.transact_update.assert_called_once_with([
+            {'id': '1', 'name': 'Padded', 'value': None},
+            {'id': '2', 'name': None, 'value': 5}
+        ])
+        
+        with pytest.raises(ValueError, match="Value must be non-negative"):
+            service.transact_update_test_entries([{'id': '1'}, {'id': '2', 'value': -1}])
+    
+    def test_transact_update_rejects_duplicate_ids(self, service, mock_repository):
+        """Test an ID may appear only once per transaction"""
+        with pytest.raises(ValueError, match="Duplicate id"):
+            service.transact_update_test_entries([{'id': '1', 'value': 1}, {'id': '1', 'value': 2}])
+        
+        mock_repository.transact_update.assert_not_called()
+    
+    def test_transact_update_limits_size(self, service, mock_repository):
+        """Test empty and oversized transactions are rejected"""
+        with pytest.raises(ValueError, match="empty"):
+            service.transact_update_test_entries([])
+        with pytest.raises(ValueError, match="At most 100"):
+            service.transact_update_test_entries([{'id': str(i)} for i in range(101)])
+        
+        mock_repository.transact_update.assert_not_called()
+    
+    def test_bulk_update_validates_and_defaults_limit(self, service, mock_repository):
+        """Test bulk updates validate the change and cap each call at the default limit"""
+        mock_repository.bulk_update.return_value = BulkUpdateResult(matched=2, updated=2)
+        
+        result = service.bulk_update_test_entries({'name': 'Team A'}, {'name': '  Padded  '})
+        
+        assert result.updated == 2
+        mock_repository.bulk_update.assert_called_once_with(
+            {'name': 'Padded', 'value': None},
+            name='Team A', min_value=None, max_value=None,
+            limit=DEFAULT_BULK_UPDATE_LIMIT, continuation_token=None, deadline=None
+        )
+    
+    @pytest.mark.parametrize('where, changes, limit, message', [
+        ({}, {'value': 1}, None, 'name or a value range'),
+        ({'min_value': 5, 'max_value': 1}, {'value': 1}, None, 'min_value'),
+        ({'name': 'A'}, {}, None, 'Set must have'),
+        ({'name': 'A'}, {'value': -1}, None, 'non-negative'),
+        ({'name': 'A'}, {'value': 1}, 0, 'Limit must be positive'),
+    ])
+    def test_bulk_update_rejects_invalid(self, service, mock_repository, where, changes, limit, message):
+        """Test predicates, changes and limits are validated before any read"""
+        with pytest.raises(ValueError, match=message):
+            service.bulk_update_test_entries(where, changes, limit=limit)
+        
+        mock_repository.bulk_update.assert_not_called()
+    
+    def test_purge_entries(self, service, mock_repository):
+        """Test purge turns the maximum age into a UTC creation cutoff"""
+        mock_repository.purge.return_value = PurgeResult(deleted=3)
+        
+        assert service.purge_entries(max_age_seconds=3600) == PurgeResult(deleted=3)
+        
+        cutoff = datetime.fromisoformat(mock_repository.purge.call_args.kwargs['created_before'])
+        expected = datetime.now(timezone.utc) - timedelta(hours=1)
+        assert abs((cutoff - expected).total_seconds()) < 5
+        
+        service.purge_entries(continuation_token='token')
+        mock_repository.purge.assert_called_with(created_before=None, continuation_token='token', deadline=None)
+    
+    def test_purge_entries_rejects_non_positive_age(self, service, mock_repository):
+        """Test a zero maximum age is rejected instead of deleting everything"""
+        with pytest.raises(ValueError):
+            service.purge_entries(max_age_seconds=0)
+        
+        mock_repository.purge.assert_not_called()
+    
     def test_delete_test_entry(self, service, mock_repository):
         """Test deleting an entry"""
         mock_repository.delete.return_value = True
@@ -0,0 +1,305 @@
+"""
+Unit tests for the /tmp snapshot cache
+"""
+import itertools
+import json
+import time
+
+import pytest
+
+from src.database.database import Deadline
+from src.model.models import Entry
+from src.repository import factory, snapshot
+from src.repository.factory import create_repository
+from src.repository.memory_repository import InMemoryRepository
+from src.repository.snapshot import (
+    SnapshotCache, SnapshotRepository, decode_snapshot, encode_snapshot
+)
+
+
+class FakeClock:
+    """Epoch clock advanced by hand, starting at the real time"""
+
+    def __init__(self):
+        self.now = time.time()
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    """Create a clock the tests advance"""
+    return FakeClock()
+
+
+@pytest.fixture
+def table():
+    """Shared storage, written directly to simulate other containers"""
+    return InMemoryRepository()
+
+
+@pytest.fixture
+def make_repository(table, clock, tmp_path):
+    """Build a SnapshotRepository over the shared storage with a cache on tmp_path"""
+    def make():
+        cache = SnapshotCache(str(tmp_path / 'entries.snapshot'), max_staleness=10,
+                              full_refresh_interval=600, clock=clock)
+        return SnapshotRepository(table, cache)
+    return make
+
+
+class TestSnapshotEncoding:
+    """Tests for the binary snapshot format"""
+
+    def test_round_trip(self):
+        """Test entries, high-water mark and refresh time survive encoding"""
+        entries = [
+            Entry(id='a', name='Ünïcode ⚽', value=-(2 ** 63), created_at='2025-01-01T00:00:00+00:00',
+                  updated_at='2025-01-02T00:00:00.123456+00:00'),
+            Entry(id='b', name='x' * 70000, value=2 ** 63 - 1, created_at=None, updated_at=None)
+        ]
+
+        data = encode_snapshot(entries, '2025-01-03T00:00:00+00:00', 1234.5)
+
+        assert decode_snapshot(data) == (entries, '2025-01-03T00:00:00+00:00', 1234.5)
+
+    def test_smaller_than_json(self):
+        """Test the format is more compact than the JSON list body"""
+        entries = [
+            Entry(id=f'{i:036d}', name=f'Team {i}', value=i,
+                  created_at='2025-01-01T00:00:00+00:00', updated_at='2025-01-01T00:00:00+00:00')
+            for i in range(100)
+        ]
+        as_json = json.dumps([entry.to_dict() for entry in entries]).encode()
+
+        assert len(encode_snapshot(entries, '', 0)) < len(as_json)
+
+    @pytest.mark.parametrize('data', [b'', b'nope', None])
+    def test_corrupt(self, data):
+        """Test truncated or foreign data is rejected"""
+        if data is None:
+            data = encode_snapshot([Entry(id='a', name='A', value=1)], '', 0)[:-1]
+        with pytest.raises(ValueError, match='snapshot'):
+            decode_snapshot(data)
+
+
+class TestSnapshotRepository:
+    """Tests for serving list from the snapshot"""
+
+    def test_warm_reads_skip_the_table(self, table, make_repository, mocker):
+        """Test reads within the staleness bound do not touch the table"""
+        table.create(Entry(name='A', value=1))
+        repository = make_repository()
+        assert len(repository.get_all()) == 1
+
+        iter_all = mocker.spy(table, 'iter_all')
+        get_changed_since = mocker.spy(table, 'get_changed_since')
+
+        assert len(repository.get_all()) == 1
+        iter_all.assert_not_called()
+        get_changed_since.assert_not_called()
+
+    def test_delta_refresh_after_staleness(self, table, clock, make_repository, mocker):
+        """Test stale reads fetch only changes past the high-water mark"""
+        existing = table.create(Entry(name='A', value=1))
+        repository = make_repository()
+        repository.get_all()
+
+        table.update(existing.id, value=2)
+        added = table.create(Entry(name='B', value=3))
+        assert {e.id: e.value for e in repository.get_all()} == {existing.id: 1}
+
+        iter_all = mocker.spy(table, 'iter_all')
+        clock.now += 11
+
+        assert {e.id: e.value for e in repository.get_all()} == {existing.id: 2, added.id: 3}
+        iter_all.assert_not_called()
+
+    def test_remote_deletes_need_full_refresh(self, table, clock, make_repository):
+        """Test deletes by other containers disappear at the next full refresh"""
+        entry = table.create(Entry(name='A', value=1))
+        repository = make_repository()
+        repository.get_all()
+        table.delete(entry.id)
+
+        clock.now += 11
+        assert len(repository.get_all()) == 1
+
+        clock.now += 600
+        assert repository.get_all() == []
+
+    def test_cold_read_streams_under_the_deadline(self, table, make_repository, mocker):
+        """Test a cold read stopped by its deadline is continued by the table and rebuilt later"""
+        for i in range(3):
+            table.create(Entry(name=f'E{i}', value=i))
+        repository = make_repository()
+        deadline = Deadline(1, clock=itertools.count().__next__)
+        mocker.patch.object(table, 'iter_all', wraps=table.iter_all)
+
+        stream = repository.iter_all(deadline=deadline)
+        head = list(stream)
+
+        table.iter_all.assert_called_once_with(deadline=deadline)
+        assert stream.continuation_token is not None
+        assert not repository.cache.loaded
+
+        # The continuation completes the scan, and the snapshot with it
+        rest = list(repository.iter_all(continuation_token=stream.continuation_token))
+        assert len(head + rest) == 3
+        assert repository.cache.loaded
+        table.iter_all.reset_mock()
+        assert sorted(e.value for e in repository.get_all()) == [0, 1, 2]
+        table.iter_all.assert_not_called()
+
+    def test_continuation_of_another_rebuild_passes_through(self, table, make_repository):
+        """Test a token this container did not issue is read from the table without a rebuild"""
+        for i in range(3):
+            table.create(Entry(name=f'E{i}', value=i))
+        stream = table.iter_all(deadline=Deadline(1, clock=itertools.count().__next__))
+        list(stream)
+        repository = make_repository()
+
+        assert list(repository.iter_all(continuation_token=stream.continuation_token))
+        assert not repository.cache.loaded
+
+    def test_delta_refresh_does_not_block_reads(self, table, clock, make_repository, mocker):
+        """Test reads during a delta refresh are served from the snapshot as it is"""
+        entry = table.create(Entry(name='A', value=1))
+        repository = make_repository()
+        repository.get_all()
+        table.update(entry.id, value=2)
+        get_changed_since = table.get_changed_since
+        during = []
+
+        def fetch(since, **kwargs):
+            # Would deadlock if the delta query ran under the cache lock
+            during.extend(e.value for e in repository.get_all())
+            return get_changed_since(since, **kwargs)
+        mocker.patch.object(table, 'get_changed_since', side_effect=fetch)
+        clock.now += 11
+
+        assert [e.value for e in repository.get_all()] == [2]
+        assert during == [1]
+
+    def test_writes_during_rebuild_are_kept(self, table, make_repository):
+        """Test writes made while a rebuild streams are applied over its scan"""
+        kept = table.create(Entry(name='A', value=1))
+        removed = table.create(Entry(name='B', value=2))
+        repository = make_repository()
+
+        stream = repository.iter_all()
+        next(stream)
+        repository.update(kept.id, value=10)
+        repository.delete(removed.id)
+        list(stream)
+
+        assert [(e.name, e.value) for e in repository.cache.entries(table)] == [('A', 10)]
+
+    def test_reads_own_writes(self, table, make_repository):
+        """Test this container's writes are visible without waiting"""
+        repository = make_repository()
+        repository.get_all()
+
+        created = repository.create(Entry(name='A', value=1))
+        many = repository.create_many([Entry(name='B', value=2), Entry(name='C', value=3)])
+        repository.update(created.id, value=10)
+        repository.delete(many[0].id)
+
+        assert sorted((e.name, e.value) for e in repository.get_all()) == [('A', 10), ('C', 3)]
+
+    def test_transact_update_refreshes_next_read(self, table, make_repository):
+        """Test entries updated in a transaction are fetched by the next read"""
+        entry = table.create(Entry(name='A', value=1))
+        repository = make_repository()
+        repository.get_all()
+
+        repository.transact_update([{'id': entry.id, 'value': 5}])
+
+        assert repository.get_all()[0].value == 5
+
+    def test_bulk_update_refreshes_next_read(self, table, make_repository):
+        """Test entries changed by a bulk update are fetched by the next read"""
+        table.create(Entry(name='A', value=1))
+        repository = make_repository()
+        repository.get_all()
+
+        repository.bulk_update({'name': None, 'value': 0}, name='A')
+
+        assert repository.get_all()[0].value == 0
+
+    def test_purge_rebuilds(self, table, make_repository):
+        """Test a purge makes the next read rebuild the snapshot"""
+        table.create(Entry(name='A', value=1))
+        repository = make_repository()
+        repository.get_all()
+
+        repository.purge(created_before='9999-01-01T00:00:00+00:00')
+
+        assert repository.get_all() == []
+
+    def test_returns_copies(self, table, make_repository):
+        """Test callers cannot mutate the snapshot"""
+        table.create(Entry(name='A', value=1))
+        repository = make_repository()
+
+        repository.get_all()[0].value = 999
+
+        assert repository.get_all()[0].value == 1
+
+    def test_other_methods_pass_through(self, table, make_repository):
+        """Test reads other than list go to the table"""
+        entry = table.create(Entry(name='A', value=1))
+        repository = make_repository()
+
+        assert repository.get_by_id(entry.id) == entry
+        assert repository.count() == 1
+
+    def test_restart_loads_snapshot_file(self, table, make_repository, mocker):
+        """Test a new process in the same container starts from the /tmp file"""
+        table.create(Entry(name='A', value=1))
+        make_repository().get_all()
+
+        iter_all = mocker.spy(table, 'iter_all')
+        get_changed_since = mocker.spy(table, 'get_changed_since')
+        restarted = make_repository()
+
+        assert [e.name for e in restarted.get_all()] == ['A']
+        iter_all.assert_not_called()
+        get_changed_since.assert_called_once()
+
+    def test_corrupt_file_is_ignored(self, table, make_repository, tmp_path):
+        """Test an unreadable snapshot file falls back to a full scan"""
+        (tmp_path / 'entries.snapshot').write_bytes(b'garbage')
+        table.create(Entry(name='A', value=1))
+
+        assert len(make_repository().get_all()) == 1
+
+
+class TestSnapshotConfiguration:
+    """Tests for enabling the cache from the environment"""
+
+    @pytest.fixture(autouse=True)
+    def isolated(self, monkeypatch, tmp_path):
+        """Use a fresh cache registry and memory backend"""
+        monkeypatch.setattr(snapshot, '_caches', {})
+        monkeypatch.setattr(factory, '_memory_repository', None)
+        monkeypatch.setenv('REPOSITORY_BACKEND', 'memory')
+        monkeypatch.setenv('SNAPSHOT_PATH', str(tmp_path / 'entries.snapshot'))
+
+    def test_disabled_by_default(self, monkeypatch):
+        """Test the repository is not wrapped without a staleness bound"""
+        monkeypatch.delenv('SNAPSHOT_MAX_STALENESS_SECONDS', raising=False)
+
+        assert isinstance(create_repository(), InMemoryRepository)
+
+    def test_enabled_cache_is_shared_per_container(self, monkeypatch):
+        """Test every invocation's repository uses the same cache"""
+        monkeypatch.setenv('SNAPSHOT_MAX_STALENESS_SECONDS', '30')
+        monkeypatch.setenv('SNAPSHOT_FULL_REFRESH_SECONDS', '300')
+
+        first, second = create_repository(), create_repository()
+
+        assert isinstance(first, SnapshotRepository)
+        assert first.cache is second.cache
+        assert (first.cache.max_staleness, first.cache.full_refresh_interval) == (30, 300)
@@ -0,0 +1,121 @@
+"""
+Unit tests for the DynamoDB Streams consumer using synthetic stream records
+"""
+import pytest
+from decimal import Decimal
+from unittest.mock import Mock, patch
+
+from boto3.dynamodb.types import TypeSerializer
+
+from src.messaging.handler import lambda_handler
+from src.messaging.stream_handler import StreamHandler, is_stream_event
+from src.model.models import Entry
+
+_serializer = TypeSerializer()
+
+
+def _image(entry):
+    """Serialize an Entry the way DynamoDB Streams does"""
+    item = {
+        'id': entry.id,
+        'name': entry.name,
+        'value': Decimal(entry.value),
+        'created_at': entry.created_at,
+        'updated_at': entry.updated_at
+    }
+    return {key: _serializer.serialize(value) for key, value in item.items()}
+
+
+def _record(event_name, sequence_number, new=None, old=None):
+    """Build a synthetic DynamoDB Stream record"""
+    entry = new or old
+    dynamodb = {
+        'Keys': {'id': {'S': entry.id}},
+        'SequenceNumber': sequence_number,
+        'StreamViewType': 'NEW_AND_OLD_IMAGES'
+    }
+    if new:
+        dynamodb['NewImage'] = _image(new)
+    if old:
+        dynamodb['OldImage'] = _image(old)
+    return {
+        'eventID': sequence_number,
+        'eventName': event_name,
+        'eventSource': 'aws:dynamodb',
+        'dynamodb': dynamodb
+    }
+
+
+@pytest.fixture
+def stream_event():
+    """Create a stream batch with an insert, a modify and a remove"""
+    created = Entry(id="1", name="Entry 1", value=10, created_at="t0", updated_at="t0")
+    modified = Entry(id="1", name="Entry 1", value=11, created_at="t0", updated_at="t1")
+    return {
+        'Records': [
+            _record('INSERT', '100', new=created),
+            _record('MODIFY', '200', new=modified, old=created),
+            _record('REMOVE', '300', old=modified)
+        ]
+    }
+
+
+class TestStreamHandlerUnit:
+    """Unit tests for StreamHandler"""
+
+    def test_is_stream_event(self, stream_event):
+        """Test stream batches are told apart from action events"""
+        assert is_stream_event(stream_event) is True
+        assert is_stream_event({'action': 'list'}) is False
+        assert is_stream_event({'Records': [{'eventSource': 'aws:sqs'}]}) is False
+
+    def test_decodes_images_into_entries(self, stream_event):
+        """Test NEW_IMAGE/OLD_IMAGE are decoded into Entry objects"""
+        updater = Mock()
+
+        response = StreamHandler(updaters=[updater]).handle(stream_event)
+
+        assert response == {'batchItemFailures': []}
+        records = updater.call_args[0][0]
+        assert [r.event_name for r in records] == ['INSERT', 'MODIFY', 'REMOVE']
+        assert records[0].old_entry is None
+        assert records[1].new_entry.value == 11
+        assert records[1].old_entry.value == 10
+        assert records[2].new_entry is None
+        assert records[2].keys == {'id': '1'}
+
+    def test_records_are_passed_in_batches(self, stream_event):
+        """Test updaters receive at most batch_size records per call"""
+        updater = Mock()
+
+        StreamHandler(updaters=[updater], batch_size=2).handle(stream_event)
+
+        assert [len(call[0][0]) for call in updater.call_args_list] == [2, 1]
+
+    def test_failure_reports_first_record_of_failed_batch(self, stream_event):
+        """Test a failing batch checkpoints before its first record"""
+        updater = Mock(side_effect=[None, RuntimeError("view store down")])
+
+        response = StreamHandler(updaters=[updater], batch_size=2).handle(stream_event)
+
+        assert response == {'batchItemFailures': [{'itemIdentifier': '300'}]}
+
+    def test_undecodable_record_is_reported(self, stream_event):
+        """Test records before a malformed one are processed and it is reported"""
+        del stream_event['Records'][1]['eventName']
+        updater = Mock()
+
+        response = StreamHandler(updaters=[updater]).handle(stream_event)
+
+        assert len(updater.call_args[0][0]) == 1
+        assert response == {'batchItemFailures': [{'itemIdentifier': '200'}]}
+
+    def test_lambda_handler_routes_stream_events(self, stream_event):
+        """Test lambda_handler dispatches stream batches to registered updaters"""
+        updater = Mock()
+
+        with patch('src.messaging.stream_handler._view_updaters', [updater]):
+            response = lambda_handler(stream_event, None)
+
+        assert response == {'batchItemFailures': []}
+        updater.assert_called_once()